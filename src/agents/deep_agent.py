@@ -9,15 +9,23 @@ This module implements a deep agent that:
 """
 
 import asyncio
+import copy
+import hashlib
 import json
 import logging
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Callable, Optional
 
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+    message_chunk_to_message,
+)
 from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
 from langsmith import traceable
 
 logger = logging.getLogger(__name__)
@@ -31,6 +39,14 @@ class ConfidenceLevel(Enum):
     HIGH = "high"
     VERY_HIGH = "very_high"
 
+    @property
+    def rank(self) -> int:
+        """Position from VERY_LOW (0) to VERY_HIGH (4); the string values do not sort."""
+        return _CONFIDENCE_RANK[self]
+
+
+_CONFIDENCE_RANK = {level: rank for rank, level in enumerate(ConfidenceLevel)}
+
 
 class AgentDecisionType(Enum):
     """Types of decisions an agent can make."""
@@ -91,6 +107,8 @@ class DeepAgent:
         system_prompt: str | None = None,  # Alias for objective
         confidence_threshold: ConfidenceLevel | None = None,  # Alias for min_confidence_for_autonomy
         enable_spawning: bool | None = None,  # Alias for enable_agent_spawning
+        tool_schemas: list[dict] | None = None,
+        on_token: Callable[[str], None] | None = None,
     ):
         """Initialize the deep agent.
 
@@ -109,6 +127,10 @@ class DeepAgent:
             system_prompt: Alternative name for objective (system prompt for the agent)
             confidence_threshold: Alias for min_confidence_for_autonomy
             enable_spawning: Alias for enable_agent_spawning
+            tool_schemas: OpenAI-format schemas of tools, bound instead of
+                converting tools again when several agents share a tool set
+            on_token: Optional callback receiving LLM content deltas as they
+                stream in
         """
         self.role = role
         # Support both objective and system_prompt (system_prompt takes precedence)
@@ -124,10 +146,20 @@ class DeepAgent:
         self.enable_self_correction = enable_self_correction
         self.enable_agent_spawning = enable_spawning if enable_spawning is not None else enable_agent_spawning
         self.validation_callback = validation_callback
+        self.on_token = on_token
+
+        # The system prompt only depends on configuration, so it is rendered
+        # once and shared by clones. Its hash routes OpenAI requests to
+        # servers that have the prompt prefix cached.
+        self._system_message = SystemMessage(content=self._render_system_prompt())
+        prompt_cache_key = hashlib.blake2b(self._system_message.content.encode(), digest_size=16).hexdigest()
 
         # Create LLM
         if self.provider == "anthropic":
             try:
+                # Imported here: the Anthropic SDK is slow to import and only
+                # needed by agents configured for it
+                from langchain_anthropic import ChatAnthropic
                 self.llm = ChatAnthropic(
                     model=model_name,
                     temperature=temperature,
@@ -140,6 +172,7 @@ class DeepAgent:
                 self.llm = ChatOpenAI(
                     model=model_name,
                     temperature=temperature,
+                    extra_body={"prompt_cache_key": prompt_cache_key},
                 )
             except Exception as e:
                 logger.warning(f"Failed to initialize OpenAI LLM: {e}")
@@ -148,7 +181,7 @@ class DeepAgent:
         # Bind tools to LLM
         if tools and self.llm:
             # Force tool calling with tool_choice="required" to prevent hallucinations
-            self.llm_with_tools = self.llm.bind_tools(tools, tool_choice="required")
+            self.llm_with_tools = self.llm.bind_tools(tool_schemas or tools, tool_choice="required")
         else:
             self.llm_with_tools = self.llm
 
@@ -158,6 +191,20 @@ class DeepAgent:
         self.spawned_agents: list["DeepAgent"] = []
         self.current_confidence = ConfidenceLevel.MEDIUM
 
+    def clone(self) -> "DeepAgent":
+        """Copy of this agent with fresh run state.
+
+        Configuration, tools and the bound LLM clients are shared, so a clone
+        is cheap; execution history and spawned agents are not.
+        """
+        agent = copy.copy(self)
+        agent.iteration_count = 0
+        agent.tool_calls = []
+        agent.execution_history = []
+        agent.spawned_agents = []
+        agent.current_confidence = ConfidenceLevel.MEDIUM
+        return agent
+
     @traceable(name="deep_agent.execute")
     async def execute(
         self,
@@ -298,9 +345,19 @@ class DeepAgent:
         }
 
     async def _invoke_llm(self, messages: list[BaseMessage]) -> AIMessage:
-        """Invoke the LLM with retry logic."""
+        """Invoke the LLM, streaming content deltas to on_token when it is set."""
         try:
-            return await self.llm_with_tools.ainvoke(messages)
+            if self.on_token is None:
+                return await self.llm_with_tools.ainvoke(messages)
+            full = None
+            async for chunk in self.llm_with_tools.astream(messages):
+                full = chunk if full is None else full + chunk
+                if chunk.content and isinstance(chunk.content, str):
+                    self.on_token(chunk.content)
+            if full is None:
+                # Nothing was streamed: ask for the reply in one piece
+                return await self.llm_with_tools.ainvoke(messages)
+            return message_chunk_to_message(full)
         except Exception as e:
             logger.error(f"[{self.role}] LLM invocation failed: {e}")
             raise
@@ -321,11 +378,16 @@ class DeepAgent:
                 if not tool_func:
                     result = f"Error: Tool '{tool_name}' not found"
                 else:
-                    # Execute tool
-                    if asyncio.iscoroutinefunction(tool_func.func):
+                    # Execute tool, async-first: MCP tools carry a coroutine that
+                    # runs on this loop. Sync-only tools run in a worker thread
+                    # so parallel graph branches keep running
+                    coroutine = getattr(tool_func, "coroutine", None)
+                    if coroutine is not None:
+                        result = await coroutine(**tool_args)
+                    elif asyncio.iscoroutinefunction(tool_func.func):
                         result = await tool_func.func(**tool_args)
                     else:
-                        result = tool_func.func(**tool_args)
+                        result = await asyncio.to_thread(tool_func.func, **tool_args)
                 
                 tool_messages.append(
                     ToolMessage(
@@ -426,7 +488,7 @@ Respond with JSON:
             confidence = ConfidenceLevel(decision_data["confidence"])
             
             # Check if confidence is below threshold for autonomy
-            if confidence.value < self.min_confidence_for_autonomy.value:
+            if confidence.rank < self.min_confidence_for_autonomy.rank:
                 decision_type = AgentDecisionType.REQUEST_APPROVAL
             
             return AgentDecision(
@@ -539,14 +601,9 @@ Respond with JSON:
         
         return result
 
-    def _build_initial_messages(
-        self,
-        task: str,
-        context: dict[str, Any],
-    ) -> list[BaseMessage]:
-        """Build initial message list for the agent."""
-        
-        system_prompt = f"""You are {self.role}, an autonomous AI agent.
+    def _render_system_prompt(self) -> str:
+        """System prompt for this agent's role, objective and tools."""
+        return f"""You are {self.role}, an autonomous AI agent.
 
 Objective: {self.objective}
 
@@ -562,10 +619,16 @@ Key principles:
 4. Ask for help if confidence is low
 """
 
+    def _build_initial_messages(
+        self,
+        task: str,
+        context: dict[str, Any],
+    ) -> list[BaseMessage]:
+        """Build initial message list for the agent."""
         context_str = json.dumps(context, indent=2) if context else "None"
         
         return [
-            SystemMessage(content=system_prompt),
+            self._system_message,
             HumanMessage(content=f"Task: {task}\n\nContext: {context_str}"),
         ]
 
@@ -110,10 +110,10 @@ class GitHubAgent:
         llm_with_tools = llm.bind_tools(self._tools)
 
         # Define the agent node
-        def agent_node(state: AgentState) -> dict[str, Any]:
+        async def agent_node(state: AgentState) -> dict[str, Any]:
             """Process messages and decide on tool calls."""
             messages = state["messages"]
-            response = llm_with_tools.invoke(messages)
+            response = await llm_with_tools.ainvoke(messages)
             return {"messages": [response]}
 
         # Define the tool node
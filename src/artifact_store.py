@@ -0,0 +1,78 @@
+"""On-disk store for large stage outputs kept out of checkpointed graph state.
+
+Generated code can run to megabytes and would otherwise be serialized into
+every checkpoint after the development stage. Instead the artifact is written
+once as JSON under ``SDLC_ARTIFACT_DIR`` and state holds a small handle:
+``{"_ref": key, "size": chars, "preview": first_chars}``.
+
+Checkpoints only hold the handle, so the store must be reachable wherever the
+checkpointer is: with a persistent ``SDLC_CHECKPOINTER`` that other processes or
+workers resume from, point ``SDLC_ARTIFACT_DIR`` at shared storage. A handle
+whose file is gone fails loudly in load_artifact. Graphs delete an
+artifact with delete_artifact once a revise replaces it or its code has been
+pushed; any other artifact is the only copy of its output and stays until
+removed explicitly.
+"""
+
+import json
+import logging
+import os
+import uuid
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def _artifact_path(key: str) -> str:
+    return os.path.join(os.getenv("SDLC_ARTIFACT_DIR", ".langgraph/artifacts"), f"{key}.json")
+
+
+def is_artifact_ref(value: Any) -> bool:
+    """True if value is a handle returned by store_artifact."""
+    return isinstance(value, dict) and "_ref" in value
+
+
+def store_artifact(obj: Any, preview_chars: int = 2000, key: str | None = None) -> Any:
+    """Write obj to the artifact store and return its handle (obj itself if the write fails).
+    
+    key names the artifact (a new one is generated by default), so a reader that
+    only knows the key can resolve it with ``load_artifact({"_ref": key})``.
+    """
+    text = json.dumps(obj)
+    key = key or uuid.uuid4().hex
+    path = _artifact_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    except OSError as e:
+        logger.warning(f"Could not store artifact ({e}), keeping it inline in state")
+        return obj
+    return {"_ref": key, "size": len(text), "preview": text[:preview_chars]}
+
+
+def load_artifact(value: Any) -> Any:
+    """Resolve a handle to its artifact; any other value is returned unchanged."""
+    if not is_artifact_ref(value):
+        return value
+    path = _artifact_path(value["_ref"])
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(
+            f"Artifact {value['_ref']} not found at {path}; SDLC_ARTIFACT_DIR must be "
+            "shared by every process that resumes runs from the checkpointer"
+        ) from e
+
+
+def delete_artifact(value: Any) -> None:
+    """Remove the artifact behind a handle; any other value is ignored."""
+    if not is_artifact_ref(value):
+        return
+    try:
+        os.remove(_artifact_path(value["_ref"]))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not delete artifact {value['_ref']} ({e})")
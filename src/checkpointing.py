@@ -0,0 +1,141 @@
+"""Configurable checkpointers for the SDLC pipeline graphs.
+
+LangGraph Studio / the LangGraph API server inject their own persistence, so by
+default no checkpointer is attached. Set ``SDLC_CHECKPOINTER`` to persist state
+when the graph is run outside Studio:
+
+- ``memory``   - in-process MemorySaver (dev / tests)
+- ``sqlite``   - AsyncSqliteSaver at ``SDLC_CHECKPOINT_SQLITE_PATH``
+                 (requires ``langgraph-checkpoint-sqlite``)
+- ``postgres`` - AsyncPostgresSaver over a shared connection pool at
+                 ``SDLC_CHECKPOINT_POSTGRES_URL`` (requires
+                 ``langgraph-checkpoint-postgres`` and ``psycopg[pool]``)
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from langgraph.checkpoint.memory import MemorySaver
+
+logger = logging.getLogger(__name__)
+
+
+def _sqlite_checkpointer():
+    """Create an AsyncSqliteSaver; the connection is opened lazily on first use."""
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    class LazySqliteSaver(AsyncSqliteSaver):
+        """Binds to the event loop it is first used on.
+
+        Graphs are compiled at import time, where there is no running event loop
+        for the base class to capture.
+        """
+
+        def __init__(self, conn: aiosqlite.Connection):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # The base class captures the running loop; construct inside a
+                # throwaway loop and rebind the real one in setup()
+                async def init():
+                    super(LazySqliteSaver, self).__init__(conn)
+
+                bootstrap_loop = asyncio.new_event_loop()
+                try:
+                    bootstrap_loop.run_until_complete(init())
+                finally:
+                    bootstrap_loop.close()
+            else:
+                super().__init__(conn)
+
+        async def setup(self) -> None:
+            if not self.is_setup:
+                self.loop = asyncio.get_running_loop()
+            await super().setup()
+
+    path = os.getenv("SDLC_CHECKPOINT_SQLITE_PATH", ".langgraph/checkpoints.db")
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return LazySqliteSaver(aiosqlite.connect(path))
+
+
+def _postgres_checkpointer():
+    """Create an AsyncPostgresSaver backed by a bounded connection pool."""
+    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+
+    class PooledPostgresSaver(AsyncPostgresSaver):
+        """Opens the pool and runs migrations on first use.
+
+        Graphs are compiled at import time, where there is no running event loop
+        to open an async pool on.
+        """
+
+        def __init__(self, pool: AsyncConnectionPool):
+            # The base class captures the running loop (only used by its sync
+            # bridge methods); construct inside a throwaway loop and rebind the
+            # real one on first use.
+            async def init():
+                super(PooledPostgresSaver, self).__init__(pool)
+
+            bootstrap_loop = asyncio.new_event_loop()
+            try:
+                bootstrap_loop.run_until_complete(init())
+            finally:
+                bootstrap_loop.close()
+            self._ready = False
+            self._ready_lock = asyncio.Lock()
+            self._setup_task = None
+
+        @asynccontextmanager
+        async def _cursor(self, *, pipeline: bool = False):
+            if not self._ready and asyncio.current_task() is not self._setup_task:
+                async with self._ready_lock:
+                    if not self._ready:
+                        self.loop = asyncio.get_running_loop()
+                        self._setup_task = asyncio.current_task()
+                        await self.conn.open()
+                        await self.setup()
+                        self._ready = True
+            async with super()._cursor(pipeline=pipeline) as cur:
+                yield cur
+
+    url = os.getenv("SDLC_CHECKPOINT_POSTGRES_URL") or os.getenv("DATABASE_URL")
+    if not url:
+        raise ValueError("SDLC_CHECKPOINT_POSTGRES_URL is not set")
+
+    pool = AsyncConnectionPool(
+        url,
+        min_size=int(os.getenv("SDLC_CHECKPOINT_POOL_MIN", "1")),
+        max_size=int(os.getenv("SDLC_CHECKPOINT_POOL_MAX", "10")),
+        open=False,
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+    )
+    return PooledPostgresSaver(pool)
+
+
+def make_checkpointer():
+    """Build the checkpointer selected by ``SDLC_CHECKPOINTER`` (None when unset)."""
+    kind = os.getenv("SDLC_CHECKPOINTER", "").strip().lower()
+    if not kind or kind == "none":
+        return None
+    if kind == "memory":
+        return MemorySaver()
+
+    factories = {"sqlite": _sqlite_checkpointer, "postgres": _postgres_checkpointer}
+    factory = factories.get(kind)
+    if factory is None:
+        logger.warning(f"Unknown SDLC_CHECKPOINTER '{kind}', using in-memory checkpointer")
+        return MemorySaver()
+
+    try:
+        checkpointer = factory()
+        logger.info(f"Using {kind} checkpointer")
+        return checkpointer
+    except Exception as e:
+        logger.warning(f"Could not create {kind} checkpointer ({e}), using in-memory checkpointer")
+        return MemorySaver()
@@ -0,0 +1,28 @@
+"""Per-event-loop values for asyncio primitives shared at module level.
+
+asyncio locks and semaphores bind to the loop they first wait on, while Studio,
+the sync wrappers and tests run the graphs on several loops. Module-level
+primitives are therefore kept in a ``weakref.WeakKeyDictionary`` keyed by the
+loop and created on first use from that loop.
+"""
+
+import asyncio
+import weakref
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def loop_local(registry: weakref.WeakKeyDictionary, factory: Callable[[], T]) -> T:
+    """The registry's value for the running loop, created with factory on first use.
+
+    Closed loops are swept when a new loop is added: a primitive that was ever
+    waited on references its loop, which would keep the weak key alive.
+    """
+    loop = asyncio.get_running_loop()
+    value = registry.get(loop)
+    if value is None:
+        for old in [old for old in list(registry.keys()) if old.is_closed()]:
+            registry.pop(old, None)
+        value = registry[loop] = factory()
+    return value
@@ -18,6 +18,9 @@ from mcp.client.stdio import stdio_client
 
 logger = logging.getLogger(__name__)
 
+# Maximum sub-requests accepted by the ADO work item $batch endpoint
+WORK_ITEM_BATCH_LIMIT = 200
+
 
 class AzureDevOpsMCPClient:
     """Client for interacting with Azure DevOps via MCP Server (stdio).
@@ -761,6 +764,118 @@ class AzureDevOpsMCPClient:
             },
         )
 
+    async def bulk_create_work_items(
+        self,
+        items: list[dict[str, Any]],
+        project: str | None = None,
+        max_concurrency: int = 8,
+    ) -> list[Any]:
+        """Create many work items concurrently through the MCP server.
+
+        Args:
+            items: Work items as {work_item_type, title, description?, parent_id?}.
+            project: Project name (uses default if not specified).
+            max_concurrency: Maximum create calls in flight (ADO rate limits).
+
+        Returns:
+            One result per item, in order: the created work item, or an error dict.
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def create_one(item: dict[str, Any]) -> Any:
+            parent = {"System.Parent": item["parent_id"]} if item.get("parent_id") else {}
+            async with sem:
+                return await self.create_work_item(
+                    item.get("work_item_type", "Issue"),
+                    item.get("title", ""),
+                    item.get("description", ""),
+                    project=project,
+                    **parent,
+                )
+
+        results = await asyncio.gather(*(create_one(item) for item in items), return_exceptions=True)
+        return [{"error": str(r)} if isinstance(r, Exception) else r for r in results]
+
+    def _work_item_batch_request(self, item: dict[str, Any], project: str) -> dict[str, Any]:
+        """Build one $batch sub-request creating a work item."""
+        operations = [
+            {"op": "add", "path": "/fields/System.Title", "value": item.get("title", "")},
+        ]
+        if item.get("description"):
+            operations.append({"op": "add", "path": "/fields/System.Description", "value": item["description"]})
+        if item.get("parent_id"):
+            operations.append({
+                "op": "add",
+                "path": "/relations/-",
+                "value": {
+                    "rel": "System.LinkTypes.Hierarchy-Reverse",
+                    "url": f"https://dev.azure.com/{self.organization}/_apis/wit/workItems/{item['parent_id']}",
+                },
+            })
+
+        work_item_type = item.get("work_item_type", "Issue")
+        return {
+            "method": "PATCH",
+            "uri": f"/{project}/_apis/wit/workitems/${work_item_type}?api-version=7.1",
+            "headers": {"Content-Type": "application/json-patch+json"},
+            "body": operations,
+        }
+
+    async def create_work_items_batch(
+        self,
+        items: list[dict[str, Any]],
+        project: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Create many work items with the ADO REST $batch API (up to 200 per request).
+
+        Args:
+            items: Work items as {work_item_type, title, description?, parent_id?}.
+            project: Project name (uses default if not specified).
+
+        Returns:
+            One result per item, in order: the created work item, or an error dict.
+        """
+        project = (project or self.project or "").strip()
+        if not project:
+            raise ValueError("Azure DevOps project is required to create work items")
+        if not self._pat:
+            raise RuntimeError(
+                "ADO PAT not available for batch REST calls. Set ADO_MCP_AUTH_TOKEN (or AZURE_DEVOPS_EXT_PAT)."
+            )
+
+        token = base64.b64encode(f":{self._pat}".encode("utf-8")).decode("utf-8")
+        headers = {
+            "Authorization": f"Basic {token}",
+            "Content-Type": "application/json",
+        }
+        url = f"https://dev.azure.com/{self.organization}/_apis/wit/$batch?api-version=7.1"
+
+        results: list[dict[str, Any]] = []
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            for start in range(0, len(items), WORK_ITEM_BATCH_LIMIT):
+                chunk = items[start:start + WORK_ITEM_BATCH_LIMIT]
+                payload = [self._work_item_batch_request(item, project) for item in chunk]
+                resp = await client.post(url, headers=headers, json=payload)
+                if resp.status_code >= 400:
+                    logger.error(f"❌ REST API error {resp.status_code}: {resp.text}")
+                    results.extend({"error": f"HTTP {resp.status_code}: {resp.text[:200]}"} for _ in chunk)
+                    continue
+
+                for entry in resp.json().get("value", []):
+                    body = entry.get("body")
+                    if isinstance(body, str):
+                        try:
+                            body = json.loads(body)
+                        except json.JSONDecodeError:
+                            body = {"text": body}
+                    if entry.get("code", 200) >= 400:
+                        results.append({"error": f"HTTP {entry.get('code')}: {str(body)[:200]}"})
+                    else:
+                        results.append(body or {})
+
+        logger.info(f"✅ REST $batch created {sum(1 for r in results if 'error' not in r)}/{len(items)} work items")
+        return results
+
     async def update_work_item(
         self,
         work_item_id: int,
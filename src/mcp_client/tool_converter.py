@@ -29,7 +29,7 @@ def mcp_tools_to_langchain(
                 """Execute the MCP tool."""
                 result = await tool_executor(tool_name, kwargs)
                 if isinstance(result, dict):
-                    return json.dumps(result, indent=2)
+                    return json.dumps(result, separators=(",", ":"), ensure_ascii=False, default=str)
                 return str(result)
 
             return tool_func
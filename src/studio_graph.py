@@ -8,16 +8,18 @@ COMPLETE PIPELINE STAGES:
 2. requirements → requirements_approval
 3. work_items → work_items_approval
 4. ado_push_confirm → ado_push
-5. test_plan_confirm → test_plan_input → test_plan
+5. test_plan_setup (test_plan_confirm → test_plan_wizard) → test_plan
 6. architecture → architecture_approval
 7. mermaid_render_confirm → mermaid_render
 8. development → development_approval
-9. github_push_confirm → github_push_input → github_push
+9. github_push_setup (github_push_confirm → github_push_wizard) → github_push
 10. completed / failed
 """
 
+import functools
 import os
 import logging
+import threading
 from typing import Annotated, Any
 from typing_extensions import TypedDict
 
@@ -35,14 +37,22 @@ from src.agents import (
     DeveloperAgent,
 )
 from src.agents.base_agent import AgentMessage
+from src.checkpointing import make_checkpointer
 
 logger = logging.getLogger(__name__)
 
 
 def reducer(current: list, new: list | None) -> list:
-    """Reducer for message lists - appends new messages."""
-    if new is None:
+    """Reducer for message lists - appends new messages.
+    
+    Only copies when both sides are non-empty; updates that add nothing
+    return the current list as is. The current list must not be extended in
+    place: LangGraph still references it from the previous step's checkpoint.
+    """
+    if not new:
         return current
+    if not current:
+        return new
     return current + new
 
 
@@ -95,8 +105,13 @@ class PipelineGraphState(TypedDict, total=False):
 
 _ado_client = None
 _github_client = None
+_mermaid_client = None
+_mermaid_client_lock = threading.Lock()
 _agents = None
 
+# Maximum concurrent Mermaid renders (each spawns an MCP server process)
+_MERMAID_CONCURRENCY = int(os.getenv("SDLC_MERMAID_WORKERS", "4"))
+
 
 def get_ado_client():
     """Lazily initialize ADO MCP client."""
@@ -152,6 +167,20 @@ def get_github_client():
     return _github_client
 
 
+def get_mermaid_client():
+    """Lazily initialize a Mermaid MCP client shared by all render workers."""
+    global _mermaid_client
+    with _mermaid_client_lock:
+        if _mermaid_client is None:
+            try:
+                from src.mcp_client import MermaidMCPClient
+                _mermaid_client = MermaidMCPClient()
+                logger.info("Mermaid client initialized")
+            except Exception as e:
+                logger.warning(f"Could not initialize Mermaid client: {e}")
+    return _mermaid_client
+
+
 def get_agents():
     """Lazily initialize agents with proper clients."""
     global _agents
@@ -632,16 +661,108 @@ async def test_plan_confirm_node(state: PipelineGraphState) -> dict:
 
 def route_after_test_plan_confirm(state: PipelineGraphState) -> str:
     response = _get_response_str(state.get("confirmation_response", "")).lower()
-    if response in ("new", "yes", "y", "create"):
-        return "test_plan_input_name"
-    elif response in ("existing", "exist", "use"):
-        return "test_plan_input_existing"
+    if response in ("new", "yes", "y", "create", "existing", "exist", "use"):
+        return "test_plan_wizard"
     else:
         return "architecture"
 
 
-async def test_plan_input_name_node(state: PipelineGraphState) -> dict:
-    """Input: Test Plan Name."""
+def _resolve_iteration(response_str: str, available_iterations: list[str]) -> str:
+    """Map a numbered selection or a pasted path to an iteration path."""
+    if response_str.isdigit():
+        idx = int(response_str) - 1
+        if 0 <= idx < len(available_iterations):
+            return available_iterations[idx]
+    return _normalize_ado_path(response_str)
+
+
+def _format_iterations(available_iterations: list[str]) -> str:
+    """Number the iterations for easy selection."""
+    iterations_list = [f"  {i}. {path}" for i, path in enumerate(available_iterations[:20], 1)]
+    return "\n".join(iterations_list) if iterations_list else "  (none found)"
+
+
+async def test_plan_wizard_node(state: PipelineGraphState) -> dict:
+    """Collect Test Plan inputs with sequential interrupts in a single node.
+    
+    Each interrupt() resumes in order, so the new/existing wizard steps no longer
+    need one graph node (and one super-step) per prompt.
+    """
+    mode = _get_response_str(state.get("confirmation_response", "")).lower()
+    inputs = dict(state.get("test_plan_inputs") or {})
+    available_iterations = inputs.get("available_iterations", [])
+    iterations_display = _format_iterations(available_iterations)
+    messages = []
+    
+    if mode in ("existing", "exist", "use"):
+        # Existing plan: Plan ID -> Suite ID -> Iteration
+        plan_response = interrupt({
+            "type": "input",
+            "stage": "test_plan_input_existing_plan",
+            "message": "🧪 Enter Existing Test Plan ID",
+            "instructions": "Enter the numeric Plan ID from Azure DevOps (e.g., '123').\nType 'skip' to cancel.",
+        })
+        plan_str = _get_response_str(plan_response)
+        
+        if plan_str.lower() in ("skip", "cancel", ""):
+            return {
+                "test_plan_inputs": None,
+                "messages": [{"role": "human", "content": "User cancelled", "stage": "test_plan_input_existing"}]
+            }
+        
+        try:
+            plan_id = int(plan_str)
+        except ValueError:
+            return {
+                "test_plan_inputs": {"error": f"Invalid Plan ID: {plan_str}"},
+                "messages": [{"role": "warning", "content": f"Invalid Plan ID: {plan_str}", "stage": "test_plan_input_existing"}]
+            }
+        
+        inputs["plan_id"] = plan_id
+        inputs["use_existing"] = True
+        messages.append({"role": "human", "content": f"Plan ID: {plan_id}", "stage": "test_plan_input_existing"})
+        
+        suite_response = interrupt({
+            "type": "input",
+            "stage": "test_plan_input_suite",
+            "message": "🧪 Enter Existing Test Suite ID",
+            "instructions": "Enter the numeric Suite ID from Azure DevOps (e.g., '456').\nType 'skip' to cancel.",
+        })
+        suite_str = _get_response_str(suite_response)
+        
+        if suite_str.lower() in ("skip", "cancel", ""):
+            return {
+                "test_plan_inputs": None,
+                "messages": messages + [{"role": "human", "content": "User cancelled", "stage": "test_plan_input_suite"}]
+            }
+        
+        try:
+            suite_id = int(suite_str)
+        except ValueError:
+            return {
+                "test_plan_inputs": {"error": f"Invalid Suite ID: {suite_str}"},
+                "messages": messages + [{"role": "warning", "content": f"Invalid Suite ID: {suite_str}", "stage": "test_plan_input_suite"}]
+            }
+        
+        inputs["suite_id"] = suite_id
+        messages.append({"role": "human", "content": f"Suite ID: {suite_id}", "stage": "test_plan_input_suite"})
+        
+        response = interrupt({
+            "type": "input",
+            "stage": "test_plan_input_iteration_existing",
+            "message": "🧪 Select Iteration Path for Test Cases",
+            "instructions": f"""Available Iterations:
+{iterations_display}
+
+Enter the iteration number or paste the full path.""",
+        })
+        iteration = _resolve_iteration(_get_response_str(response), available_iterations)
+        inputs["iteration"] = iteration
+        messages.append({"role": "human", "content": f"Iteration: {iteration}", "stage": "test_plan_input_iteration_existing"})
+        
+        return {"test_plan_inputs": inputs, "messages": messages}
+    
+    # New plan: Name -> Iteration -> Description
     project_name = state.get("project_name", "new-project")
     default_name = f"{project_name} - Test Plan"
     
@@ -652,29 +773,9 @@ async def test_plan_input_name_node(state: PipelineGraphState) -> dict:
         "instructions": f"Enter a name for the Test Plan, or press Enter for default.",
         "default": default_name,
     })
-    
-    response_str = _get_response_str(response)
-    plan_name = response_str if response_str else default_name
-    
-    existing_inputs = state.get("test_plan_inputs", {})
-    existing_inputs["plan_name"] = plan_name
-    
-    return {
-        "test_plan_inputs": existing_inputs,
-        "messages": [{"role": "human", "content": f"Plan Name: {plan_name}", "stage": "test_plan_input_name"}]
-    }
-
-
-async def test_plan_input_iteration_node(state: PipelineGraphState) -> dict:
-    """Input: Iteration Path (with list of available iterations)."""
-    existing_inputs = state.get("test_plan_inputs", {})
-    available_iterations = existing_inputs.get("available_iterations", [])
-    
-    # Number the iterations for easy selection
-    iterations_list = []
-    for i, path in enumerate(available_iterations[:20], 1):
-        iterations_list.append(f"  {i}. {path}")
-    iterations_display = "\n".join(iterations_list) if iterations_list else "  (none found)"
+    plan_name = _get_response_str(response) or default_name
+    inputs["plan_name"] = plan_name
+    messages.append({"role": "human", "content": f"Plan Name: {plan_name}", "stage": "test_plan_input_name"})
     
     response = interrupt({
         "type": "input",
@@ -686,210 +787,41 @@ async def test_plan_input_iteration_node(state: PipelineGraphState) -> dict:
 Enter the iteration number (e.g., '1') or paste the full path.
 Type 'skip' to cancel Test Plan creation.""",
     })
-    
     response_str = _get_response_str(response)
     
     if response_str.lower() in ("skip", "cancel", ""):
-        existing_inputs["iteration"] = None
+        inputs["iteration"] = None
         return {
-            "test_plan_inputs": existing_inputs,
-            "messages": [{"role": "human", "content": "User cancelled - no iteration selected", "stage": "test_plan_input_iteration"}]
+            "test_plan_inputs": inputs,
+            "messages": messages + [{"role": "human", "content": "User cancelled - no iteration selected", "stage": "test_plan_input_iteration"}]
         }
     
-    # Check if user entered a number
-    if response_str.isdigit():
-        idx = int(response_str) - 1
-        if 0 <= idx < len(available_iterations):
-            iteration = available_iterations[idx]
-        else:
-            iteration = _normalize_ado_path(response_str)
-    else:
-        iteration = _normalize_ado_path(response_str)
-    
-    existing_inputs["iteration"] = iteration
+    iteration = _resolve_iteration(response_str, available_iterations)
+    inputs["iteration"] = iteration
+    messages.append({"role": "human", "content": f"Iteration: {iteration}", "stage": "test_plan_input_iteration"})
     
-    return {
-        "test_plan_inputs": existing_inputs,
-        "messages": [{"role": "human", "content": f"Iteration: {iteration}", "stage": "test_plan_input_iteration"}]
-    }
-
-
-async def test_plan_input_description_node(state: PipelineGraphState) -> dict:
-    """Input: Description (optional)."""
     response = interrupt({
         "type": "input",
         "stage": "test_plan_input_description",
         "message": "🧪 Step 3/3: Enter Description (optional)",
         "instructions": "Enter a description for the Test Plan, or press Enter to skip.",
     })
-    
     response_str = _get_response_str(response)
+    inputs["description"] = response_str if response_str.lower() not in ("skip", "") else ""
+    inputs["use_existing"] = False
+    messages.append({"role": "human", "content": f"Description: {inputs['description'] or '(none)'}", "stage": "test_plan_input_description"})
     
-    existing_inputs = state.get("test_plan_inputs", {})
-    existing_inputs["description"] = response_str if response_str.lower() not in ("skip", "") else ""
-    existing_inputs["use_existing"] = False
-    
-    return {
-        "test_plan_inputs": existing_inputs,
-        "messages": [{"role": "human", "content": f"Description: {existing_inputs['description'] or '(none)'}", "stage": "test_plan_input_description"}]
-    }
-
-
-async def test_plan_input_existing_node(state: PipelineGraphState) -> dict:
-    """Input: Existing Plan ID and Suite ID."""
-    existing_inputs = state.get("test_plan_inputs", {})
-    available_iterations = existing_inputs.get("available_iterations", [])
-    
-    # First get Plan ID
-    plan_response = interrupt({
-        "type": "input",
-        "stage": "test_plan_input_existing_plan",
-        "message": "🧪 Enter Existing Test Plan ID",
-        "instructions": "Enter the numeric Plan ID from Azure DevOps (e.g., '123').\nType 'skip' to cancel.",
-    })
-    
-    plan_str = _get_response_str(plan_response)
-    
-    if plan_str.lower() in ("skip", "cancel", ""):
-        return {
-            "test_plan_inputs": None,
-            "messages": [{"role": "human", "content": "User cancelled", "stage": "test_plan_input_existing"}]
-        }
-    
-    try:
-        plan_id = int(plan_str)
-    except ValueError:
-        return {
-            "test_plan_inputs": {"error": f"Invalid Plan ID: {plan_str}"},
-            "messages": [{"role": "warning", "content": f"Invalid Plan ID: {plan_str}", "stage": "test_plan_input_existing"}]
-        }
-    
-    existing_inputs["plan_id"] = plan_id
-    existing_inputs["use_existing"] = True
-    
-    return {
-        "test_plan_inputs": existing_inputs,
-        "messages": [{"role": "human", "content": f"Plan ID: {plan_id}", "stage": "test_plan_input_existing"}]
-    }
-
-
-async def test_plan_input_suite_node(state: PipelineGraphState) -> dict:
-    """Input: Existing Suite ID."""
-    existing_inputs = state.get("test_plan_inputs", {})
-    
-    suite_response = interrupt({
-        "type": "input",
-        "stage": "test_plan_input_suite",
-        "message": "🧪 Enter Existing Test Suite ID",
-        "instructions": "Enter the numeric Suite ID from Azure DevOps (e.g., '456').\nType 'skip' to cancel.",
-    })
-    
-    suite_str = _get_response_str(suite_response)
-    
-    if suite_str.lower() in ("skip", "cancel", ""):
-        return {
-            "test_plan_inputs": None,
-            "messages": [{"role": "human", "content": "User cancelled", "stage": "test_plan_input_suite"}]
-        }
-    
-    try:
-        suite_id = int(suite_str)
-    except ValueError:
-        return {
-            "test_plan_inputs": {"error": f"Invalid Suite ID: {suite_str}"},
-            "messages": [{"role": "warning", "content": f"Invalid Suite ID: {suite_str}", "stage": "test_plan_input_suite"}]
-        }
-    
-    existing_inputs["suite_id"] = suite_id
-    
-    return {
-        "test_plan_inputs": existing_inputs,
-        "messages": [{"role": "human", "content": f"Suite ID: {suite_id}", "stage": "test_plan_input_suite"}]
-    }
-
-
-async def test_plan_input_iteration_existing_node(state: PipelineGraphState) -> dict:
-    """Input: Iteration Path for existing plan (needed for test case creation)."""
-    existing_inputs = state.get("test_plan_inputs", {})
-    available_iterations = existing_inputs.get("available_iterations", [])
-    
-    iterations_list = []
-    for i, path in enumerate(available_iterations[:20], 1):
-        iterations_list.append(f"  {i}. {path}")
-    iterations_display = "\n".join(iterations_list) if iterations_list else "  (none found)"
-    
-    response = interrupt({
-        "type": "input",
-        "stage": "test_plan_input_iteration_existing",
-        "message": "🧪 Select Iteration Path for Test Cases",
-        "instructions": f"""Available Iterations:
-{iterations_display}
-
-Enter the iteration number or paste the full path.""",
-    })
-    
-    response_str = _get_response_str(response)
-    
-    if response_str.isdigit():
-        idx = int(response_str) - 1
-        if 0 <= idx < len(available_iterations):
-            iteration = available_iterations[idx]
-        else:
-            iteration = _normalize_ado_path(response_str)
-    else:
-        iteration = _normalize_ado_path(response_str)
-    
-    existing_inputs["iteration"] = iteration
-    
-    return {
-        "test_plan_inputs": existing_inputs,
-        "messages": [{"role": "human", "content": f"Iteration: {iteration}", "stage": "test_plan_input_iteration_existing"}]
-    }
-
-
-def route_after_test_plan_input_iteration(state: PipelineGraphState) -> str:
-    """Route after iteration input."""
-    inputs = state.get("test_plan_inputs", {})
-    if inputs and inputs.get("iteration"):
-        return "test_plan_input_description"
-    else:
-        return "architecture"
-
-
-def route_after_test_plan_input_description(state: PipelineGraphState) -> str:
-    """Route after description input."""
-    inputs = state.get("test_plan_inputs", {})
-    if inputs and inputs.get("iteration"):
-        return "test_plan"
-    else:
-        return "architecture"
+    return {"test_plan_inputs": inputs, "messages": messages}
 
 
-def route_after_test_plan_input_existing(state: PipelineGraphState) -> str:
-    """Route after existing plan ID input."""
-    inputs = state.get("test_plan_inputs", {})
-    if inputs and inputs.get("plan_id"):
-        return "test_plan_input_suite"
-    else:
+def route_after_test_plan_wizard(state: PipelineGraphState) -> str:
+    """Route to test plan creation only when the wizard collected complete inputs."""
+    inputs = state.get("test_plan_inputs") or {}
+    if not inputs.get("iteration"):
         return "architecture"
-
-
-def route_after_test_plan_input_suite(state: PipelineGraphState) -> str:
-    """Route after suite ID input."""
-    inputs = state.get("test_plan_inputs", {})
-    if inputs and inputs.get("suite_id"):
-        return "test_plan_input_iteration_existing"
-    else:
-        return "architecture"
-
-
-def route_after_test_plan_input_iteration_existing(state: PipelineGraphState) -> str:
-    """Route after iteration input for existing plan."""
-    inputs = state.get("test_plan_inputs", {})
-    if inputs and inputs.get("iteration"):
-        return "test_plan"
-    else:
+    if inputs.get("use_existing") and not (inputs.get("plan_id") and inputs.get("suite_id")):
         return "architecture"
+    return "test_plan"
 
 
 async def test_plan_node(state: PipelineGraphState) -> dict:
@@ -1222,59 +1154,49 @@ async def mermaid_render_node(state: PipelineGraphState) -> dict:
     
     output_dir = os.getenv("SDLC_MERMAID_OUTPUT_DIR", "docs/diagrams")
     
-    # Run all blocking operations in a thread pool to avoid event loop issues
-    async def render_all_diagrams():
-        import concurrent.futures
-        
-        def render_single(key: str, mermaid_code: str) -> dict:
-            """Render a single diagram - runs in thread."""
+    render_slots = asyncio.Semaphore(_MERMAID_CONCURRENCY)
+    
+    async def render_single(key: str, mermaid_code: str) -> dict:
+        """Render a single diagram on the node's event loop."""
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            
+            out_path = os.path.join(output_dir, f"{key}.png")
+            
+            client = get_mermaid_client()
+            if client is None:
+                return {"key": key, "status": "error", "error": "MermaidMCPClient not available"}
+            
             try:
-                import os
-                os.makedirs(output_dir, exist_ok=True)
-                
-                out_path = os.path.join(output_dir, f"{key}.png")
-                
-                # Try to use MermaidMCPClient
-                try:
-                    from src.mcp_client import MermaidMCPClient
-                    client = MermaidMCPClient()
-                    
-                    # Run sync version or create event loop for async
-                    import asyncio
-                    try:
-                        loop = asyncio.new_event_loop()
-                        loop.run_until_complete(client.render_mermaid_to_file(mermaid_code, out_path))
-                        loop.close()
-                        return {"key": key, "status": "success", "path": out_path}
-                    except Exception as e:
-                        return {"key": key, "status": "error", "error": str(e)}
-                except ImportError:
-                    return {"key": key, "status": "error", "error": "MermaidMCPClient not available"}
-                    
+                async with render_slots:
+                    await client.render_mermaid_to_file(mermaid_code, out_path)
+                return {"key": key, "status": "success", "path": out_path}
             except Exception as e:
                 return {"key": key, "status": "error", "error": str(e)}
-        
-        # Use thread pool to run all renders in parallel
-        results = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = {
-                executor.submit(render_single, key, value): key 
-                for key, value in diagrams.items() 
-                if isinstance(value, str)
-            }
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    key = futures[future]
-                    results.append({"key": key, "status": "error", "error": str(e)})
-        
-        return results
+                
+        except Exception as e:
+            return {"key": key, "status": "error", "error": str(e)}
+    
+    # Warm the shared client's tool list once so workers skip the listing round-trip
+    client = get_mermaid_client()
+    if client is not None:
+        try:
+            await client.list_tools()
+        except Exception as e:
+            logger.warning(f"Could not list Mermaid tools: {e}")
     
     try:
-        # Run in thread to avoid blocking detection
-        results = await asyncio.to_thread(lambda: asyncio.run(render_all_diagrams()))
+        # The client is async end to end, so renders share this loop instead of
+        # each worker thread building (and tearing down) its own
+        keys = [key for key, value in diagrams.items() if isinstance(value, str)]
+        outcomes = await asyncio.gather(
+            *(render_single(key, diagrams[key]) for key in keys),
+            return_exceptions=True,
+        )
+        results = [
+            {"key": key, "status": "error", "error": str(outcome)} if isinstance(outcome, BaseException) else outcome
+            for key, outcome in zip(keys, outcomes)
+        ]
         
         successes = [r for r in results if r.get("status") == "success"]
         errors = [r for r in results if r.get("status") == "error"]
@@ -1432,17 +1354,16 @@ async def github_push_confirm_node(state: PipelineGraphState) -> dict:
 def route_after_github_push_confirm(state: PipelineGraphState) -> str:
     response = _get_response_str(state.get("confirmation_response", "")).lower()
     if response in ("yes", "y", "push", "ok", "approve"):
-        return "github_push_input"
+        return "github_push_wizard"
     else:
         return "completed"
 
 
-async def github_push_input_node(state: PipelineGraphState) -> dict:
-    """Collect inputs for GitHub push - separate prompts for each field."""
+async def github_push_wizard_node(state: PipelineGraphState) -> dict:
+    """Collect owner, repository and branch for the GitHub push in a single node."""
     project_name = state.get("project_name", "new-project")
     github_owner = os.getenv("GITHUB_OWNER", "")
     
-    # Prompt for owner
     owner_response = interrupt({
         "type": "input",
         "stage": "github_push_input_owner",
@@ -1450,20 +1371,8 @@ async def github_push_input_node(state: PipelineGraphState) -> dict:
         "instructions": f"Enter the repository owner or organization name.",
         "default": github_owner if github_owner else "your-username",
     })
-    
     owner = _get_response_str(owner_response) or github_owner or "user"
     
-    return {
-        "github_inputs": {"owner": owner, "project_name": project_name},
-        "messages": [{"role": "human", "content": f"GitHub Owner: {owner}", "stage": "github_push_input"}]
-    }
-
-
-async def github_push_input_repo_node(state: PipelineGraphState) -> dict:
-    """Input: Repository name."""
-    project_name = state.get("project_name", "new-project")
-    existing_inputs = state.get("github_inputs", {})
-    
     repo_response = interrupt({
         "type": "input",
         "stage": "github_push_input_repo",
@@ -1471,20 +1380,7 @@ async def github_push_input_repo_node(state: PipelineGraphState) -> dict:
         "instructions": f"Enter the repository name (will be created if doesn't exist).",
         "default": project_name,
     })
-    
     repo = _get_response_str(repo_response) or project_name
-    existing_inputs["repo"] = repo
-    
-    return {
-        "github_inputs": existing_inputs,
-        "messages": [{"role": "human", "content": f"Repository: {repo}", "stage": "github_push_input_repo"}]
-    }
-
-
-async def github_push_input_branch_node(state: PipelineGraphState) -> dict:
-    """Input: Branch name."""
-    project_name = state.get("project_name", "new-project")
-    existing_inputs = state.get("github_inputs", {})
     
     # Clean project name for branch (remove leading slashes, spaces)
     clean_name = project_name.strip().lstrip("/").replace(" ", "-")
@@ -1497,7 +1393,6 @@ async def github_push_input_branch_node(state: PipelineGraphState) -> dict:
         "instructions": f"Enter the branch name to push to.",
         "default": default_branch,
     })
-    
     branch = _get_response_str(branch_response) or default_branch
     
     # Clean branch name - remove double slashes
@@ -1505,11 +1400,13 @@ async def github_push_input_branch_node(state: PipelineGraphState) -> dict:
         branch = branch.replace("//", "/")
     branch = branch.strip().lstrip("/")
     
-    existing_inputs["branch"] = branch
-    
     return {
-        "github_inputs": existing_inputs,
-        "messages": [{"role": "human", "content": f"Branch: {branch}", "stage": "github_push_input_branch"}]
+        "github_inputs": {"owner": owner, "project_name": project_name, "repo": repo, "branch": branch},
+        "messages": [
+            {"role": "human", "content": f"GitHub Owner: {owner}", "stage": "github_push_input"},
+            {"role": "human", "content": f"Repository: {repo}", "stage": "github_push_input_repo"},
+            {"role": "human", "content": f"Branch: {branch}", "stage": "github_push_input_branch"},
+        ]
     }
 
 
@@ -1527,22 +1424,16 @@ async def github_push_node(state: PipelineGraphState) -> dict:
             "messages": [{"role": "warning", "content": "⚠️ GitHub client not configured", "stage": "github_push"}]
         }
     
-    # Gather context
-    project_name = state.get("project_name", "new-project")
-    project_idea = state.get("project_idea", "")
-    owner = inputs.get("owner", os.getenv("GITHUB_OWNER", "user"))
-    repo = inputs.get("repo", project_name)
-    branch = inputs.get("branch", f"feature/{project_name}").replace("//", "/").strip("/")
-    
-    # Get code files
+    # Fast path: bail out before any other work when there is nothing to push
     code = state.get("code_artifacts", {})
-    files_to_push = []
-    if isinstance(code, dict) and "files" in code:
-        for file_info in code["files"]:
-            path = file_info.get("path", "")
-            content = file_info.get("content", "")
-            if path and content:
-                files_to_push.append({"path": path, "content": content})
+    files = code.get("files") if isinstance(code, dict) else None
+    files_to_push = [
+        {"path": path, "content": content}
+        for file_info in files or ()
+        if isinstance(file_info, dict)
+        and (path := file_info.get("path"))
+        and (content := file_info.get("content"))
+    ]
     
     if not files_to_push:
         return {
@@ -1551,6 +1442,13 @@ async def github_push_node(state: PipelineGraphState) -> dict:
             "messages": [{"role": "warning", "content": "⚠️ No code files found", "stage": "github_push"}]
         }
     
+    # Gather context
+    project_name = state.get("project_name", "new-project")
+    project_idea = state.get("project_idea", "")
+    owner = inputs.get("owner", os.getenv("GITHUB_OWNER", "user"))
+    repo = inputs.get("repo", project_name)
+    branch = inputs.get("branch", f"feature/{project_name}").replace("//", "/").strip("/")
+    
     print(f"[DEBUG] GitHub Push: owner={owner}, repo={repo}, branch={branch}, files={len(files_to_push)}")
     
     results = []
@@ -1756,8 +1654,68 @@ async def failed_node(state: PipelineGraphState) -> dict:
 # BUILD THE GRAPH
 # ============================================================================
 
+def build_test_plan_setup_graph():
+    """Subgraph: confirm Test Plan creation, then collect its inputs.
+    
+    Both nodes pause via interrupt() themselves, so no interrupt_before is needed
+    here and the parent graph does not list them either.
+    """
+    builder = StateGraph(PipelineGraphState)
+    builder.add_node("test_plan_confirm", test_plan_confirm_node)
+    builder.add_node("test_plan_wizard", test_plan_wizard_node)
+    builder.add_edge(START, "test_plan_confirm")
+    builder.add_conditional_edges(
+        "test_plan_confirm",
+        route_after_test_plan_confirm,
+        {"test_plan_wizard": "test_plan_wizard", "architecture": END}
+    )
+    builder.add_edge("test_plan_wizard", END)
+    return builder.compile()
+
+
+def build_github_push_setup_graph():
+    """Subgraph: confirm the GitHub push, then collect owner/repo/branch."""
+    builder = StateGraph(PipelineGraphState)
+    builder.add_node("github_push_confirm", github_push_confirm_node)
+    builder.add_node("github_push_wizard", github_push_wizard_node)
+    builder.add_edge(START, "github_push_confirm")
+    builder.add_conditional_edges(
+        "github_push_confirm",
+        route_after_github_push_confirm,
+        {"github_push_wizard": "github_push_wizard", "completed": END}
+    )
+    builder.add_edge("github_push_wizard", END)
+    return builder.compile()
+
+
+def route_after_test_plan_setup(state: PipelineGraphState) -> str:
+    """Route after the Test Plan setup subgraph."""
+    if route_after_test_plan_confirm(state) == "architecture":
+        return "architecture"
+    return route_after_test_plan_wizard(state)
+
+
+def route_after_github_push_setup(state: PipelineGraphState) -> str:
+    """Route after the GitHub push setup subgraph."""
+    if route_after_github_push_confirm(state) == "completed":
+        return "completed"
+    return "github_push"
+
+
+# Stage gates the pipeline pauses before (setup subgraphs pause via interrupt())
+_INTERRUPT_BEFORE: frozenset[str] = frozenset({
+    "requirements_approval",
+    "work_items_approval",
+    "ado_push_confirm",
+    "architecture_approval",
+    "mermaid_render_confirm",
+    "development_approval",
+})
+
+
+@functools.lru_cache(maxsize=1)
 def build_graph():
-    """Build the complete SDLC Pipeline LangGraph."""
+    """Build the complete SDLC Pipeline LangGraph (compiled once and memoized)."""
     
     builder = StateGraph(PipelineGraphState)
     
@@ -1779,14 +1737,8 @@ def build_graph():
     # Test Case Creation stage
     builder.add_node("test_case_creation", test_case_creation_node)
 
-    # Test Plan stage (multi-step)
-    builder.add_node("test_plan_confirm", test_plan_confirm_node)
-    builder.add_node("test_plan_input_name", test_plan_input_name_node)
-    builder.add_node("test_plan_input_iteration", test_plan_input_iteration_node)
-    builder.add_node("test_plan_input_description", test_plan_input_description_node)
-    builder.add_node("test_plan_input_existing", test_plan_input_existing_node)
-    builder.add_node("test_plan_input_suite", test_plan_input_suite_node)
-    builder.add_node("test_plan_input_iteration_existing", test_plan_input_iteration_existing_node)
+    # Test Plan stage (confirm + wizard run as a subgraph)
+    builder.add_node("test_plan_setup", build_test_plan_setup_graph())
     builder.add_node("test_plan", test_plan_node)
     
     # Architecture stage
@@ -1801,11 +1753,8 @@ def build_graph():
     builder.add_node("development", development_node)
     builder.add_node("development_approval", development_approval_node)
     
-    # GitHub Push stage (multi-step)
-    builder.add_node("github_push_confirm", github_push_confirm_node)
-    builder.add_node("github_push_input", github_push_input_node)
-    builder.add_node("github_push_input_repo", github_push_input_repo_node)
-    builder.add_node("github_push_input_branch", github_push_input_branch_node)
+    # GitHub Push stage (confirm + wizard run as a subgraph)
+    builder.add_node("github_push_setup", build_github_push_setup_graph())
     builder.add_node("github_push", github_push_node)
     
     # Terminal nodes
@@ -1838,49 +1787,15 @@ def build_graph():
     builder.add_conditional_edges(
         "ado_push_confirm",
         route_after_ado_push_confirm,
-        {"ado_push": "ado_push", "test_plan_confirm": "test_plan_confirm"}
+        {"ado_push": "ado_push", "test_plan_confirm": "test_plan_setup"}
     )
     builder.add_edge("ado_push", "test_case_creation")
-    builder.add_edge("test_case_creation", "test_plan_confirm")
-    
-    # Test Plan flow (multi-step)
-    builder.add_conditional_edges(
-        "test_plan_confirm",
-        route_after_test_plan_confirm,
-        {"test_plan_input_name": "test_plan_input_name", "test_plan_input_existing": "test_plan_input_existing", "architecture": "architecture"}
-    )
-    
-    # NEW plan flow: name -> iteration -> description -> test_plan
-    builder.add_edge("test_plan_input_name", "test_plan_input_iteration")
-    
-    builder.add_conditional_edges(
-        "test_plan_input_iteration",
-        route_after_test_plan_input_iteration,
-        {"test_plan_input_description": "test_plan_input_description", "architecture": "architecture"}
-    )
+    builder.add_edge("test_case_creation", "test_plan_setup")
     
+    # Test Plan flow: setup subgraph (confirm -> wizard) -> test_plan
     builder.add_conditional_edges(
-        "test_plan_input_description",
-        route_after_test_plan_input_description,
-        {"test_plan": "test_plan", "architecture": "architecture"}
-    )
-    
-    # EXISTING plan flow: plan_id -> suite_id -> iteration -> test_plan
-    builder.add_conditional_edges(
-        "test_plan_input_existing",
-        route_after_test_plan_input_existing,
-        {"test_plan_input_suite": "test_plan_input_suite", "architecture": "architecture"}
-    )
-    
-    builder.add_conditional_edges(
-        "test_plan_input_suite",
-        route_after_test_plan_input_suite,
-        {"test_plan_input_iteration_existing": "test_plan_input_iteration_existing", "architecture": "architecture"}
-    )
-    
-    builder.add_conditional_edges(
-        "test_plan_input_iteration_existing",
-        route_after_test_plan_input_iteration_existing,
+        "test_plan_setup",
+        route_after_test_plan_setup,
         {"test_plan": "test_plan", "architecture": "architecture"}
     )
     
@@ -1909,45 +1824,25 @@ def build_graph():
     builder.add_conditional_edges(
         "development_approval",
         route_after_development_approval,
-        {"github_push_confirm": "github_push_confirm", "development": "development", "failed": "failed"}
+        {"github_push_confirm": "github_push_setup", "development": "development", "failed": "failed"}
     )
     
-    # GitHub Push flow (multi-step)
+    # GitHub Push flow: setup subgraph (confirm -> wizard) -> push
     builder.add_conditional_edges(
-        "github_push_confirm",
-        route_after_github_push_confirm,
-        {"github_push_input": "github_push_input", "completed": "completed"}
+        "github_push_setup",
+        route_after_github_push_setup,
+        {"github_push": "github_push", "completed": "completed"}
     )
-    builder.add_edge("github_push_input", "github_push_input_repo")
-    builder.add_edge("github_push_input_repo", "github_push_input_branch")
-    builder.add_edge("github_push_input_branch", "github_push")
     builder.add_edge("github_push", "completed")
     
     # Terminal edges
     builder.add_edge("completed", END)
     builder.add_edge("failed", END)
     
-    # Compile without checkpointer (Studio handles persistence)
+    # Studio injects its own persistence; SDLC_CHECKPOINTER opts into one elsewhere
     return builder.compile(
-        interrupt_before=[
-            "requirements_approval",
-            "work_items_approval",
-            "ado_push_confirm",
-            "test_plan_confirm",
-            "test_plan_input_name",
-            "test_plan_input_iteration",
-            "test_plan_input_description",
-            "test_plan_input_existing",
-            "test_plan_input_suite",
-            "test_plan_input_iteration_existing",
-            "architecture_approval",
-            "mermaid_render_confirm",
-            "development_approval",
-            "github_push_confirm",
-            "github_push_input",
-            "github_push_input_repo",
-            "github_push_input_branch",
-        ]
+        checkpointer=make_checkpointer(),
+        interrupt_before=list(_INTERRUPT_BEFORE),
     )
 
 
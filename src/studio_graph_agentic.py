@@ -6,13 +6,28 @@ LLM agents have access to tools and can reason about how to accomplish tasks.
 """
 
 import asyncio
+import copy
+import functools
+import hashlib
 import json
 import logging
 import os
-from typing import Annotated, Any, Callable
+import re
+import uuid
+import weakref
+from typing import Annotated, Any, Awaitable, Callable
 
 from dotenv import load_dotenv
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from pydantic import BaseModel, ConfigDict, ValidationError
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+    message_chunk_to_message,
+    trim_messages,
+)
+from langchain_core.messages.utils import count_tokens_approximately
 from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, START, END
@@ -22,6 +37,10 @@ from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.types import interrupt, Command
 from typing_extensions import TypedDict
 
+from src.artifact_store import delete_artifact, load_artifact, store_artifact
+from src.checkpointing import make_checkpointer
+from src.loop_local import loop_local
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -30,15 +49,6 @@ logger = logging.getLogger(__name__)
 # STATE DEFINITION
 # ============================================================================
 
-def messages_reducer(left: list, right: list) -> list:
-    """Merge message lists, avoiding duplicates."""
-    if not left:
-        return right
-    if not right:
-        return left
-    return left + right
-
-
 class PipelineState(TypedDict, total=False):
     """State for the agentic SDLC pipeline."""
     # Input
@@ -47,16 +57,21 @@ class PipelineState(TypedDict, total=False):
     
     # Conversation messages for each agent
     messages: Annotated[list, add_messages]
+    # ID of the first message sent to the LLM (see _window_start)
+    context_window_start: str | None
     
     # Stage outputs (structured)
     requirements: dict | None
     epics: list | None
     user_stories: list | None
     architecture: dict | None
-    code_artifacts: dict | None
+    # Stage outputs pre-rendered for downstream prompts (see _STAGE_CONTEXT)
+    stage_context: dict | None
+    code_artifacts: dict | None  # artifact_store handle once development has run
     
     # Integration results
     ado_results: dict | None
+    ado_task_id: str | None
     ado_test_plan: dict | None
     github_results: dict | None
     github_inputs: dict | None
@@ -77,40 +92,111 @@ class PipelineState(TypedDict, total=False):
 
 _ado_client = None
 _github_client = None
+_mermaid_client = None
+
+# Guard lazy creation so concurrent stages/tool calls share one client. asyncio
+# primitives belong to one event loop, so each loop gets its own (see loop_local)
+_ado_locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_github_locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+# Caps in-flight MCP requests across all concurrently running tools and stages
+_MCP_CONCURRENCY = int(os.getenv("MCP_CONCURRENCY", "6"))
+_mcp_sems: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
 
-def get_ado_client():
+def _mcp_sem() -> asyncio.Semaphore:
+    """The running loop's semaphore capping in-flight MCP requests."""
+    return loop_local(_mcp_sems, lambda: asyncio.Semaphore(_MCP_CONCURRENCY))
+
+
+async def get_ado_client():
     """Get or create ADO MCP client."""
     global _ado_client
     if _ado_client is None:
-        org = os.getenv("AZURE_DEVOPS_ORGANIZATION")
-        project = os.getenv("AZURE_DEVOPS_PROJECT")
-        if org and project:
-            try:
-                from src.mcp_client.ado_client import AzureDevOpsMCPClient
-                _ado_client = AzureDevOpsMCPClient(organization=org, project=project)
-                logger.info(f"ADO client initialized for {org}/{project}")
-            except Exception as e:
-                logger.warning(f"Could not initialize ADO client: {e}")
+        async with loop_local(_ado_locks, asyncio.Lock):
+            if _ado_client is None:
+                org = os.getenv("AZURE_DEVOPS_ORGANIZATION")
+                project = os.getenv("AZURE_DEVOPS_PROJECT")
+                if org and project:
+                    try:
+                        from src.mcp_client.ado_client import AzureDevOpsMCPClient
+                        client = AzureDevOpsMCPClient(organization=org, project=project)
+                    except Exception as e:
+                        logger.warning(f"Could not initialize ADO client: {e}")
+                        return None
+                    try:
+                        await client.connect()
+                    except Exception as e:
+                        # Sessions are per call, so the client is still usable
+                        logger.warning(f"ADO client connect check failed: {e}")
+                    _ado_client = client
+                    logger.info(f"ADO client initialized for {org}/{project}")
     return _ado_client
 
 
-def get_github_client():
+async def get_github_client():
     """Get or create GitHub MCP client."""
     global _github_client
     if _github_client is None:
-        mcp_url = os.getenv("GITHUB_MCP_URL")
-        token = os.getenv("GITHUB_TOKEN")
-        if mcp_url and token:
-            try:
-                from src.mcp_client.github_client import GitHubMCPClient
-                _github_client = GitHubMCPClient(mcp_url=mcp_url, github_token=token)
-                logger.info(f"GitHub client initialized")
-            except Exception as e:
-                logger.warning(f"Could not initialize GitHub client: {e}")
+        async with loop_local(_github_locks, asyncio.Lock):
+            if _github_client is None:
+                mcp_url = os.getenv("GITHUB_MCP_URL")
+                token = os.getenv("GITHUB_TOKEN")
+                if mcp_url and token:
+                    try:
+                        from src.mcp_client.github_client import GitHubMCPClient
+                        client = GitHubMCPClient(mcp_url=mcp_url, github_token=token)
+                    except Exception as e:
+                        logger.warning(f"Could not initialize GitHub client: {e}")
+                        return None
+                    try:
+                        await client.connect()
+                    except Exception as e:
+                        logger.warning(f"GitHub client connect check failed: {e}")
+                    _github_client = client
+                    logger.info(f"GitHub client initialized")
     return _github_client
 
 
+# Background connect of the MCP clients, started when a run begins
+_warmup_task: asyncio.Task | None = None
+
+
+async def _connect_clients() -> None:
+    """Create and connect the ADO and GitHub clients concurrently."""
+    results = await asyncio.gather(get_ado_client(), get_github_client(), return_exceptions=True)
+    for name, result in zip(("ADO", "GitHub"), results):
+        if isinstance(result, Exception):
+            logger.warning(f"{name} client warm-up failed: {result}")
+
+
+def warm_mcp_clients() -> None:
+    """Start connecting the MCP clients in the background.
+    
+    The handshakes overlap each other and the requirements stage instead of
+    adding up when work items and the GitHub push first need a client.
+    """
+    global _warmup_task
+    if _warmup_task is not None and not _warmup_task.done():
+        return
+    if _ado_client is not None and _github_client is not None:
+        return
+    _warmup_task = asyncio.create_task(_connect_clients())
+
+
+def get_mermaid_client():
+    """Get or create Mermaid MCP client."""
+    global _mermaid_client
+    if _mermaid_client is None:
+        try:
+            from src.mcp_client import MermaidMCPClient
+            _mermaid_client = MermaidMCPClient()
+            logger.info("Mermaid client initialized")
+        except Exception as e:
+            logger.warning(f"Could not initialize Mermaid client: {e}")
+    return _mermaid_client
+
+
 # ============================================================================
 # TOOL DEFINITIONS - These are what agents can use
 # ============================================================================
@@ -139,43 +225,162 @@ def save_code(files: list) -> str:
     return json.dumps({"status": "saved", "files": len(files)})
 
 
+async def _create_work_item(client, work_item_type: str, title: str, description: str = "", parent_id: int = None):
+    """Create a single work item through the ADO MCP server."""
+    fields = {
+        "System.Title": title,
+        "System.Description": description,
+    }
+    if parent_id:
+        fields["System.Parent"] = parent_id
+    
+    async with _mcp_sem():
+        return await client.call_tool("wit_create_work_item", {
+            "project": client.project,
+            "workItemType": work_item_type,
+            "fields": fields,
+        })
+
+
+def _summarize_created(items: list[dict], results: list) -> str:
+    """Pair bulk-create results with their items as a JSON summary for the agent."""
+    created = []
+    for item, result in zip(items, results):
+        if isinstance(result, Exception):
+            created.append({"title": item.get("title", ""), "error": str(result)})
+        elif isinstance(result, dict) and "error" in result:
+            created.append({"title": item.get("title", ""), "error": str(result["error"])})
+        else:
+            created.append({"title": item.get("title", ""), "status": "created", "result": str(result)[:300]})
+    
+    failed = sum(1 for r in created if "error" in r)
+    return json.dumps({"created": len(created) - failed, "failed": failed, "results": created})
+
+
 @tool
 async def ado_create_work_item(work_item_type: str, title: str, description: str = "", parent_id: int = None) -> str:
     """Create a work item in Azure DevOps. Types: Epic, Issue, Task, Bug."""
-    client = get_ado_client()
+    client = await get_ado_client()
     if not client:
         return json.dumps({"error": "ADO client not configured"})
     
     try:
-        fields = {
-            "System.Title": title,
-            "System.Description": description,
-        }
-        if parent_id:
-            fields["System.Parent"] = parent_id
-            
-        result = await client.call_tool("wit_create_work_item", {
-            "project": client.project,
-            "workItemType": work_item_type,
-            "fields": fields,
-        })
+        result = await _create_work_item(client, work_item_type, title, description, parent_id)
         return json.dumps({"status": "created", "result": str(result)[:500]})
     except Exception as e:
         return json.dumps({"error": str(e)})
 
 
+@tool
+async def ado_bulk_create_work_items(items: list[dict]) -> str:
+    """Create many work items in Azure DevOps concurrently.
+    
+    Each item is {work_item_type, title, description?, parent_id?}. Create parents
+    (e.g. all Epics) in one call, then children referencing their IDs in a second call.
+    """
+    client = await get_ado_client()
+    if not client:
+        return json.dumps({"error": "ADO client not configured"})
+    
+    # _create_work_item holds _mcp_sem(), which bounds how many run at once
+    results = await asyncio.gather(*(
+        _create_work_item(
+            client,
+            item.get("work_item_type", "Issue"),
+            item.get("title", ""),
+            item.get("description", ""),
+            item.get("parent_id"),
+        )
+        for item in items
+    ), return_exceptions=True)
+    return _summarize_created(items, results)
+
+
+@tool
+async def ado_create_work_items_batch(items: list[dict]) -> str:
+    """Create many work items in Azure DevOps with one $batch request per 200 items.
+    
+    Each item is {work_item_type, title, description?, parent_id?}. Create parents
+    (e.g. all Epics) in one call, then children referencing their IDs in a second call.
+    """
+    client = await get_ado_client()
+    if not client:
+        return json.dumps({"error": "ADO client not configured"})
+    
+    try:
+        async with _mcp_sem():
+            results = await client.create_work_items_batch(items)
+    except RuntimeError as e:
+        # No PAT for the REST API: create them through the MCP server instead
+        logger.info(f"Work item $batch unavailable ({e}), using per-item MCP calls")
+        return await ado_bulk_create_work_items.ainvoke({"items": items})
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+    return _summarize_created(items, results)
+
+
+async def _push_work_items(client, epics: list, stories: list) -> dict:
+    """Create all epics, then all stories under them: one bulk call per level, no LLM turns.
+    
+    Uses the REST $batch API when a PAT is available, concurrent MCP calls otherwise.
+    """
+    async def create(items: list[dict]) -> list:
+        try:
+            async with _mcp_sem():
+                return await client.create_work_items_batch(items)
+        except RuntimeError:
+            return await client.bulk_create_work_items(items)
+    
+    epic_results = await create([
+        {"work_item_type": "Epic", "title": e.get("title") or e.get("name", ""), "description": e.get("description", "")}
+        for e in epics
+    ]) if epics else []
+    
+    # Stories reference their epic by the epic's generated id or its title
+    epic_ids = {}
+    for epic, result in zip(epics, epic_results):
+        if isinstance(result, dict) and result.get("id"):
+            for key in ("id", "title", "name"):
+                if epic.get(key) is not None:
+                    epic_ids[str(epic[key])] = result["id"]
+    
+    def parent_of(story: dict):
+        for key in ("epic_id", "epic", "parent_id", "parent"):
+            ref = story.get(key)
+            if ref is not None and str(ref) in epic_ids:
+                return epic_ids[str(ref)]
+        return None
+    
+    story_items = [
+        {
+            "work_item_type": "Issue",
+            "title": s.get("title") or s.get("name", ""),
+            "description": s.get("description", ""),
+            "parent_id": parent_of(s),
+        }
+        for s in stories
+    ]
+    story_results = await create(story_items) if story_items else []
+    
+    return {
+        "epics": json.loads(_summarize_created(epics, epic_results)),
+        "stories": json.loads(_summarize_created(story_items, story_results)),
+    }
+
+
 @tool
 async def ado_list_iterations() -> str:
     """List available iteration paths in Azure DevOps project."""
-    client = get_ado_client()
+    client = await get_ado_client()
     if not client:
         return json.dumps({"error": "ADO client not configured"})
     
     try:
-        result = await client.call_tool("work_list_iterations", {
-            "project": client.project,
-            "depth": 10,
-        })
+        async with _mcp_sem():
+            result = await client.call_tool("work_list_iterations", {
+                "project": client.project,
+                "depth": 10,
+            })
         
         # Extract paths
         paths = []
@@ -199,16 +404,17 @@ async def ado_list_iterations() -> str:
 @tool
 async def ado_create_test_plan(name: str, iteration: str, description: str = "") -> str:
     """Create a test plan in Azure DevOps."""
-    client = get_ado_client()
+    client = await get_ado_client()
     if not client:
         return json.dumps({"error": "ADO client not configured"})
     
     try:
-        result = await client.create_test_plan(
-            name=name,
-            iteration=iteration,
-            description=description,
-        )
+        async with _mcp_sem():
+            result = await client.create_test_plan(
+                name=name,
+                iteration=iteration,
+                description=description,
+            )
         return json.dumps({"status": "created", "result": str(result)[:500]})
     except Exception as e:
         return json.dumps({"error": str(e)})
@@ -217,16 +423,17 @@ async def ado_create_test_plan(name: str, iteration: str, description: str = "")
 @tool
 async def ado_create_test_suite(plan_id: int, name: str) -> str:
     """Create a test suite under a test plan."""
-    client = get_ado_client()
+    client = await get_ado_client()
     if not client:
         return json.dumps({"error": "ADO client not configured"})
     
     try:
-        result = await client.create_test_suite(
-            plan_id=plan_id,
-            parent_suite_id=plan_id,
-            name=name,
-        )
+        async with _mcp_sem():
+            result = await client.create_test_suite(
+                plan_id=plan_id,
+                parent_suite_id=plan_id,
+                name=name,
+            )
         return json.dumps({"status": "created", "result": str(result)[:500]})
     except Exception as e:
         return json.dumps({"error": str(e)})
@@ -235,36 +442,58 @@ async def ado_create_test_suite(plan_id: int, name: str) -> str:
 @tool
 async def ado_create_test_case(title: str, steps: str, iteration_path: str) -> str:
     """Create a test case in Azure DevOps."""
-    client = get_ado_client()
+    client = await get_ado_client()
     if not client:
         return json.dumps({"error": "ADO client not configured"})
     
     try:
-        result = await client.create_test_case(
-            title=title,
-            steps=steps,
-            priority=2,
-            iteration_path=iteration_path,
-        )
+        async with _mcp_sem():
+            result = await client.create_test_case(
+                title=title,
+                steps=steps,
+                priority=2,
+                iteration_path=iteration_path,
+            )
         return json.dumps({"status": "created", "result": str(result)[:500]})
     except Exception as e:
         return json.dumps({"error": str(e)})
 
 
+@tool
+async def ado_bulk_create_test_cases(test_cases: list[dict], iteration_path: str) -> str:
+    """Create many test cases in Azure DevOps concurrently. Each item is {title, steps}."""
+    client = await get_ado_client()
+    if not client:
+        return json.dumps({"error": "ADO client not configured"})
+    
+    async def create_one(case: dict):
+        async with _mcp_sem():
+            return await client.create_test_case(
+                title=case.get("title", ""),
+                steps=case.get("steps", ""),
+                priority=2,
+                iteration_path=iteration_path,
+            )
+    
+    results = await asyncio.gather(*(create_one(case) for case in test_cases), return_exceptions=True)
+    return _summarize_created(test_cases, results)
+
+
 @tool
 async def github_create_repo(name: str, description: str = "", private: bool = False) -> str:
     """Create a new GitHub repository with autoInit to create main branch."""
-    client = get_github_client()
+    client = await get_github_client()
     if not client:
         return json.dumps({"error": "GitHub client not configured"})
     
     try:
-        result = await client.call_tool("create_repository", {
-            "name": name,
-            "description": description,
-            "private": private,
-            "autoInit": True,  # CORRECT: camelCase, creates README and main branch
-        })
+        async with _mcp_sem():
+            result = await client.call_tool("create_repository", {
+                "name": name,
+                "description": description,
+                "private": private,
+                "autoInit": True,  # CORRECT: camelCase, creates README and main branch
+            })
         return json.dumps({"status": "created", "result": str(result)[:500]})
     except Exception as e:
         if "already exists" in str(e).lower():
@@ -275,17 +504,18 @@ async def github_create_repo(name: str, description: str = "", private: bool = F
 @tool
 async def github_create_branch(owner: str, repo: str, branch: str, from_branch: str = "main") -> str:
     """Create a new branch in a GitHub repository."""
-    client = get_github_client()
+    client = await get_github_client()
     if not client:
         return json.dumps({"error": "GitHub client not configured"})
     
     try:
-        result = await client.call_tool("create_branch", {
-            "owner": owner,
-            "repo": repo,
-            "branch": branch,
-            "from_branch": from_branch,
-        })
+        async with _mcp_sem():
+            result = await client.call_tool("create_branch", {
+                "owner": owner,
+                "repo": repo,
+                "branch": branch,
+                "from_branch": from_branch,
+            })
         return json.dumps({"status": "created", "result": str(result)[:500]})
     except Exception as e:
         if "already exists" in str(e).lower() or "reference already exists" in str(e).lower():
@@ -296,18 +526,19 @@ async def github_create_branch(owner: str, repo: str, branch: str, from_branch:
 @tool
 async def github_push_files(owner: str, repo: str, branch: str, files: list, message: str) -> str:
     """Push files to a GitHub repository. Files should be list of {path, content} dicts."""
-    client = get_github_client()
+    client = await get_github_client()
     if not client:
         return json.dumps({"error": "GitHub client not configured"})
     
     try:
-        result = await client.call_tool("push_files", {
-            "owner": owner,
-            "repo": repo,
-            "branch": branch,
-            "files": files,
-            "message": message,
-        })
+        async with _mcp_sem():
+            result = await client.call_tool("push_files", {
+                "owner": owner,
+                "repo": repo,
+                "branch": branch,
+                "files": files,
+                "message": message,
+            })
         return json.dumps({"status": "pushed", "result": str(result)[:500]})
     except Exception as e:
         return json.dumps({"error": str(e)})
@@ -316,19 +547,20 @@ async def github_push_files(owner: str, repo: str, branch: str, files: list, mes
 @tool
 async def github_create_pr(owner: str, repo: str, title: str, body: str, head: str, base: str = "main") -> str:
     """Create a pull request on GitHub."""
-    client = get_github_client()
+    client = await get_github_client()
     if not client:
         return json.dumps({"error": "GitHub client not configured"})
     
     try:
-        result = await client.call_tool("create_pull_request", {
-            "owner": owner,
-            "repo": repo,
-            "title": title,
-            "body": body,
-            "head": head,
-            "base": base,
-        })
+        async with _mcp_sem():
+            result = await client.call_tool("create_pull_request", {
+                "owner": owner,
+                "repo": repo,
+                "title": title,
+                "body": body,
+                "head": head,
+                "base": base,
+            })
         return json.dumps({"status": "created", "result": str(result)[:500]})
     except Exception as e:
         return json.dumps({"error": str(e)})
@@ -337,34 +569,15 @@ async def github_create_pr(owner: str, repo: str, title: str, body: str, head: s
 @tool
 async def render_mermaid_diagram(diagram_code: str, output_path: str) -> str:
     """Render a Mermaid diagram to PNG file."""
-    import asyncio
-    import concurrent.futures
-    
-    def render_sync():
-        """Run blocking render in thread."""
-        try:
-            import os
-            os.makedirs(os.path.dirname(output_path) or "docs/diagrams", exist_ok=True)
-            
-            from src.mcp_client import MermaidMCPClient
-            client = MermaidMCPClient()
-            
-            # Create new event loop for this thread
-            loop = asyncio.new_event_loop()
-            try:
-                loop.run_until_complete(client.render_mermaid_to_file(diagram_code, output_path))
-            finally:
-                loop.close()
-            
-            return {"status": "rendered", "path": output_path}
-        except Exception as e:
-            return {"error": str(e)}
+    client = get_mermaid_client()
+    if not client:
+        return json.dumps({"error": "Mermaid client not configured"})
     
     try:
-        # Run in thread pool to avoid blocking
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            result = await asyncio.get_event_loop().run_in_executor(executor, render_sync)
-        return json.dumps(result)
+        os.makedirs(os.path.dirname(output_path) or "docs/diagrams", exist_ok=True)
+        # The client is already async; await it on the running loop
+        await client.render_mermaid_to_file(diagram_code, output_path)
+        return json.dumps({"status": "rendered", "path": output_path})
     except Exception as e:
         return json.dumps({"error": str(e)})
 
@@ -373,91 +586,375 @@ async def render_mermaid_diagram(diagram_code: str, output_path: str) -> str:
 # LLM CONFIGURATION
 # ============================================================================
 
+# Every @tool agents can bind, by name (used to rebuild cached bindings)
+_TOOL_REGISTRY = {
+    t.name: t
+    for t in (
+        save_requirements, save_work_items, save_architecture, save_code,
+        ado_create_work_item, ado_bulk_create_work_items, ado_create_work_items_batch, ado_list_iterations,
+        ado_create_test_plan, ado_create_test_suite, ado_create_test_case, ado_bulk_create_test_cases,
+        github_create_repo, github_create_branch, github_push_files, github_create_pr,
+        render_mermaid_diagram,
+    )
+}
+
+LLM_TEMPERATURE = 0.1
+# History sent to the LLM per call; the full history stays in state
+MAX_CONTEXT_TOKENS = int(os.getenv("SDLC_MAX_CONTEXT_TOKENS", "8192"))
+PRUNE_BUDGET_TOKENS = int(os.getenv("SDLC_PRUNE_BUDGET_TOKENS", str(2 * MAX_CONTEXT_TOKENS)))
+
+# Stage context message templates (filled by _stage_prompt)
+_WORK_ITEMS_TMPL = "Requirements:\n{requirements}\n\nCreate epics and user stories."
+_TEST_PLAN_TMPL = "Create test plan for these stories:\n{stories}"
+_ARCHITECTURE_TMPL = "Design architecture for:\nRequirements: {requirements}\nStories: {stories}"
+_DEVELOPMENT_TMPL = "Implement this architecture:\n{architecture}"
+
+# Stage context messages that can be cut to an excerpt once stale
+_CONTEXT_PREFIXES = tuple(
+    tmpl[:tmpl.index("{")]
+    for tmpl in (_WORK_ITEMS_TMPL, _TEST_PLAN_TMPL, _ARCHITECTURE_TMPL, _DEVELOPMENT_TMPL)
+)
+
+
+def _window_start(messages: list, start_id: str | None) -> int:
+    """Index of the first history message sent to the LLM (messages[0] is the system prompt).
+    
+    The window only grows, so the prompt prefix stays identical across calls and
+    provider-side prompt caching keeps hitting. Once it holds twice the token
+    budget it is cut back to the budget, starting at a human turn.
+    """
+    start = next((i for i, m in enumerate(messages) if start_id and m.id == start_id), 1)
+    if count_tokens_approximately(messages[start:]) <= 2 * MAX_CONTEXT_TOKENS:
+        return start
+    kept = trim_messages(
+        messages[start:],
+        max_tokens=MAX_CONTEXT_TOKENS,
+        strategy="last",
+        token_counter=count_tokens_approximately,
+        start_on="human",
+    )
+    # Never drop the current turn (e.g. oversized tool results): keep the window
+    if not kept or kept[-1] is not messages[-1] or kept[0].id is None:
+        return start
+    return len(messages) - len(kept)
+
+
+def _pruned_args(message):
+    """Tool-call message with its (often large) arguments replaced by a marker.
+    
+    The tool calls themselves are kept so their ToolMessages stay paired.
+    """
+    if not isinstance(message, AIMessage) or not message.tool_calls:
+        return message
+    return message.model_copy(update={
+        "tool_calls": [{**tc, "args": {"args": "[pruned]"}} for tc in message.tool_calls],
+        "additional_kwargs": {k: v for k, v in message.additional_kwargs.items() if k != "tool_calls"},
+    })
+
+
+def _size(message) -> int:
+    """Approximate token count of a message's content and tool-call arguments."""
+    chars = len(str(message.content))
+    for tc in getattr(message, "tool_calls", None) or ():
+        chars += len(str(tc["args"]))
+    return chars // 4
+
+
+def _masked(message):
+    """Middle-zone version of a message: tool output and arguments masked, stage context cut to an excerpt."""
+    if isinstance(message, AIMessage):
+        return _pruned_args(message)
+    if isinstance(message, ToolMessage):
+        return message.model_copy(update={"content": "[pruned]"})
+    content = message.content
+    if isinstance(message, HumanMessage) and isinstance(content, str) and len(content) > 200 \
+            and content.startswith(_CONTEXT_PREFIXES):
+        return message.model_copy(update={"content": f"{content[:100]} … {content[-100:]}"})
+    return message
+
+
+def prune_messages(messages: list, budget: int = PRUNE_BUDGET_TOKENS) -> list:
+    """Zone-based pruning of an LLM input whose first message is the system prompt.
+    
+    Walking back from the newest message (~4 chars per token): the first half of
+    the budget is kept verbatim, the rest of the budget is kept masked (see
+    _masked), and anything older is replaced by a single marker. The current
+    turn, from the last human message on, is always kept verbatim, and tool-call
+    arguments are only kept for the last two turns.
+    """
+    humans = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    last_human = humans[-1] if humans else len(messages) - 1
+    recent = humans[-2] if len(humans) > 1 else 0
+    kept = []  # newest first
+    cut = 1    # index of the oldest kept message
+    used = 0
+    for i in range(len(messages) - 1, 0, -1):
+        message = messages[i]
+        if i < recent:
+            message = _pruned_args(message)
+        used += _size(message)
+        if i >= last_human or used <= budget // 2:
+            kept.append(message)
+        elif used <= budget:
+            kept.append(_masked(message))
+        else:
+            cut = i + 1
+            break
+    # Never start on tool results whose tool call was dropped
+    while kept and cut > 1 and isinstance(kept[-1], ToolMessage):
+        kept.pop()
+        cut += 1
+    
+    pruned = [messages[0]]
+    if cut > 1:
+        pruned.append(SystemMessage(content=f"[truncated {cut - 1} earlier messages]"))
+    pruned.extend(reversed(kept))
+    return pruned
+
+
+def _stage_prompt(state: dict, template: str, **context: str) -> HumanMessage | None:
+    """Context message for a stage, or None if a revise loop already sent it.
+    
+    Re-running a stage reuses the identical message already in the history
+    instead of appending a copy, keeping the history append-only.
+    """
+    content = template.format_map(context)
+    for m in reversed(state.get("messages", [])):
+        if isinstance(m, HumanMessage) and m.content == content:
+            return None
+    return HumanMessage(content=content, id=str(uuid.uuid4()))
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_llm(model: str, temperature: float) -> ChatOpenAI:
+    """One ChatOpenAI client per (model, temperature)."""
+    return ChatOpenAI(model=model, temperature=temperature)
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_bound(model: str, temperature: float, tool_names: tuple[str, ...], schema: type | None = None):
+    """One tool binding (and tool JSON schema build) per (model, temperature, tools, schema)."""
+    kwargs = {"response_format": _response_format(schema)} if schema is not None else {}
+    return _cached_llm(model, temperature).bind_tools([_TOOL_REGISTRY[n] for n in tool_names], **kwargs)
+
+
+def _response_format(schema: type) -> dict:
+    """Non-strict json_schema response format (strict mode rejects free-form dict fields)."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema(), "strict": False},
+    }
+
+
+# ============================================================================
+# OUTPUT SCHEMAS - Stage outputs requested as JSON and validated directly
+# ============================================================================
+
+class RequirementsSchema(BaseModel):
+    """Requirements produced by the Product Manager agent."""
+    model_config = ConfigDict(extra="allow")
+    
+    functional: list[dict] = []
+    non_functional: list[dict] = []
+    
+    def to_state(self) -> dict:
+        return {"requirements": self.model_dump()}
+
+
+class WorkItemsSchema(BaseModel):
+    """Epics and user stories produced by the Business Analyst agent."""
+    epics: list[dict] = []
+    stories: list[dict] = []
+    
+    def to_state(self) -> dict:
+        return {"epics": self.epics, "user_stories": self.stories}
+
+
+class ArchitectureSchema(BaseModel):
+    """Architecture produced by the Architect agent."""
+    model_config = ConfigDict(extra="allow")
+    
+    components: list[dict] = []
+    diagrams: dict[str, str] = {}
+    
+    def to_state(self) -> dict:
+        return {"architecture": self.model_dump()}
+
+
+class CodeFile(BaseModel):
+    path: str
+    content: str
+
+
+class CodeArtifactsSchema(BaseModel):
+    """Code files produced by the Developer agent."""
+    files: list[CodeFile] = []
+    
+    def to_state(self) -> dict:
+        files = [f.model_dump() for f in self.files]
+        return {"code_artifacts": {"files": files}} if files else {}
+
+
 def get_llm():
     """Get configured LLM."""
-    return ChatOpenAI(
-        model=os.getenv("SDLC_MODEL_DEFAULT", "gpt-4o"),
-        temperature=0.1,
-    )
+    return _cached_llm(os.getenv("SDLC_MODEL_DEFAULT", "gpt-4o"), LLM_TEMPERATURE)
 
 
 # ============================================================================
 # AGENT FACTORY - Creates ReAct agents for each stage
 # ============================================================================
 
-def create_agent_node(
-    name: str,
-    system_prompt: str,
-    tools: list,
-    output_parser: Callable[[Any], dict] = None,
-):
+class AgentNode:
     """
-    Create a ReAct agent node that can reason and use tools.
+    A ReAct agent node that can reason and use tools.
     
     The agent will:
     1. Receive context from state
     2. Reason about what to do
     3. Use tools as needed
     4. Return structured output
+    
+    With a schema, the schema is sent as the OpenAI response_format so the final
+    answer is JSON that is validated directly; parser is only used if that
+    validation fails. The LLM is bound to the tools (and schema) once here, so
+    calls skip all setup.
     """
     
-    llm = get_llm()
-    llm_with_tools = llm.bind_tools(tools) if tools else llm
+    __slots__ = ("name", "prompt", "tools", "parser", "schema", "_bound", "_is_coro")
     
-    async def agent_node(state: PipelineState) -> dict:
-        """Execute the agent."""
-        messages = state.get("messages", [])
+    def __init__(
+        self,
+        name: str,
+        prompt: str,
+        tools: list,
+        parser: Callable[[Any], dict] | None = None,
+        schema: type[BaseModel] | None = None,
+    ):
+        self.name = name
+        self.prompt = prompt
+        # Resolve tools by name once instead of scanning the list per tool call
+        self.tools = {t.name: t for t in tools}
+        self.parser = parser
+        self.schema = schema
+        
+        model = os.getenv("SDLC_MODEL_DEFAULT", "gpt-4o")
+        for t in tools:
+            _TOOL_REGISTRY.setdefault(t.name, t)
+        if tools:
+            self._bound = _cached_bound(model, LLM_TEMPERATURE, tuple(self.tools), schema)
+        elif schema is not None:
+            self._bound = _cached_llm(model, LLM_TEMPERATURE).bind(response_format=_response_format(schema))
+        else:
+            self._bound = _cached_llm(model, LLM_TEMPERATURE)
+        # @tool on an async def sets .coroutine (and leaves .func None)
+        self._is_coro = {name: t.coroutine is not None for name, t in self.tools.items()}
+    
+    async def _run_tool(self, tool_call: dict) -> ToolMessage | None:
+        tool_name = tool_call["name"]
+        t = self.tools.get(tool_name)
+        if t is None:
+            return None
+        try:
+            if self._is_coro[tool_name]:
+                result = await t.ainvoke(tool_call["args"])
+            else:
+                result = t.invoke(tool_call["args"])
+            content = str(result)
+        except Exception as e:
+            content = json.dumps({"error": str(e)})
+        return ToolMessage(content=content, tool_call_id=tool_call["id"])
+    
+    async def __call__(self, state: PipelineState, prompt: HumanMessage | None = None) -> dict:
+        """Execute the agent.
+        
+        Only the new messages (prompt, tool exchange, final answer) are returned;
+        add_messages appends them to the history.
+        """
+        llm = self._bound
+        tool_map = self.tools
+        
+        # Working copy: extended in place below without touching the state's list
+        messages = list(state.get("messages", []))
         
         # Add system prompt if not present
         if not messages or not isinstance(messages[0], SystemMessage):
-            messages = [SystemMessage(content=system_prompt)] + messages
+            messages.insert(0, SystemMessage(content=self.prompt))
+        
+        start = len(messages)
+        if prompt is not None:
+            messages.append(prompt)
         
-        # Invoke LLM
-        response = await llm_with_tools.ainvoke(messages)
+        window_id = state.get("context_window_start")
+        
+        def windowed() -> list:
+            nonlocal window_id
+            first = _window_start(messages, window_id)
+            window_id = messages[first].id if first > 1 else window_id
+            return prune_messages([messages[0], *messages[first:]])
+        
+        # Stream the LLM reply and start each tool call as soon as it is complete
+        # (OpenAI streams tool calls in index order, so call i is final once i+1 starts)
+        full = None
+        started: dict[str, asyncio.Task] = {}
+        try:
+            async for chunk in llm.astream(windowed()):
+                full = chunk if full is None else full + chunk
+                pending = getattr(full, "tool_call_chunks", None) or []
+                for tcc in pending[:-1]:
+                    if tcc.get("id") and tcc["id"] not in started and tcc.get("name") in tool_map:
+                        try:
+                            args = json.loads(tcc.get("args") or "{}")
+                        except json.JSONDecodeError:
+                            continue
+                        started[tcc["id"]] = asyncio.create_task(
+                            self._run_tool({"name": tcc["name"], "args": args, "id": tcc["id"]})
+                        )
+        except BaseException:
+            # Tool calls of a failed reply must not keep writing to ADO/GitHub (a retry reruns them)
+            for task in started.values():
+                task.cancel()
+            await asyncio.gather(*started.values(), return_exceptions=True)
+            raise
+        # An empty stream leaves nothing to assemble: ask for the reply in one piece
+        response = message_chunk_to_message(full) if full is not None else await llm.ainvoke(windowed())
         
         # Check if agent wants to use tools
         if hasattr(response, "tool_calls") and response.tool_calls:
-            # Execute tools
-            tool_results = []
-            for tool_call in response.tool_calls:
-                tool_name = tool_call["name"]
-                tool_args = tool_call["args"]
-                
-                # Find and execute the tool
-                for t in tools:
-                    if t.name == tool_name:
-                        try:
-                            if asyncio.iscoroutinefunction(t.func):
-                                result = await t.func(**tool_args)
-                            else:
-                                result = t.func(**tool_args)
-                            tool_results.append(ToolMessage(
-                                content=str(result),
-                                tool_call_id=tool_call["id"],
-                            ))
-                        except Exception as e:
-                            tool_results.append(ToolMessage(
-                                content=json.dumps({"error": str(e)}),
-                                tool_call_id=tool_call["id"],
-                            ))
-                        break
+            # Remaining calls run concurrently; gather preserves tool_call order
+            outcomes = await asyncio.gather(*(
+                started[tc["id"]] if tc.get("id") in started else self._run_tool(tc)
+                for tc in response.tool_calls
+            ))
+            tool_results = [m for m in outcomes if m is not None]
             
             # Continue conversation with tool results
-            messages = messages + [response] + tool_results
-            response = await llm_with_tools.ainvoke(messages)
+            messages.append(response)
+            messages.extend(tool_results)
+            response = await llm.ainvoke(windowed())
+        
+        messages.append(response)
+        output = {"messages": messages[start:]}
+        if window_id != state.get("context_window_start"):
+            output["context_window_start"] = window_id
+        
+        # Structured output: validate the JSON answer directly
+        schema = self.schema
+        if schema is not None:
+            try:
+                output.update(schema.model_validate_json(response.content).to_state())
+                return output
+            except ValidationError as e:
+                logger.warning(f"{self.name}: output did not match {schema.__name__}, falling back to parser: {e}")
         
         # Parse output if parser provided
-        output = {"messages": messages + [response]}
-        if output_parser:
+        if self.parser:
             try:
-                parsed = output_parser(response.content)
+                parsed = self.parser(response.content)
                 output.update(parsed)
             except Exception as e:
                 logger.warning(f"Could not parse output: {e}")
         
         return output
-    
-    return agent_node
 
 
 # ============================================================================
@@ -479,24 +976,51 @@ Output your requirements in a structured format, then call save_requirements() t
 Be thorough but practical. Focus on MVP requirements first."""
 
 
+def _try_json(text: str) -> Any:
+    """json.loads that returns None instead of raising on malformed JSON."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _response_json(content: str) -> Any:
+    """Parse a bare JSON reply (fast path) or the first ```json fenced block."""
+    if content.lstrip().startswith("{"):
+        data = _try_json(content)
+        if data is not None:
+            return data
+    if "```json" in content:
+        return _try_json(content.split("```json")[1].split("```")[0])
+    return None
+
+
+def _memoized_parser(parser: Callable[[str], dict]) -> Callable[[str], dict]:
+    """Memoize a reply parser; the same reply can be re-parsed as history is replayed.
+    
+    Parsed output is merged into graph state, where it may be edited in place,
+    so each call gets its own deep copy of the cached result.
+    """
+    cached = functools.lru_cache(maxsize=256)(parser)
+    
+    @functools.wraps(parser)
+    def parse(content: str) -> dict:
+        return copy.deepcopy(cached(content))
+    
+    return parse
+
+
+@_memoized_parser
 def parse_requirements(content: str) -> dict:
     """Extract requirements from LLM response."""
-    try:
-        # Try to find JSON in response
-        if "```json" in content:
-            json_str = content.split("```json")[1].split("```")[0]
-            return {"requirements": json.loads(json_str)}
-        elif "{" in content and "}" in content:
-            start = content.index("{")
-            end = content.rindex("}") + 1
-            return {"requirements": json.loads(content[start:end])}
-    except:
-        pass
-    return {"requirements": {"raw": content}}
+    data = _response_json(content)
+    if data is None and "{" in content and "}" in content:
+        data = _try_json(content[content.index("{"):content.rindex("}") + 1])
+    return {"requirements": data} if data is not None else {"requirements": {"raw": content}}
 
 
 # Work Items Agent (BA)
-work_items_tools = [save_work_items, ado_create_work_item]
+work_items_tools = [save_work_items, ado_create_work_items_batch, ado_bulk_create_work_items, ado_create_work_item]
 work_items_prompt = """You are a Business Analyst AI agent. Your job is to convert requirements into actionable work items.
 
 Given requirements, you must:
@@ -508,19 +1032,18 @@ Given requirements, you must:
 For each story, use the format:
 "As a [user], I want [feature], so that [benefit]"
 
-After generating work items, you can optionally push them to Azure DevOps using the ado_create_work_item tool.
+After generating work items, you can optionally push them to Azure DevOps. Prefer ado_create_work_items_batch:
+create all Epics in one call, then all stories (with parent_id set to their Epic's ID) in a second call.
+Use ado_bulk_create_work_items if the batch call fails, and ado_create_work_item only for one-off items.
 Call save_work_items() when done to store them in state."""
 
 
+@_memoized_parser
 def parse_work_items(content: str) -> dict:
     """Extract work items from LLM response."""
-    try:
-        if "```json" in content:
-            json_str = content.split("```json")[1].split("```")[0]
-            data = json.loads(json_str)
-            return {"epics": data.get("epics", []), "user_stories": data.get("stories", [])}
-    except:
-        pass
+    data = _response_json(content)
+    if isinstance(data, dict):
+        return {"epics": data.get("epics", []), "user_stories": data.get("stories", [])}
     return {}
 
 
@@ -542,15 +1065,11 @@ Include diagrams as Mermaid code. You can use render_mermaid_diagram() to create
 Call save_architecture() when done."""
 
 
+@_memoized_parser
 def parse_architecture(content: str) -> dict:
     """Extract architecture from LLM response."""
-    try:
-        if "```json" in content:
-            json_str = content.split("```json")[1].split("```")[0]
-            return {"architecture": json.loads(json_str)}
-    except:
-        pass
-    return {}
+    data = _response_json(content)
+    return {"architecture": data} if data is not None else {}
 
 
 # Developer Agent
@@ -575,29 +1094,23 @@ You can also push code to GitHub using this EXACT sequence:
 IMPORTANT: You MUST create the branch before pushing files to it!"""
 
 
+@_memoized_parser
 def parse_code(content: str) -> dict:
     """Extract code files from LLM response."""
-    files = []
-    try:
-        if "```json" in content:
-            json_str = content.split("```json")[1].split("```")[0]
-            data = json.loads(json_str)
-            if "files" in data:
-                files = data["files"]
-    except:
-        pass
+    data = _response_json(content)
+    files = data.get("files", []) if isinstance(data, dict) else []
     return {"code_artifacts": {"files": files}} if files else {}
 
 
 # Test Plan Agent
-test_plan_tools = [ado_list_iterations, ado_create_test_plan, ado_create_test_suite, ado_create_test_case]
+test_plan_tools = [ado_list_iterations, ado_create_test_plan, ado_create_test_suite, ado_bulk_create_test_cases, ado_create_test_case]
 test_plan_prompt = """You are a QA Engineer AI agent. Your job is to create a comprehensive test plan.
 
 Given user stories, you must:
 1. First, call ado_list_iterations() to see available iteration paths
 2. Create a test plan using ado_create_test_plan()
 3. Create test suites for each feature area
-4. Generate test cases from user story acceptance criteria
+4. Generate test cases from user story acceptance criteria and create them with ado_bulk_create_test_cases() in one call
 5. Each test case should have clear steps and expected results
 
 Format test steps as: "step_number. action|expected_result"
@@ -626,76 +1139,248 @@ async def human_approval_node(state: PipelineState) -> dict:
     }
 
 
+# Human feedback keywords (matched after lower() / strip())
+_APPROVE = frozenset({"approve", "approved", "yes", "y", "ok"})
+_REVISE = frozenset({"revise", "revision", "edit", "redo"})
+_SKIP = frozenset({"skip", "no", "n"})
+_YES = frozenset({"yes", "y", "ok"})
+
+# Collapses runs of "/" in user-supplied branch names
+_BRANCH_CLEAN = re.compile(r"/+")
+
+# Next stage after an approval
+_STAGE_FLOW = {
+    "requirements": "work_items",
+    "work_items": "ado_push",
+    "architecture": "development",
+    "development": "github_push_confirm",  # Go to confirm first
+    "github_push": "completed",
+}
+
+
 def route_after_approval(state: PipelineState) -> str:
     """Route based on human feedback."""
     feedback = str(state.get("human_feedback", "")).lower().strip()
     stage = state.get("current_stage", "")
     
-    if feedback in ("approve", "approved", "yes", "y", "ok"):
-        # Map to next stage
-        stage_flow = {
-            "requirements": "work_items",
-            "work_items": "ado_push",
-            "ado_push": "test_plan",
-            "test_plan": "architecture",
-            "architecture": "development",
-            "development": "github_push_confirm",  # Go to confirm first
-            "github_push": "completed",
-        }
-        return stage_flow.get(stage, "completed")
-    elif feedback in ("revise", "revision", "edit", "redo"):
+    if feedback in _APPROVE:
+        return _STAGE_FLOW.get(stage, "completed")
+    elif feedback in _REVISE:
         return stage  # Loop back
     else:
         return "failed"
 
 
+# ============================================================================
+# AGENTS - Built once at import; nodes below close over them
+# ============================================================================
+
+requirements_agent = AgentNode(
+    "requirements",
+    requirements_prompt,
+    requirements_tools,
+    parse_requirements,
+    schema=RequirementsSchema,
+)
+
+work_items_agent = AgentNode(
+    "work_items",
+    work_items_prompt,
+    work_items_tools,
+    parse_work_items,
+    schema=WorkItemsSchema,
+)
+
+architecture_agent = AgentNode(
+    "architecture",
+    architecture_prompt,
+    architecture_tools,
+    parse_architecture,
+    schema=ArchitectureSchema,
+)
+
+developer_agent = AgentNode(
+    "developer",
+    developer_prompt,
+    developer_tools,
+    parse_code,
+    schema=CodeArtifactsSchema,
+)
+
+test_plan_agent = AgentNode(
+    "test_plan",
+    test_plan_prompt,
+    test_plan_tools,
+    None,
+)
+
+
+
 # ============================================================================
 # BUILD THE GRAPH
 # ============================================================================
 
-def build_graph():
-    """Build the agentic SDLC pipeline graph."""
+# Prompt context rendered once by the stage that produces it:
+# stage_context key -> (state key, number of leading items, char limit)
+_STAGE_CONTEXT: dict[str, tuple[str, int | None, int | None]] = {
+    "requirements": ("requirements", None, 2000),
+    "stories": ("user_stories", 10, None),
+    "stories_brief": ("user_stories", 5, None),
+    "architecture": ("architecture", None, 2000),
+}
+
+
+def _render_context(ctx_key: str, obj: Any) -> str:
+    _, n, limit = _STAGE_CONTEXT[ctx_key]
+    if obj is None:
+        obj = [] if n else {}
+    return json.dumps(obj[:n] if n else obj, indent=2)[:limit]
+
+
+def _with_stage_context(state: PipelineState, result: dict) -> dict:
+    """Add pre-rendered prompt context for the stage outputs present in result."""
+    rendered = {
+        ctx_key: _render_context(ctx_key, result[key])
+        for ctx_key, (key, _, _) in _STAGE_CONTEXT.items()
+        if result.get(key) is not None
+    }
+    if rendered:
+        result["stage_context"] = {**(state.get("stage_context") or {}), **rendered}
+    return result
+
+
+def _context(state: PipelineState, ctx_key: str) -> str:
+    """Pre-rendered context string, rendered here if the producing stage did not store it."""
+    text = (state.get("stage_context") or {}).get(ctx_key)
+    if text is None:
+        text = _render_context(ctx_key, state.get(_STAGE_CONTEXT[ctx_key][0]))
+    return text
+
+
+# Stage results by (agent, inputs) hash, so a revise with no new feedback
+# does not call the LLM again. Opt-in with SDLC_LLM_CACHE=1 (as in the
+# autonomous graph): LLM output is not deterministic, and a revise may be
+# meant to get a different answer.
+LLM_CACHE_ENABLED = os.getenv("SDLC_LLM_CACHE", "").lower() in ("1", "true")
+_LLM_CACHE: dict[str, dict] = {}
+_LLM_CACHE_MAX = 128
+# Result keys that describe the LLM call rather than the stage output
+_UNCACHED_KEYS = frozenset({"messages", "context_window_start"})
+
+
+async def _run_cached(
+    agent: AgentNode, state: PipelineState, prompt: HumanMessage | None = None, **inputs: Any
+) -> dict:
+    """Run agent, reusing its earlier result when the stage inputs are unchanged.
     
-    builder = StateGraph(PipelineState)
+    inputs are the stage's context, not the message history: feedback is only
+    ever approve / revise / skip, so a revise without upstream changes reuses
+    the previous result.
+    """
+    if not LLM_CACHE_ENABLED:
+        return await agent(state, prompt)
     
-    # Create agent nodes
-    requirements_agent = create_agent_node(
-        "requirements",
-        requirements_prompt,
-        requirements_tools,
-        parse_requirements,
-    )
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    key = hashlib.blake2b(f"{agent.name}\0{agent.prompt}\0{payload}".encode(), digest_size=16).hexdigest()
     
-    work_items_agent = create_agent_node(
-        "work_items",
-        work_items_prompt,
-        work_items_tools,
-        parse_work_items,
-    )
+    cached = _LLM_CACHE.get(key)
+    if cached is not None:
+        logger.info(f"{agent.name}: inputs unchanged, reusing cached result")
+        messages = [prompt] if prompt is not None else []
+        messages.append(AIMessage(content=cached["answer"]))
+        return {**cached["output"], "messages": messages}
     
-    architecture_agent = create_agent_node(
-        "architecture",
-        architecture_prompt,
-        architecture_tools,
-        parse_architecture,
-    )
+    result = await agent(state, prompt)
+    if len(_LLM_CACHE) >= _LLM_CACHE_MAX:
+        _LLM_CACHE.pop(next(iter(_LLM_CACHE)))
+    _LLM_CACHE[key] = {
+        "output": {k: v for k, v in result.items() if k not in _UNCACHED_KEYS},
+        "answer": result["messages"][-1].content,
+    }
+    return result
+
+
+# Files per push_files commit in github_push_node
+GITHUB_PUSH_BATCH_SIZE = 50
+
+# Background ADO pushes by ado_task_id, while they run. The event loop only keeps
+# weak references to tasks; finished pushes remove themselves.
+_ADO_PUSH_TASKS: dict[str, asyncio.Task] = {}
+
+
+def _start_ado_push(task_id: str, push: Awaitable[dict]) -> None:
+    """Run the push coroutine in the background, recording its outcome under task_id.
     
-    developer_agent = create_agent_node(
-        "developer",
-        developer_prompt,
-        developer_tools,
-        parse_code,
-    )
+    The outcome goes to the artifact store rather than process memory: runs pause
+    at approval gates after ado_push and may be resumed in another process.
+    """
+    async def run() -> dict:
+        try:
+            result = {"status": "completed", **await push}
+        except Exception as e:
+            logger.error(f"ADO push failed: {e}", exc_info=True)
+            result = {"status": "failed", "error": str(e)}
+        store_artifact(result, key=task_id)
+        return result
     
-    test_plan_agent = create_agent_node(
-        "test_plan",
-        test_plan_prompt,
-        test_plan_tools,
-        None,
-    )
+    task = _ADO_PUSH_TASKS[task_id] = asyncio.create_task(run())
+    task.add_done_callback(lambda _: _ADO_PUSH_TASKS.pop(task_id, None))
+
+
+async def _join_ado_push(state: PipelineState) -> dict:
+    """Wait for the run's background ADO push (if any) and report its results."""
+    task_id = state.get("ado_task_id")
+    if not task_id:
+        return {}
+    ref = {"_ref": task_id}
+    task = _ADO_PUSH_TASKS.get(task_id)
+    if task is not None:
+        result = await task
+    else:
+        try:
+            result = load_artifact(ref)
+        except FileNotFoundError:
+            # e.g. the process running the push died before it finished
+            logger.warning(f"No outcome recorded for ADO push {task_id}")
+            return {"ado_task_id": None, "ado_results": {"status": "unknown"}}
+    delete_artifact(ref)
+    if result["status"] == "failed":
+        return {
+            "ado_task_id": None,
+            "ado_results": result,
+            "messages": [AIMessage(content=f"⚠️ ADO push failed: {result['error'][:100]}")],
+        }
+    created = result["epics"]["created"] + result["stories"]["created"]
+    failed = result["epics"]["failed"] + result["stories"]["failed"]
+    msg = f"✅ ADO push: {created} work items created"
+    if failed:
+        msg += f", {failed} failed"
+    return {
+        "ado_task_id": None,
+        "ado_results": result,
+        "messages": [AIMessage(content=msg)],
+    }
+
+
+# Stage gates the pipeline pauses before
+_INTERRUPT_BEFORE: frozenset[str] = frozenset({
+    "requirements_approval",
+    "work_items_approval",
+    "architecture_approval",
+    "development_approval",
+    "github_push_confirm",
+})
+
+
+@functools.lru_cache(maxsize=1)
+def build_graph():
+    """Build the agentic SDLC pipeline graph (compiled once and reused)."""
+    
+    builder = StateGraph(PipelineState)
     
     # Initialize node
     async def initialize(state: PipelineState) -> dict:
+        warm_mcp_clients()
         project_idea = state.get("project_idea", "")
         project_name = state.get("project_name", "new-project")
         return {
@@ -707,73 +1392,83 @@ def build_graph():
     
     # Stage wrapper nodes (set current_stage)
     async def requirements_node(state: PipelineState) -> dict:
-        result = await requirements_agent(state)
+        result = await _run_cached(
+            requirements_agent, state, idea=state.get("project_idea"), project=state.get("project_name")
+        )
         result["current_stage"] = "requirements"
-        return result
+        return _with_stage_context(state, result)
     
     async def work_items_node(state: PipelineState) -> dict:
         # Add context from previous stage
-        reqs = state.get("requirements", {})
-        state["messages"].append(HumanMessage(
-            content=f"Requirements:\n{json.dumps(reqs, indent=2)[:2000]}\n\nCreate epics and user stories."
-        ))
-        result = await work_items_agent(state)
+        requirements = _context(state, "requirements")
+        prompt = _stage_prompt(state, _WORK_ITEMS_TMPL, requirements=requirements)
+        result = await _run_cached(work_items_agent, state, prompt, requirements=requirements)
         result["current_stage"] = "work_items"
-        return result
+        return _with_stage_context(state, result)
     
     async def ado_push_node(state: PipelineState) -> dict:
-        """Push work items to ADO using agent."""
-        epics = state.get("epics", [])
-        stories = state.get("user_stories", [])
+        """Push work items to ADO (epics, then stories) with bulk creates."""
+        epics = state.get("epics") or []
+        stories = state.get("user_stories") or []
         
-        if not get_ado_client():
+        client = await get_ado_client()
+        if not client:
             return {
                 "current_stage": "ado_push",
                 "ado_results": {"skipped": True, "reason": "ADO not configured"},
             }
         
-        # Use agent to push
-        agent = create_agent_node(
-            "ado_push",
-            "Push the work items to Azure DevOps. Create epics first, then stories under each epic.",
-            [ado_create_work_item],
-            None,
-        )
-        
-        state["messages"].append(HumanMessage(
-            content=f"Push these to ADO:\nEpics: {json.dumps(epics[:5], indent=2)}\nStories: {json.dumps(stories[:10], indent=2)}"
-        ))
-        
-        result = await agent(state)
-        result["current_stage"] = "ado_push"
-        return result
+        # Pure I/O with no downstream data dependency: run it in the background
+        # and only wait for it in join_ado_push
+        task_id = uuid.uuid4().hex
+        _start_ado_push(task_id, _push_work_items(client, epics, stories))
+        return {
+            "current_stage": "ado_push",
+            "ado_task_id": task_id,
+            "ado_results": {"status": "in_progress"},
+        }
+    
+    async def join_ado_push_node(state: PipelineState) -> dict:
+        """Wait for the background ADO push before completing the pipeline."""
+        return await _join_ado_push(state)
     
     async def test_plan_node(state: PipelineState) -> dict:
-        stories = state.get("user_stories", [])
-        state["messages"].append(HumanMessage(
-            content=f"Create test plan for these stories:\n{json.dumps(stories[:10], indent=2)}"
-        ))
-        result = await test_plan_agent(state)
-        result["current_stage"] = "test_plan"
-        return result
+        stories = _context(state, "stories")
+        prompt = _stage_prompt(state, _TEST_PLAN_TMPL, stories=stories)
+        return await _run_cached(test_plan_agent, state, prompt, stories=stories)
     
     async def architecture_node(state: PipelineState) -> dict:
-        reqs = state.get("requirements", {})
-        stories = state.get("user_stories", [])
-        state["messages"].append(HumanMessage(
-            content=f"Design architecture for:\nRequirements: {json.dumps(reqs, indent=2)[:1500]}\nStories: {json.dumps(stories[:5], indent=2)}"
-        ))
-        result = await architecture_agent(state)
+        context = {
+            "requirements": _context(state, "requirements")[:1500],
+            "stories": _context(state, "stories_brief"),
+        }
+        prompt = _stage_prompt(state, _ARCHITECTURE_TMPL, **context)
+        result = await _run_cached(architecture_agent, state, prompt, **context)
         result["current_stage"] = "architecture"
-        return result
+        return _with_stage_context(state, result)
+    
+    async def plan_and_architecture_node(state: PipelineState) -> dict:
+        """Run the independent test plan and architecture stages concurrently.
+        
+        Both only depend on the work items; a revise of the architecture
+        re-runs architecture_node alone.
+        """
+        test_res, arch_res = await asyncio.gather(test_plan_node(state), architecture_node(state))
+        return {
+            **test_res,
+            **arch_res,
+            "messages": [*test_res.get("messages", []), *arch_res.get("messages", [])],
+        }
     
     async def development_node(state: PipelineState) -> dict:
-        arch = state.get("architecture", {})
-        reqs = state.get("requirements", {})
-        state["messages"].append(HumanMessage(
-            content=f"Implement this architecture:\n{json.dumps(arch, indent=2)[:2000]}"
-        ))
-        result = await developer_agent(state)
+        architecture = _context(state, "architecture")
+        prompt = _stage_prompt(state, _DEVELOPMENT_TMPL, architecture=architecture)
+        result = await _run_cached(developer_agent, state, prompt, architecture=architecture)
+        # Generated code can be large: keep it on disk and only a handle in state
+        if result.get("code_artifacts"):
+            # A revise replaces the code, so the previous artifact is no longer needed
+            delete_artifact(state.get("code_artifacts"))
+            result["code_artifacts"] = store_artifact(result["code_artifacts"])
         result["current_stage"] = "development"
         return result
     
@@ -782,7 +1477,7 @@ def build_graph():
         project_name = state.get("project_name", "new-project")
         owner = os.getenv("GITHUB_OWNER", "")
         
-        github_client = get_github_client()
+        github_client = await get_github_client()
         config_status = "✅ GitHub client ready" if github_client else "❌ GitHub client not configured"
         
         response = interrupt({
@@ -799,16 +1494,22 @@ def build_graph():
         })
         
         # Parse response
+        if response is None:
+            return {
+                "current_stage": "github_push_confirm",
+                "github_inputs": {"skip": True},
+                "messages": [HumanMessage(content="GitHub push skipped")],
+            }
         if isinstance(response, str):
             response_lower = response.lower().strip()
-            if response_lower in ("skip", "no", "n"):
+            if response_lower in _SKIP:
                 return {
                     "current_stage": "github_push_confirm",
                     "github_inputs": {"skip": True},
                     "messages": [HumanMessage(content="User skipped GitHub push")],
                 }
             # If single string, might be just "yes" - use defaults
-            if response_lower in ("yes", "y", "ok"):
+            if response_lower in _YES:
                 return {
                     "current_stage": "github_push_confirm",
                     "github_inputs": {
@@ -843,16 +1544,17 @@ def build_graph():
         """Push code to GitHub - creates repo, branch, pushes files, creates PR."""
         import asyncio as aio
         
-        code = state.get("code_artifacts", {})
+        # A missing artifact raises: pushing nothing would report "no files" instead
+        code = load_artifact(state.get("code_artifacts") or {})
         project_name = state.get("project_name", "new-project")
         inputs = state.get("github_inputs", {})
         
         owner = inputs.get("owner") or os.getenv("GITHUB_OWNER", "user")
         repo = inputs.get("repo") or project_name
         branch = inputs.get("branch") or f"feature/{project_name}"
-        branch = branch.replace("//", "/").strip("/")
+        branch = _BRANCH_CLEAN.sub("/", branch).strip("/")
         
-        github_client = get_github_client()
+        github_client = await get_github_client()
         if not github_client:
             return {
                 "current_stage": "github_push",
@@ -861,11 +1563,15 @@ def build_graph():
             }
         
         # Get files to push
-        files_to_push = []
-        if isinstance(code, dict) and "files" in code:
-            for f in code["files"]:
-                if f.get("path") and f.get("content"):
-                    files_to_push.append({"path": f["path"], "content": f["content"]})
+        files = code.get("files", ()) if isinstance(code, dict) else ()
+        files_to_push = [
+            {"path": path, "content": content}
+            for f in files
+            if isinstance(f, dict)
+            and (path := f.get("path"))
+            and (content := f.get("content"))
+        ]
+        file_count = len(files_to_push)
         
         if not files_to_push:
             return {
@@ -876,21 +1582,42 @@ def build_graph():
         
         results = []
         
-        # Step 1: Create repository
+        async def repo_ready() -> bool:
+            """True once the autoInit commit has created the main branch."""
+            try:
+                branches = await github_client.call_tool("list_branches", {"owner": owner, "repo": repo})
+            except Exception:
+                return False
+            return '"main"' in json.dumps(branches, default=str)
+        
+        # Step 1: Create repository (skipped on re-push to an existing repo)
         try:
-            result = await github_client.call_tool("create_repository", {
-                "name": repo,
-                "description": f"SDLC Pipeline: {project_name}",
-                "private": False,
-                "autoInit": True,
-            })
-            results.append({"step": "create_repo", "status": "success"})
-            await aio.sleep(3)  # Wait for GitHub to initialize
-        except Exception as e:
-            if "already exists" in str(e).lower():
-                results.append({"step": "create_repo", "status": "exists"})
-            else:
-                results.append({"step": "create_repo", "status": "error", "error": str(e)})
+            repo_info = await github_client.call_tool("get_repository", {"owner": owner, "repo": repo})
+            repo_exists = isinstance(repo_info, dict) and bool(repo_info.get("full_name") or repo_info.get("id"))
+        except Exception:
+            repo_exists = False
+        
+        if repo_exists:
+            results.append({"step": "create_repo", "status": "exists"})
+        else:
+            try:
+                result = await github_client.call_tool("create_repository", {
+                    "name": repo,
+                    "description": f"SDLC Pipeline: {project_name}",
+                    "private": False,
+                    "autoInit": True,
+                })
+                results.append({"step": "create_repo", "status": "success"})
+                # Wait for GitHub to initialize: poll instead of a fixed 3s sleep
+                for _ in range(6):
+                    await aio.sleep(0.5)
+                    if await repo_ready():
+                        break
+            except Exception as e:
+                if "already exists" in str(e).lower():
+                    results.append({"step": "create_repo", "status": "exists"})
+                else:
+                    results.append({"step": "create_repo", "status": "error", "error": str(e)})
         
         # Step 2: Create branch
         try:
@@ -907,16 +1634,22 @@ def build_graph():
             else:
                 results.append({"step": "create_branch", "status": "error", "error": str(e)})
         
-        # Step 3: Push files
+        # Step 3: Push files, one commit per batch. Batches go out sequentially:
+        # concurrent commits to the same branch would race on the branch ref.
+        batches = range(0, file_count, GITHUB_PUSH_BATCH_SIZE)
         try:
-            result = await github_client.call_tool("push_files", {
-                "owner": owner,
-                "repo": repo,
-                "branch": branch,
-                "files": files_to_push,
-                "message": f"feat: {project_name} implementation",
-            })
-            results.append({"step": "push_files", "status": "success"})
+            for n, start in enumerate(batches, 1):
+                message = f"feat: {project_name} implementation"
+                if len(batches) > 1:
+                    message += f" ({n}/{len(batches)})"
+                result = await github_client.call_tool("push_files", {
+                    "owner": owner,
+                    "repo": repo,
+                    "branch": branch,
+                    "files": files_to_push[start:start + GITHUB_PUSH_BATCH_SIZE],
+                    "message": message,
+                })
+            results.append({"step": "push_files", "status": "success", "commits": len(batches)})
         except Exception as e:
             results.append({"step": "push_files", "status": "error", "error": str(e)})
             return {
@@ -942,12 +1675,15 @@ def build_graph():
         except Exception as e:
             results.append({"step": "create_pr", "status": "error", "error": str(e)})
         
-        msg = f"✅ Code pushed to GitHub!\n  • Repo: https://github.com/{owner}/{repo}\n  • Branch: {branch}\n  • Files: {len(files_to_push)}"
+        msg = f"✅ Code pushed to GitHub!\n  • Repo: https://github.com/{owner}/{repo}\n  • Branch: {branch}\n  • Files: {file_count}"
         if pr_url:
             msg += f"\n  • PR: {pr_url}"
         
+        # The code is in GitHub now; the stored copy is no longer needed
+        delete_artifact(state.get("code_artifacts"))
         return {
             "current_stage": "github_push",
+            "code_artifacts": None,
             "github_results": {"owner": owner, "repo": repo, "branch": branch, "results": results},
             "messages": [AIMessage(content=msg)],
         }
@@ -959,9 +1695,12 @@ def build_graph():
         }
     
     async def failed_node(state: PipelineState) -> dict:
+        # Runs rejected after ado_push still have that push in flight
+        result = await _join_ado_push(state)
         return {
+            **result,
             "current_stage": "failed",
-            "messages": [AIMessage(content="❌ Pipeline stopped.")],
+            "messages": [*result.get("messages", []), AIMessage(content="❌ Pipeline stopped.")],
         }
     
     # Add nodes
@@ -971,13 +1710,14 @@ def build_graph():
     builder.add_node("work_items", work_items_node)
     builder.add_node("work_items_approval", human_approval_node)
     builder.add_node("ado_push", ado_push_node)
-    builder.add_node("test_plan", test_plan_node)
+    builder.add_node("plan_and_architecture", plan_and_architecture_node)
     builder.add_node("architecture", architecture_node)
     builder.add_node("architecture_approval", human_approval_node)
     builder.add_node("development", development_node)
     builder.add_node("development_approval", human_approval_node)
     builder.add_node("github_push_confirm", github_push_confirm_node)
     builder.add_node("github_push", github_push_node)
+    builder.add_node("join_ado_push", join_ado_push_node)
     builder.add_node("completed", completed_node)
     builder.add_node("failed", failed_node)
     
@@ -1000,8 +1740,8 @@ def build_graph():
         {"ado_push": "ado_push", "work_items": "work_items", "failed": "failed"}
     )
     
-    builder.add_edge("ado_push", "test_plan")
-    builder.add_edge("test_plan", "architecture")
+    builder.add_edge("ado_push", "plan_and_architecture")
+    builder.add_edge("plan_and_architecture", "architecture_approval")
     builder.add_edge("architecture", "architecture_approval")
     
     builder.add_conditional_edges(
@@ -1021,22 +1761,18 @@ def build_graph():
     builder.add_conditional_edges(
         "github_push_confirm",
         route_after_github_confirm,
-        {"github_push": "github_push", "completed": "completed"}
+        {"github_push": "github_push", "completed": "join_ado_push"}
     )
     
-    builder.add_edge("github_push", "completed")
+    builder.add_edge("github_push", "join_ado_push")
+    builder.add_edge("join_ado_push", "completed")
     builder.add_edge("completed", END)
     builder.add_edge("failed", END)
     
-    # Compile with interrupts
+    # Compile with interrupts (checkpointer opt-in via SDLC_CHECKPOINTER)
     return builder.compile(
-        interrupt_before=[
-            "requirements_approval",
-            "work_items_approval",
-            "architecture_approval",
-            "development_approval",
-            "github_push_confirm",
-        ]
+        checkpointer=make_checkpointer(),
+        interrupt_before=list(_INTERRUPT_BEFORE),
     )
 
 
@@ -19,7 +19,9 @@ USAGE IN LANGSMITH STUDIO:
 
 import os
 import logging
-from typing import Annotated, Any, Literal
+import threading
+from datetime import datetime, timedelta
+from typing import Annotated, Any, Final, Literal
 from typing_extensions import TypedDict
 from dotenv import load_dotenv
 
@@ -27,7 +29,10 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from langgraph.graph import StateGraph, START, END
+from langgraph.config import get_stream_writer
 from langgraph.types import interrupt
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_openai import ChatOpenAI
 
 from src.agents.deep_agent import (
     DeepAgent,
@@ -36,17 +41,39 @@ from src.agents.deep_agent import (
     ConfidenceLevel,
     ValidationResult,
 )
+from src.artifact_store import delete_artifact, store_artifact
+from src.checkpointing import make_checkpointer
+from src.loop_local import loop_local
 
 logger = logging.getLogger(__name__)
 
 
 def reducer(current: list, new: list | None) -> list:
-    """Reducer for message lists - appends new messages."""
-    if new is None:
+    """Reducer for message lists - appends new messages.
+    
+    Only copies when both sides are non-empty; updates that add nothing
+    return the current list as is. The current list must not be extended in
+    place: LangGraph still references it from the previous step's checkpoint.
+    """
+    if not new:
         return current
+    if not current:
+        return new
     return current + new
 
 
+def merge_reducer(current: dict | None, new: dict | None) -> dict:
+    """Reducer for per-agent dicts - updates carry only the keys they change.
+    
+    None resets the dict. Like reducer, never updates current in place.
+    """
+    if new is None:
+        return {}
+    if not new:
+        return current or {}
+    return {**(current or {}), **new}
+
+
 class DeepPipelineState(TypedDict, total=False):
     """State for the Deep Agent SDLC Pipeline."""
     
@@ -89,7 +116,7 @@ class DeepPipelineState(TypedDict, total=False):
     
     # Error handling
     errors: list[str]
-    consecutive_failures: dict[str, int] | None  # Track failures per agent
+    consecutive_failures: Annotated[dict[str, int], merge_reducer]  # Track failures per agent
 
 
 # ============================================================================
@@ -100,136 +127,404 @@ _ado_client = None
 _github_client = None
 _mermaid_client = None
 
+# Double-checked locking: concurrent requests create (and connect) one client each.
+# Once a client's configuration has been read from the environment it is in
+# _clients_resolved and getters return without the lock; an unconfigured (or
+# failed) client stays None without re-reading the environment
+_client_locks = {name: threading.Lock() for name in ("ado", "github", "mermaid")}
+_clients_resolved: set[str] = set()
+
+
+def reset_mcp_clients() -> None:
+    """Forget the MCP clients so the next getter call re-reads the environment."""
+    global _ado_client, _github_client, _mermaid_client
+    for lock in _client_locks.values():
+        lock.acquire()
+    try:
+        _ado_client = _github_client = _mermaid_client = None
+        _clients_resolved.clear()
+    finally:
+        for lock in _client_locks.values():
+            lock.release()
+    invalidate_tools_cache()
+
 
 def get_ado_client():
     """Lazily initialize ADO MCP client."""
     global _ado_client
-    if _ado_client is None:
-        org = os.getenv("AZURE_DEVOPS_ORGANIZATION")
-        project = os.getenv("AZURE_DEVOPS_PROJECT")
-        if org and project:
-            try:
-                from src.mcp_client.ado_client import AzureDevOpsMCPClient
-                _ado_client = AzureDevOpsMCPClient(
-                    organization=org,
-                    project=project,
-                )
-                logger.info(f"ADO client initialized for {org}/{project}")
-            except Exception as e:
-                logger.warning(f"Could not initialize ADO client: {e}")
-    return _ado_client
+    if "ado" in _clients_resolved:
+        return _ado_client
+    with _client_locks["ado"]:
+        if "ado" not in _clients_resolved:
+            org = os.getenv("AZURE_DEVOPS_ORGANIZATION")
+            project = os.getenv("AZURE_DEVOPS_PROJECT")
+            if org and project:
+                try:
+                    from src.mcp_client.ado_client import AzureDevOpsMCPClient
+                    _ado_client = AzureDevOpsMCPClient(
+                        organization=org,
+                        project=project,
+                    )
+                    logger.info(f"ADO client initialized for {org}/{project}")
+                except Exception as e:
+                    logger.warning(f"Could not initialize ADO client: {e}")
+            _clients_resolved.add("ado")
+        return _ado_client
 
 
 def get_github_client():
     """Lazily initialize GitHub MCP client."""
     global _github_client
-    if _github_client is None:
-        mcp_url = os.getenv("GITHUB_MCP_URL")
-        token = os.getenv("GITHUB_TOKEN")
-        if mcp_url and token:
-            try:
-                from src.mcp_client.github_client import GitHubMCPClient
-                _github_client = GitHubMCPClient(
-                    mcp_url=mcp_url,
-                    github_token=token,
-                )
-                logger.info(f"GitHub client initialized")
-            except Exception as e:
-                logger.warning(f"Could not initialize GitHub client: {e}")
-    return _github_client
+    if "github" in _clients_resolved:
+        return _github_client
+    with _client_locks["github"]:
+        if "github" not in _clients_resolved:
+            mcp_url = os.getenv("GITHUB_MCP_URL")
+            token = os.getenv("GITHUB_TOKEN")
+            if mcp_url and token:
+                try:
+                    from src.mcp_client.github_client import GitHubMCPClient
+                    _github_client = GitHubMCPClient(
+                        mcp_url=mcp_url,
+                        github_token=token,
+                    )
+                    logger.info(f"GitHub client initialized")
+                except Exception as e:
+                    logger.warning(f"Could not initialize GitHub client: {e}")
+            _clients_resolved.add("github")
+        return _github_client
 
 
 def get_mermaid_client():
     """Lazily initialize Mermaid MCP client."""
     global _mermaid_client
-    if _mermaid_client is None:
-        try:
-            from src.mcp_client.mermaid_client import MermaidMCPClient
-            _mermaid_client = MermaidMCPClient()
-            logger.info("Mermaid client initialized")
-        except Exception as e:
-            logger.warning(f"Could not initialize Mermaid client: {e}")
-    return _mermaid_client
+    if "mermaid" in _clients_resolved:
+        return _mermaid_client
+    with _client_locks["mermaid"]:
+        if "mermaid" not in _clients_resolved:
+            try:
+                from src.mcp_client.mermaid_client import MermaidMCPClient
+                _mermaid_client = MermaidMCPClient()
+                logger.info("Mermaid client initialized")
+            except Exception as e:
+                logger.warning(f"Could not initialize Mermaid client: {e}")
+            _clients_resolved.add("mermaid")
+        return _mermaid_client
 
 
 import asyncio
 import functools
+import hashlib
 import json
+import re
+import time
+import weakref
 from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 
-# Cache for converted LangChain tools
+# Cache for converted LangChain tools. Concurrent Studio runs build and
+# invalidate it from several threads, so writes go through _tools_lock
 _langchain_tools_cache = None
 _tools_initialized = False
+# Bumped each time _langchain_tools_cache is rebuilt, so caches derived from it can tell lists apart
+_tools_generation = 0
+_tools_lock = threading.Lock()
 
+# Per-tool wrappers by (client_name, tool_name) -> (client, tool_def hash, tool),
+# so refreshes only rebuild (and re-introspect) tools whose definition changed
+_tool_wrapper_cache: dict[tuple[str, str], tuple[Any, int, StructuredTool]] = {}
 
-async def _initialize_clients():
-    """Initialize all MCP clients and their connections."""
-    ado = get_ado_client()
-    github = get_github_client()
-    mermaid = get_mermaid_client()
-    
-    # Connect to clients that need explicit connection
-    if ado:
-        try:
-            await ado.connect()
-            logger.info(f"ADO connected, {len(ado.get_tools())} tools available")
-        except Exception as e:
-            logger.warning(f"ADO connection failed: {e}")
-    
-    if github:
-        try:
-            await github.connect()
-            logger.info(f"GitHub connected, {len(github.get_tools())} tools available")
-        except Exception as e:
-            logger.warning(f"GitHub connection failed: {e}")
-    
-    if mermaid:
-        try:
-            await mermaid.connect()
-            logger.info(f"Mermaid connected")
-        except Exception as e:
-            logger.warning(f"Mermaid connection failed: {e}")
+# Persistent event loop (on a daemon thread) that runs MCP tools for sync callers
+_bg_loop: asyncio.AbstractEventLoop | None = None
+_bg_loop_lock = threading.Lock()
+
+
+# TTL cache for read-only MCP tool results, keyed by (client, tool, canonical args)
+_TOOL_CACHE_TTL = float(os.getenv("MCP_TOOL_CACHE_TTL", "60"))
+_TOOL_CACHE_MAX = 256
+_tool_result_cache: dict[tuple[str, str, str], tuple[float, str]] = {}
+
+_READ_VERBS = frozenset({"get", "list", "search", "query", "read"})
+_WRITE_VERBS = frozenset({"create", "update", "delete", "add", "remove", "push", "merge", "link", "move", "run"})
+
+
+def _is_read_only_tool(tool_name: str) -> bool:
+    """Heuristic on MCP tool names like wit_get_work_item / list_branches."""
+    words = set(tool_name.lower().split("_"))
+    return not words.isdisjoint(_READ_VERBS) and words.isdisjoint(_WRITE_VERBS)
+
+
+def clear_tool_cache() -> None:
+    """Drop all cached MCP tool results."""
+    _tool_result_cache.clear()
+
+
+# In-flight calls per MCP client, so agents fanning out tool calls do not swamp
+# a slow server. asyncio semaphores belong to one loop, hence loop -> client ->
+# semaphore; both levels are weak so old loops and replaced clients are dropped
+_MCP_MAX_INFLIGHT = int(os.getenv("MCP_MAX_INFLIGHT", "8"))
+_client_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _client_semaphore(client) -> asyncio.Semaphore:
+    """The semaphore bounding calls to client from the running loop."""
+    per_client = loop_local(_client_semaphores, weakref.WeakKeyDictionary)
+    sem = per_client.get(client)
+    if sem is None:
+        sem = per_client[client] = asyncio.Semaphore(_MCP_MAX_INFLIGHT)
+    return sem
+
+
+_ERROR_RE = re.compile("error", re.IGNORECASE)
+
+
+def _is_error_result(result: Any) -> bool:
+    """True for a tool result whose text reports an error (MCP servers return these instead of raising)."""
+    return isinstance(result, dict) and "text" in result and _ERROR_RE.search(result["text"]) is not None
+
+
+def _is_cacheable_result(result: Any) -> bool:
+    """Errors and results whose server sent ``_meta.cache_hint: "no-cache"`` are not cached."""
+    if not isinstance(result, dict):
+        return True
+    if "error" in result:
+        return False
+    meta = result.get("_meta")
+    return not (isinstance(meta, dict) and meta.get("cache_hint") == "no-cache")
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Get or start the shared background event loop."""
+    global _bg_loop
+    if _bg_loop is None:
+        with _bg_loop_lock:
+            if _bg_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="mcp-tools-loop", daemon=True).start()
+                _bg_loop = loop
+    return _bg_loop
+
+
+# Connection error per configured MCP client from the last initialization (None when connected)
+_client_errors: dict[str, str | None] = {}
+
+# Clients whose tools were listed recently, by name -> (client, monotonic time);
+# within MCP_TOOLS_TTL they are not reconnected on the next run
+_TOOLS_TTL = float(os.getenv("MCP_TOOLS_TTL", "300"))
+_client_listed_at: dict[str, tuple[Any, float]] = {}
+
+
+def invalidate_tools_cache() -> None:
+    """Reconnect the MCP clients and rebuild the tool list on next use."""
+    global _langchain_tools_cache
+    with _tools_lock:
+        _client_listed_at.clear()
+        _langchain_tools_cache = None
+    _agent_cache.clear()
+
+
+def _mcp_clients() -> tuple[tuple[str, Any], ...]:
+    """The (name, client) pairs for ADO, GitHub and Mermaid; unconfigured clients are None."""
+    return (("ado", get_ado_client()), ("github", get_github_client()), ("mermaid", get_mermaid_client()))
+
+
+def _client_tools(client) -> list[dict]:
+    """Tool definitions listed by a client at connect time ([] if it lists none)."""
+    get_tools = getattr(client, "get_tools", None)
+    return get_tools() if get_tools is not None else []
+
+
+async def _connect_client(name: str, client) -> None:
+    """Connect one MCP client and log its tool count."""
+    await client.connect()
+    logger.info(f"{name} connected, {len(_client_tools(client))} tools available")
+
+
+# Serializes _initialize_clients per event loop, so runs starting together
+# share one round of tools/list calls instead of each reconnecting stale clients
+_init_locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+async def _initialize_clients() -> dict[str, str | None]:
+    """Connect all configured MCP clients concurrently.
+
+    Clients that listed their tools within MCP_TOOLS_TTL are skipped. A failing
+    client does not block the others; returns the connection error per
+    configured client (None when it is connected).
+    """
+    async with loop_local(_init_locks, asyncio.Lock):
+        return await _connect_stale_clients()
+
+
+async def _connect_stale_clients() -> dict[str, str | None]:
+    """Body of _initialize_clients, run under its lock."""
+    now = time.monotonic()
+    configured = {name: client for name, client in _mcp_clients() if client is not None}
+    stale = {
+        name: client for name, client in configured.items()
+        if name not in _client_listed_at
+        or _client_listed_at[name][0] is not client
+        or now - _client_listed_at[name][1] >= _TOOLS_TTL
+    }
+    results = await asyncio.gather(
+        *(_connect_client(name, client) for name, client in stale.items()),
+        return_exceptions=True,
+    )
     
-    return ado, github, mermaid
+    _client_errors.clear()
+    for name in configured.keys() - stale.keys():
+        _client_errors[name] = None
+    for (name, client), result in zip(stale.items(), results):
+        if isinstance(result, BaseException):
+            logger.warning(f"{name} connection failed: {result}")
+            _client_errors[name] = str(result) or type(result).__name__
+            _client_listed_at.pop(name, None)
+        else:
+            _client_errors[name] = None
+            _client_listed_at[name] = (client, time.monotonic())
+    return dict(_client_errors)
 
 
 def _create_langchain_tool(tool_def: dict, client, client_name: str) -> StructuredTool:
-    """Create a LangChain tool from an MCP tool definition."""
+    """Create (or reuse) a LangChain tool from an MCP tool definition."""
     tool_name = tool_def["name"]
+    key = (client_name, tool_name)
+    def_hash = hash(json.dumps(tool_def, sort_keys=True, default=str))
+    cached = _tool_wrapper_cache.get(key)
+    if cached is not None and cached[0] is client and cached[1] == def_hash:
+        return cached[2]
+    
     tool_description = tool_def.get("description", f"Execute {tool_name}")
     
+    read_only = _is_read_only_tool(tool_name)
+    
     async def tool_executor(**kwargs) -> str:
-        """Execute the MCP tool."""
+        """Execute the MCP tool (read-only results are cached for _TOOL_CACHE_TTL)."""
+        if read_only:
+            key = (client_name, tool_name, json.dumps(kwargs, sort_keys=True, default=str))
+            cached = _tool_result_cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+        else:
+            # A write may change what any read returns
+            clear_tool_cache()
+        
         try:
-            result = await client.call_tool(tool_name, kwargs)
+            async with _client_semaphore(client):
+                result = await client.call_tool(tool_name, kwargs)
             if isinstance(result, dict):
-                return json.dumps(result, indent=2)
-            return str(result)
+                # Compact: the output is read by the LLM, indentation only costs tokens
+                output = json.dumps(result, separators=(",", ":"), ensure_ascii=False, default=str)
+            else:
+                output = str(result)
         except Exception as e:
             return json.dumps({"error": str(e)})
+        
+        if read_only and _is_cacheable_result(result):
+            if len(_tool_result_cache) >= _TOOL_CACHE_MAX:
+                _tool_result_cache.pop(next(iter(_tool_result_cache)))
+            _tool_result_cache[key] = (time.monotonic() + _TOOL_CACHE_TTL, output)
+        return output
     
-    # Create a sync wrapper that properly handles the async context
+    # Sync callers (with or without a running loop of their own) hand the call
+    # to the shared background loop instead of spinning up a loop per call
     def sync_wrapper(**kwargs) -> str:
         """Sync wrapper for async tool execution."""
-        import asyncio
-        try:
-            # Check if there's a running event loop
-            loop = asyncio.get_running_loop()
-            # If we're in an async context, create a new task
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, tool_executor(**kwargs))
-                return future.result()
-        except RuntimeError:
-            # No running event loop, we can use asyncio.run
-            return asyncio.run(tool_executor(**kwargs))
-    
-    return StructuredTool.from_function(
+        future = asyncio.run_coroutine_threadsafe(tool_executor(**kwargs), _get_background_loop())
+        return future.result()
+    
+    # The MCP input schema is what the LLM sees and what invoke() passes
+    # through; inferred from the wrappers' **kwargs it would be a single
+    # opaque "kwargs" argument
+    input_schema = tool_def.get("inputSchema")
+    if not isinstance(input_schema, dict):
+        input_schema = {"type": "object", "properties": {}}
+    lc_tool = StructuredTool.from_function(
         func=sync_wrapper,
         coroutine=tool_executor,
         name=f"{client_name}_{tool_name}",
         description=f"[{client_name.upper()}] {tool_description}",
+        args_schema=input_schema,
+    )
+    _tool_wrapper_cache[key] = (client, def_hash, lc_tool)
+    return lc_tool
+
+
+def _create_batch_work_items_tool(client) -> StructuredTool:
+    """Local ADO tool creating many work items in one REST $batch request.
+    
+    The ADO MCP server only creates one work item per call.
+    """
+    key = ("ado", "wit_batch_create_work_items")
+    cached = _tool_wrapper_cache.get(key)
+    if cached is not None and cached[0] is client:
+        return cached[2]
+    
+    async def batch_create(project: str, work_items: list[dict]) -> str:
+        """Create the work items; returns one created item (or error) per input, in order.
+        
+        Items link to an existing parent by parentId, or to an item of the same call
+        by parentIndex. ADO only assigns ids on creation, so items without a
+        parentIndex go out first and their children in a second request.
+        """
+        items = [
+            {
+                "work_item_type": wi.get("workItemType", "Issue"),
+                "title": wi.get("title", ""),
+                "description": wi.get("description", ""),
+                "parent_id": wi.get("parentId"),
+            }
+            for wi in work_items
+        ]
+        in_call_parent = [
+            idx if isinstance(idx := wi.get("parentIndex"), int) and 0 <= idx < len(items) and idx != i else None
+            for i, wi in enumerate(work_items)
+        ]
+        parents = [i for i, idx in enumerate(in_call_parent) if idx is None]
+        children = [i for i, idx in enumerate(in_call_parent) if idx is not None]
+        
+        async def create(wave: list[int]) -> list:
+            wave_items = [items[i] for i in wave]
+            try:
+                return await client.create_work_items_batch(wave_items, project)
+            except RuntimeError:
+                # No PAT for the REST API: concurrent creates through the MCP server
+                return await client.bulk_create_work_items(wave_items, project)
+        
+        clear_tool_cache()
+        results: list = [None] * len(items)
+        try:
+            for wave in (parents, children):
+                if not wave:
+                    continue
+                for i in wave:
+                    if in_call_parent[i] is not None:
+                        items[i]["parent_id"] = _created_work_item_id(results[in_call_parent[i]])
+                for i, result in zip(wave, await create(wave)):
+                    results[i] = result
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+        return json.dumps(results, default=str)
+    
+    def sync_wrapper(project: str, work_items: list[dict]) -> str:
+        """Sync wrapper for async tool execution."""
+        future = asyncio.run_coroutine_threadsafe(batch_create(project, work_items), _get_background_loop())
+        return future.result()
+    
+    lc_tool = StructuredTool.from_function(
+        func=sync_wrapper,
+        coroutine=batch_create,
+        name="ado_wit_batch_create_work_items",
+        description=(
+            "[ADO] Create several work items in a single call. work_items is a list of "
+            '{"workItemType": "Epic" or "Issue", "title": str, "description": str, '
+            '"parentIndex": int (optional), "parentId": int (optional)}. '
+            "parentIndex links an item (e.g. an Issue) to the item at that position in "
+            "work_items (e.g. its Epic); parentId links it to an existing work item."
+        ),
     )
+    _tool_wrapper_cache[key] = (client, 0, lc_tool)
+    return lc_tool
 
 
 def get_all_tools() -> list:
@@ -238,71 +533,121 @@ def get_all_tools() -> list:
     Returns:
         List of LangChain StructuredTools from all MCP clients.
     """
-    global _langchain_tools_cache, _tools_initialized
-    
-    if _langchain_tools_cache is not None:
-        logger.info(f"Returning {len(_langchain_tools_cache)} cached tools")
-        return _langchain_tools_cache
-    
-    logger.info("Building tools from MCP clients...")
-    tools = []
-    
-    # Get clients (they may not be connected yet - that happens in nodes)
-    ado = get_ado_client()
-    github = get_github_client()
-    mermaid = get_mermaid_client()
-    
-    logger.info(f"Clients available: ADO={ado is not None}, GitHub={github is not None}, Mermaid={mermaid is not None}")
-    
-    # If clients exist and have tools, convert them
-    if ado:
-        ado_tools = ado.get_tools()
-        logger.info(f"ADO client has {len(ado_tools)} tools")
-        for tool_def in ado_tools:
-            try:
-                lc_tool = _create_langchain_tool(tool_def, ado, "ado")
-                tools.append(lc_tool)
-            except Exception as e:
-                logger.warning(f"Failed to convert ADO tool {tool_def.get('name')}: {e}")
-    
-    if github:
-        gh_tools = github.get_tools()
-        logger.info(f"GitHub client has {len(gh_tools)} tools")
-        for tool_def in gh_tools:
-            try:
-                lc_tool = _create_langchain_tool(tool_def, github, "github")
-                tools.append(lc_tool)
-            except Exception as e:
-                logger.warning(f"Failed to convert GitHub tool {tool_def.get('name')}: {e}")
-    
-    if mermaid:
-        mermaid_tools = mermaid.get_tools() if hasattr(mermaid, 'get_tools') else []
-        logger.info(f"Mermaid client has {len(mermaid_tools)} tools")
-        for tool_def in mermaid_tools:
-            try:
-                lc_tool = _create_langchain_tool(tool_def, mermaid, "mermaid")
-                tools.append(lc_tool)
-            except Exception as e:
-                logger.warning(f"Failed to convert Mermaid tool {tool_def.get('name')}: {e}")
+    global _langchain_tools_cache, _tools_initialized, _tools_generation
+    
+    tools = _langchain_tools_cache
+    if tools is not None:
+        logger.info(f"Returning {len(tools)} cached tools")
+        return tools
+    
+    # Double-checked: one caller builds, concurrent ones wait and reuse its list
+    with _tools_lock:
+        if _langchain_tools_cache is not None:
+            return _langchain_tools_cache
+        
+        logger.info("Building tools from MCP clients...")
+        tools = []
+    
+        # Get clients (they may not be connected yet - that happens in nodes)
+        clients = _mcp_clients()
+        logger.info("Clients available: " + ", ".join(f"{name}={client is not None}" for name, client in clients))
+    
+        # If clients exist and have tools, convert them. get_tools() returns the
+        # list fetched at connect time (connects are gathered in _initialize_clients),
+        # so this is a synchronous fold with no RPCs
+        for client_name, client in clients:
+            if not client:
+                continue
+            client_tools = _client_tools(client)
+            logger.info(f"{client_name} client has {len(client_tools)} tools")
+            for tool_def in client_tools:
+                try:
+                    tools.append(_create_langchain_tool(tool_def, client, client_name))
+                except Exception as e:
+                    logger.warning(f"Failed to convert {client_name} tool {tool_def.get('name')}: {e}")
+            if client_name == "ado" and hasattr(client, "create_work_items_batch"):
+                tools.append(_create_batch_work_items_tool(client))
+    
+        if tools:
+            _langchain_tools_cache = tools
+            _tools_generation += 1
+            logger.info(f"Loaded {len(tools)} MCP tools as LangChain tools")
+        else:
+            logger.warning("No MCP tools available - agents will work with LLM reasoning only")
     
-    if tools:
-        _langchain_tools_cache = tools
-        logger.info(f"Loaded {len(tools)} MCP tools as LangChain tools")
-    else:
-        logger.warning("No MCP tools available - agents will work with LLM reasoning only")
+        return tools
+
+
+# OpenAI tool schemas by (tools generation, tool names), shared by agents with the same tool set
+_tool_schema_cache: dict[tuple[int, tuple[str, ...]], list[dict]] = {}
+
+
+def get_scoped_tools(*prefixes: str) -> tuple[list, list[dict]]:
+    """MCP tools whose names start with one of prefixes (all without prefixes), and their OpenAI schemas.
     
-    return tools
+    Agents only get the tools their stage uses, which keeps tool definitions
+    out of every other agent's prompt.
+    """
+    tools = get_all_tools()
+    if prefixes:
+        tools = [t for t in tools if t.name.startswith(prefixes)]
+    key = (_tools_generation, tuple(t.name for t in tools))
+    schemas = _tool_schema_cache.get(key)
+    if schemas is None:
+        schemas = [convert_to_openai_tool(t) for t in tools]
+        _bounded_put(_tool_schema_cache, key, schemas)
+    return tools, schemas
+
+
+# MCP tool name prefixes each agent is given; () means no tools
+TOOL_SCOPES: dict[str, tuple[str, ...]] = {
+    "requirements": (),
+    "work_items": ("ado_wit_",),
+    "test_plan": ("ado_testplan_",),
+    "architecture": (),
+    "development": (),
+    "github": ("github_",),
+}
+
+
+def get_agent_tools(agent: str) -> tuple[list, list[dict]]:
+    """Tools and OpenAI schemas for an agent's TOOL_SCOPES entry."""
+    prefixes = TOOL_SCOPES[agent]
+    if not prefixes:
+        return [], []
+    return get_scoped_tools(*prefixes)
+
+
+# Default model per agent: stages that mostly emit templated tool calls run on
+# a small model. Override one with SDLC_MODEL_<AGENT>, e.g. SDLC_MODEL_WORK_ITEMS
+AGENT_MODELS: dict[str, str] = {
+    "requirements": "gpt-4o",
+    "work_items": "gpt-4o-mini",
+    "test_plan": "gpt-4o-mini",
+    "architecture": "gpt-4o",
+    "development": "gpt-4o",
+    "github": "gpt-4o-mini",
+}
+
+
+def get_agent_model(agent: str) -> str:
+    """Model name for an agent (SDLC_MODEL_<AGENT> or its AGENT_MODELS default)."""
+    return os.getenv(f"SDLC_MODEL_{agent.upper()}") or AGENT_MODELS[agent]
 
 
 async def get_all_tools_async() -> list:
     """Async version that ensures clients are connected first."""
     global _langchain_tools_cache
     
-    # Initialize and connect clients
+    # Connect clients whose tool list is missing or older than MCP_TOOLS_TTL
+    listed_before = dict(_client_listed_at)
     await _initialize_clients()
     
-    # Clear cache to force refresh
-    _langchain_tools_cache = None
+    # Rebuild the tool list only if a client re-listed its tools; unchanged
+    # tools reuse their cached wrappers
+    if _client_listed_at != listed_before:
+        with _tools_lock:
+            _langchain_tools_cache = None
     
     # Now get tools (clients should be connected)
     return get_all_tools()
@@ -312,43 +657,35 @@ async def get_all_tools_async() -> list:
 # AGENT CREATION
 # ============================================================================
 
-def create_orchestrator_agent() -> DeepAgent:
-    """Create the orchestrator agent that decides the pipeline flow."""
-    return DeepAgent(
-        role="Orchestrator",
-        objective="""Analyze user requirements and orchestrate the SDLC pipeline.
-        Decide which agents to invoke and in what order based on project complexity.
-        Can skip stages if not needed. Can spawn specialist agents for complex tasks.""",
-        system_prompt="""You are the Orchestrator for an autonomous SDLC pipeline.
-        
-        Your responsibilities:
-        1. Analyze the user's project requirements
-        2. Decide which stages are needed (requirements, work_items, architecture, code)
-        3. Determine if specialists should be spawned
-        4. Route to the appropriate next agent
-        5. Detect when the pipeline is complete
-        
-        Decision criteria:
-        - Simple projects: Requirements → Code (skip work items and architecture)
-        - Moderate projects: Requirements → Architecture → Code
-        - Complex projects: Requirements → Work Items → Architecture (spawn specialists) → Code (spawn specialists)
-        
-        You have access to ALL MCP tools (ADO, GitHub, Mermaid).
-        Make autonomous decisions. Request approval only for critical changes.
-        """,
-        tools=get_all_tools(),
-        max_iterations=5,
-        confidence_threshold=ConfidenceLevel.MEDIUM,
-        enable_spawning=True,
-    )
+# Built agents by factory name, with the ids of the MCP tools they were built with
+_agent_cache: dict[str, tuple[tuple[int, ...], DeepAgent]] = {}
 
 
-def create_requirements_agent() -> DeepAgent:
-    """Create a requirements gathering agent (optimized for demo)."""
-    return DeepAgent(
-        role="Requirements Analyst",
-        objective="Generate comprehensive software requirements quickly",
-        system_prompt="""You are a Requirements Analyst in an SDLC pipeline.
+def _cached_agent(factory):
+    """Build the agent once per MCP tool set; each call returns a fresh clone.
+    
+    DeepAgent keeps per-run state (iteration count, history), so callers get a
+    clone sharing the prompt, tools and bound LLM.
+    """
+    def tools_key() -> tuple[int, ...]:
+        return tuple(map(id, _langchain_tools_cache or ()))
+    
+    @functools.wraps(factory)
+    def wrapper() -> DeepAgent:
+        cached = _agent_cache.get(factory.__name__)
+        if cached is None or cached[0] != tools_key():
+            agent = factory()  # may build the tool list, so key it afterwards
+            cached = _agent_cache[factory.__name__] = (tools_key(), agent)
+        return cached[1].clone()
+    return wrapper
+
+
+def clear_agent_cache() -> None:
+    """Rebuild every agent on its next factory call (e.g. after changing SDLC_MODEL_*)."""
+    _agent_cache.clear()
+
+
+_REQUIREMENTS_PROMPT: Final[str] = """You are a Requirements Analyst in an SDLC pipeline.
 
 🎯 OUTPUT GUARDRAILS - USE THIS EXACT STRUCTURE:
 
@@ -384,20 +721,27 @@ Be thorough but concise. Complete in a single response without multiple validati
 Must end with "REQUIREMENTS_COMPLETE" signal.
 
 ⚠️ DO NOT CALL ANY TOOLS - Just analyze the input and generate requirements text!
-        """,
-        tools=[],  # NO TOOLS - Requirements agent should only generate text
+        """
+
+
+@_cached_agent
+def create_requirements_agent() -> DeepAgent:
+    """Create a requirements gathering agent (optimized for demo)."""
+    tools, tool_schemas = get_agent_tools("requirements")
+    return DeepAgent(
+        role="Requirements Analyst",
+        objective="Generate comprehensive software requirements quickly",
+        system_prompt=_REQUIREMENTS_PROMPT,
+        model_name=get_agent_model("requirements"),
+        tools=tools,  # NO TOOLS - Requirements agent should only generate text
+        tool_schemas=tool_schemas,
         max_iterations=1,  # Single iteration - just generate requirements
         confidence_threshold=ConfidenceLevel.MEDIUM,  # Lowered threshold
         enable_spawning=False,
     )
 
 
-def create_work_items_agent() -> DeepAgent:
-    """Create a work items agent that creates comprehensive epics and stories."""
-    return DeepAgent(
-        role="Business Analyst",
-        objective="Create comprehensive epics and user stories in Azure DevOps based on product requirements",
-        system_prompt="""You are a Business Analyst creating PRODUCT-FOCUSED work items in Azure DevOps.
+_WORK_ITEMS_PROMPT: Final[str] = """You are a Business Analyst creating PRODUCT-FOCUSED work items in Azure DevOps.
 
 ⚠️ MANDATORY: CALL TOOLS IN YOUR FIRST RESPONSE!
 
@@ -417,17 +761,17 @@ AVOID:
 
 🎯 OUTPUT GUARDRAILS - YOU MUST FOLLOW THIS FORMAT:
 
-After calling each ado_wit_create_work_item tool, you MUST include in your response:
+After calling ado_wit_batch_create_work_items, you MUST include in your response, for each created item:
 "Created work item: https://dev.azure.com/appatr/testingmcp/_workitems/edit/[ID]"
 
 ⚠️ CRITICAL: You MUST include the URL with ID for EVERY work item you create!
 
 YOUR TASK:
-1. Create 1-2 Epics (high-level product features) using ado_wit_create_work_item
+1. Create 1-2 Epics (high-level product features)
    - Focus on user value and business goals
    - Example: "Customer Account Management Portal" NOT "Spring Boot REST API"
 
-2. Create 6-8 User Stories (specific user features) using ado_wit_create_work_item
+2. Create 6-8 User Stories (specific user features)
    - Use user story format: "As a [user], I want to [action], so that [benefit]"
    - Focus on user workflows and interactions
    - Include acceptance criteria from user perspective
@@ -442,11 +786,11 @@ YOUR TASK:
    - "Azure SQL Database Schema Design"
    - "OAuth 2.0 Authentication Server Integration"
 
-TOOL: ado_wit_create_work_item
+TOOL: ado_wit_batch_create_work_items - call it ONCE with ALL epics and stories
 Parameters:
 - project: "testingmcp"
-- workItemType: "Epic" or "Issue"
-- fields: [{"name": "System.Title", "value": "User-focused title"}, {"name": "System.Description", "value": "User story with acceptance criteria"}]
+- work_items: [{"workItemType": "Epic" or "Issue", "title": "User-focused title", "description": "User story with acceptance criteria", "parentIndex": N}, ...]
+- Give every Issue a parentIndex: the 0-based position of its Epic in work_items
 
 STORY CATEGORIES (focus on user value):
 - User authentication and account access
@@ -472,9 +816,21 @@ List all URLs:
 ...
 "\n=== TOTAL: [N] WORK ITEMS ==="
 
-START CALLING ado_wit_create_work_item NOW - CREATE 7-10 PRODUCT-FOCUSED WORK ITEMS!
-""",
-        tools=get_all_tools(),
+CALL ado_wit_batch_create_work_items NOW - ONE CALL WITH 7-10 PRODUCT-FOCUSED WORK ITEMS!
+"""
+
+
+@_cached_agent
+def create_work_items_agent() -> DeepAgent:
+    """Create a work items agent that creates comprehensive epics and stories."""
+    tools, tool_schemas = get_agent_tools("work_items")
+    return DeepAgent(
+        role="Business Analyst",
+        objective="Create comprehensive epics and user stories in Azure DevOps based on product requirements",
+        system_prompt=_WORK_ITEMS_PROMPT,
+        model_name=get_agent_model("work_items"),
+        tools=tools,
+        tool_schemas=tool_schemas,
         max_iterations=8,  # Increased for more work items
         confidence_threshold=ConfidenceLevel.LOW,  # Lower to force more work
         enable_spawning=False,
@@ -483,12 +839,7 @@ START CALLING ado_wit_create_work_item NOW - CREATE 7-10 PRODUCT-FOCUSED WORK IT
 
 
 # --- NEW: Test Plan Agent ---
-def create_test_plan_agent() -> DeepAgent:
-    """Create a test plan agent that creates ADO test cases."""
-    return DeepAgent(
-        role="QA Manager",
-        objective="Create comprehensive test cases in Azure DevOps based on requirements",
-        system_prompt="""You are a Senior QA Manager. You MUST use tools to create test cases.
+_TEST_PLAN_PROMPT: Final[str] = """You are a Senior QA Manager. You MUST use tools to create test cases.
 
 ⚠️ MANDATORY: CALL TOOLS IN YOUR FIRST RESPONSE - DO NOT WAIT!
 
@@ -535,20 +886,27 @@ After processing all work items, end with:
 ⚠️ You MUST end with "TEST_PLAN_COMPLETE" to signal completion!
 
 YOU MUST CALL TOOLS - NO PLANNING, NO EXPLANATION, JUST EXECUTE NOW!
-""",
-        tools=get_all_tools(),
+"""
+
+
+@_cached_agent
+def create_test_plan_agent() -> DeepAgent:
+    """Create a test plan agent that creates ADO test cases."""
+    tools, tool_schemas = get_agent_tools("test_plan")
+    return DeepAgent(
+        role="QA Manager",
+        objective="Create comprehensive test cases in Azure DevOps based on requirements",
+        system_prompt=_TEST_PLAN_PROMPT,
+        model_name=get_agent_model("test_plan"),
+        tools=tools,
+        tool_schemas=tool_schemas,
         max_iterations=12,
         confidence_threshold=ConfidenceLevel.LOW,
         enable_spawning=False,
     )
 
 
-def create_architecture_agent() -> DeepAgent:
-    """Create an architecture design agent (optimized for demo)."""
-    return DeepAgent(
-        role="Architect",
-        objective="Design comprehensive enterprise architecture with mermaid diagrams",
-        system_prompt="""You are a Solution Architect following Northern Trust standards, UML, C4, and TOGAF frameworks.
+_ARCHITECTURE_PROMPT: Final[str] = """You are a Solution Architect following Northern Trust standards, UML, C4, and TOGAF frameworks.
 
 ⚠️ DO NOT CALL ANY TOOLS - Generate markdown documentation with embedded mermaid diagrams!
 
@@ -722,20 +1080,27 @@ graph LR
 ⚠️ END YOUR RESPONSE WITH: "ARCHITECTURE_COMPLETE"
 
 Generate comprehensive architecture following this exact structure with mermaid diagrams for each section!
-        """,
-        tools=[],  # NO TOOLS - Architecture agent should only generate documentation
+        """
+
+
+@_cached_agent
+def create_architecture_agent() -> DeepAgent:
+    """Create an architecture design agent (optimized for demo)."""
+    tools, tool_schemas = get_agent_tools("architecture")
+    return DeepAgent(
+        role="Architect",
+        objective="Design comprehensive enterprise architecture with mermaid diagrams",
+        system_prompt=_ARCHITECTURE_PROMPT,
+        model_name=get_agent_model("architecture"),
+        tools=tools,  # NO TOOLS - Architecture agent should only generate documentation
+        tool_schemas=tool_schemas,
         max_iterations=1,  # Single iteration - just generate architecture
         confidence_threshold=ConfidenceLevel.LOW,
         enable_spawning=False,
     )
 
 
-def create_developer_agent() -> DeepAgent:
-    """Create a code generation agent (optimized for demo)."""
-    return DeepAgent(
-        role="Developer",
-        objective="Generate production-ready code quickly for demo",
-        system_prompt="""You are a Senior Developer who generates production-ready code.
+_DEVELOPER_PROMPT: Final[str] = """You are a Senior Developer who generates production-ready code.
 
 SINGLE-PASS MODE: Generate complete code in ONE response.
 
@@ -762,20 +1127,27 @@ OUTPUT FORMAT (CRITICAL):
 ```
 
 Generate ALL files, then decide: COMPLETE
-""",
-        tools=[],  # NO TOOLS - just generate code directly
+"""
+
+
+@_cached_agent
+def create_developer_agent() -> DeepAgent:
+    """Create a code generation agent (optimized for demo)."""
+    tools, tool_schemas = get_agent_tools("development")
+    return DeepAgent(
+        role="Developer",
+        objective="Generate production-ready code quickly for demo",
+        system_prompt=_DEVELOPER_PROMPT,
+        model_name=get_agent_model("development"),
+        tools=tools,  # NO TOOLS - just generate code directly
+        tool_schemas=tool_schemas,
         max_iterations=1,  # Single iteration only - generate all files at once
         confidence_threshold=ConfidenceLevel.LOW,  # Lower threshold
         enable_spawning=False,
     )
 
 
-def create_github_integration_agent() -> DeepAgent:
-    """Create GitHub Integration agent for repository management with LLM-driven tool decisions."""
-    return DeepAgent(
-        role="GitHub Integration Specialist",
-        objective="Create GitHub repository, push code files, and create pull request using best practices",
-        system_prompt="""You are a DevOps Engineer specializing in GitHub repository management.
+_GITHUB_INTEGRATION_PROMPT: Final[str] = """You are a DevOps Engineer specializing in GitHub repository management.
 
 YOUR TASK:
 1. Create a GitHub repository (if repository already exists, note it and continue)
@@ -801,18 +1173,121 @@ CRITICAL NOTES:
 - Handle errors gracefully - if repo exists or branch exists, continue with next steps
 - Always report the repository URL and PR URL in your final output
 - Use GitHub MCP tools to accomplish tasks - don't describe, just do it!
-""",
-        tools=get_all_tools(),  # Has access to all GitHub MCP tools
+"""
+
+
+@_cached_agent
+def create_github_integration_agent() -> DeepAgent:
+    """Create GitHub Integration agent for repository management with LLM-driven tool decisions."""
+    tools, tool_schemas = get_agent_tools("github")
+    return DeepAgent(
+        role="GitHub Integration Specialist",
+        objective="Create GitHub repository, push code files, and create pull request using best practices",
+        system_prompt=_GITHUB_INTEGRATION_PROMPT,
+        model_name=get_agent_model("github"),
+        tools=tools,  # Has access to all GitHub MCP tools
+        tool_schemas=tool_schemas,
         max_iterations=5,
         confidence_threshold=ConfidenceLevel.LOW,
         enable_spawning=False,
     )
 
 
+# Reuse of LLM results across identical tasks. Opt-in with SDLC_LLM_CACHE=1 (as in
+# the agentic graph): LLM output is not deterministic, and a retry may be meant
+# to get a different answer.
+LLM_CACHE_ENABLED = os.getenv("SDLC_LLM_CACHE", "").lower() in ("1", "true")
+
+# Recent agent.execute results by (role, prompt, normalized task)
+_EXECUTE_CACHE_TTL = float(os.getenv("AGENT_RESULT_CACHE_TTL", "3600"))
+_EXECUTE_CACHE_MAX = 64
+_execute_cache: dict[str, tuple[float, dict]] = {}
+
+
+# Built task prompts and direct LLM outputs by _content_key of their inputs
+_task_cache: dict[bytes, str] = {}
+_code_cache: dict[bytes, tuple[float, str]] = {}
+
+
+def _bounded_put(cache: dict, key, value) -> None:
+    """Insert into a cache, evicting the oldest entry once it holds _EXECUTE_CACHE_MAX."""
+    if key not in cache and len(cache) >= _EXECUTE_CACHE_MAX:
+        cache.pop(next(iter(cache)))
+    cache[key] = value
+
+
+def _content_key(*parts: str) -> bytes:
+    """16-byte BLAKE2b digest of the given (possibly large) text blobs."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.digest()
+
+
+def _normalize_task(task: str) -> str:
+    """Case- and whitespace-insensitive form of a task."""
+    return " ".join(task.lower().split())
+
+
+def _token_writer(role: str):
+    """Callback streaming an agent's LLM output as custom stream events, or None outside a graph run.
+    
+    Clients following stream_mode="custom" receive {"agent", "content_delta"}
+    events while the agent node is still running.
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return None
+    return lambda text: writer({"agent": role, "content_delta": text})
+
+
+async def cached_execute(agent: DeepAgent, task: str) -> dict:
+    """agent.execute(task), reusing a recent result for the same agent and task.
+    
+    Only with SDLC_LLM_CACHE on, and only agents without tools are cached: MCP tool calls (creating work items,
+    pushing code) must run every time. Results where the agent asked for
+    approval are not cached, so a revise always regenerates.
+    """
+    agent.on_token = _token_writer(agent.role)
+    if agent.tools or not LLM_CACHE_ENABLED:
+        return await agent.execute(task)
+    
+    key = hashlib.sha256(f"{agent.role}\0{agent.objective}\0{_normalize_task(task)}".encode()).hexdigest()
+    cached = _execute_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        logger.info(f"[{agent.role}] Reusing cached result for an identical task")
+        return dict(cached[1])
+    
+    result = await agent.execute(task)
+    if result.get("status") == "completed" and result.get("decision", {}).get("type") != "request_approval":
+        _bounded_put(_execute_cache, key, (time.monotonic() + _EXECUTE_CACHE_TTL, result))
+    return result
+
+
 # ============================================================================
 # GRAPH NODES
 # ============================================================================
 
+def _needs_approval(agent: DeepAgent, decision_type: str, confidence: str) -> bool:
+    """True if the agent asked for approval without reaching its confidence threshold.
+    
+    An approval request at or above the threshold is auto-approved, skipping
+    the interrupt and its checkpoint round trip.
+    """
+    if decision_type != "request_approval":
+        return False
+    try:
+        level = ConfidenceLevel(confidence)
+    except ValueError:
+        return True
+    if level.rank >= agent.min_confidence_for_autonomy.rank:
+        logger.info(f"[{agent.role}] Auto-approving at {level.value} confidence")
+        return False
+    return True
+
+
 async def init_node(state: DeepPipelineState) -> dict:
     """Initialize the pipeline and connect to MCP clients."""
     project_name = state.get("project_name", "new-project")
@@ -820,22 +1295,22 @@ async def init_node(state: DeepPipelineState) -> dict:
     
     # Initialize and connect MCP clients
     logger.info("Initializing MCP clients...")
-    await _initialize_clients()
     
-    # Load tools after clients are connected
+    # Connects the clients, then loads their tools
     tools = await get_all_tools_async()
     tool_count = len(tools)
     
-    # Get client status
+    # Get client status; a client that failed to connect is reported as down
     ado = get_ado_client()
     github = get_github_client()
     mermaid = get_mermaid_client()
     
     clients_status = {
-        "ado": ado is not None and len(ado.get_tools()) > 0 if ado else False,
-        "github": github is not None and len(github.get_tools()) > 0 if github else False,
-        "mermaid": mermaid is not None,
+        "ado": ado is not None and not _client_errors.get("ado") and bool(_client_tools(ado)),
+        "github": github is not None and not _client_errors.get("github") and bool(_client_tools(github)),
+        "mermaid": mermaid is not None and not _client_errors.get("mermaid"),
     }
+    connection_errors = {name: error for name, error in _client_errors.items() if error}
     
     logger.info(f"MCP clients initialized. Tools available: {tool_count}")
     logger.info(f"Client status: ADO={clients_status['ado']}, GitHub={clients_status['github']}, Mermaid={clients_status['mermaid']}")
@@ -847,6 +1322,7 @@ async def init_node(state: DeepPipelineState) -> dict:
             "content": f"🚀 Initializing SDLC Pipeline for: {project_name}",
             "mcp_tools": tool_count,
             "clients": clients_status,
+            "client_errors": connection_errors,
         }],
         "errors": [],
         # Explicitly clear all pipeline outputs from previous runs
@@ -859,52 +1335,55 @@ async def init_node(state: DeepPipelineState) -> dict:
         "code_artifacts": None,
         "pipeline_complete": False,
         "requires_approval": False,
-        "consecutive_failures": {},  # Initialize failure tracking
+        "consecutive_failures": None,  # Reset failure tracking
     }
 
 
+# Completion bit per stage, keyed by the state field that marks it done
+# (test plan by its completion flag, the others by being set)
+_STAGE_BITS = {
+    "requirements": 1,
+    "work_items": 2,
+    "test_plan_complete": 4,
+    "architecture": 8,
+    "code_artifacts": 16,
+}
+
+
+def _next_stage(mask: int) -> tuple[str, str]:
+    """Next agent and reasoning for a completion mask.
+
+    Full flow: requirements → work_items → (test_plan ∥ architecture) → development → complete
+    """
+    if not mask & 1:
+        return "requirements", "Starting with requirements gathering"
+    if not mask & 2:
+        return "work_items", "Requirements done, creating work items in ADO"
+    if not mask & 12:
+        return "plan_and_architecture", "Work items created, creating ADO test cases and designing architecture in parallel"
+    if not mask & 4:
+        return "test_plan", "Work items created, now creating ADO test plan and test cases"
+    if not mask & 8:
+        return "architecture", "Test plan created, moving to architecture design"
+    if not mask & 16:
+        return "development", "Architecture done, moving to code generation and GitHub push"
+    return "complete", "All pipeline stages completed successfully"
+
+
+# Decision for every completion mask, so routing is a single lookup
+_NEXT_STAGE = tuple(_next_stage(mask) for mask in range(32))
+
+
 async def orchestrator_node(state: DeepPipelineState) -> dict:
     """Orchestrator decides the pipeline flow using deterministic logic."""
+    mask = 0
+    for field, bit in _STAGE_BITS.items():
+        value = state.get(field)
+        if value is not None and value is not False:
+            mask |= bit
+    logger.info(f"🔍 Orchestrator State Check: completed stages mask {mask:05b}")
     
-    user_query = state.get("user_query", "")
-    
-    # Check what's already completed
-    has_requirements = state.get("requirements") is not None
-    has_work_items = state.get("work_items") is not None
-    has_architecture = state.get("architecture") is not None
-    has_code = state.get("code_artifacts") is not None
-    
-
-    # Check if test plan is complete (only check the completion flag)
-    has_test_plan = state.get("test_plan_complete", False)
-
-    # DEBUG: Log current state flags
-    logger.info(f"🔍 Orchestrator State Check:")
-    logger.info(f"  has_requirements: {has_requirements}")
-    logger.info(f"  has_work_items: {has_work_items}")
-    logger.info(f"  has_test_plan: {has_test_plan}")
-    logger.info(f"  has_architecture: {has_architecture}")
-    logger.info(f"  has_code: {has_code}")
-
-    # Full flow: requirements → work_items → test_plan → architecture → development → complete
-    if not has_requirements:
-        next_agent = "requirements"
-        reasoning = "Starting with requirements gathering"
-    elif not has_work_items:
-        next_agent = "work_items"
-        reasoning = "Requirements done, creating work items in ADO"
-    elif not has_test_plan:
-        next_agent = "test_plan"
-        reasoning = "Work items created, now creating ADO test plan and test cases"
-    elif not has_architecture:
-        next_agent = "architecture"
-        reasoning = "Test plan created, moving to architecture design"
-    elif not has_code:
-        next_agent = "development"
-        reasoning = "Architecture done, moving to code generation and GitHub push"
-    else:
-        next_agent = "complete"
-        reasoning = "All pipeline stages completed successfully"
+    next_agent, reasoning = _NEXT_STAGE[mask]
     
     logger.info(f"🎯 Orchestrator decision: {next_agent} - {reasoning}")
     
@@ -938,7 +1417,7 @@ async def requirements_agent_node(state: DeepPipelineState) -> dict:
     task = f"Generate comprehensive requirements for: {user_query}"
     
     try:
-        result = await agent.execute(task)
+        result = await cached_execute(agent, task)
         
         # Parse requirements from output - result is a dict
         output = result.get("output", "")
@@ -955,7 +1434,7 @@ async def requirements_agent_node(state: DeepPipelineState) -> dict:
             tool_result = tool_call.get("result", {})
             
             if isinstance(tool_result, dict):
-                if "text" in tool_result and "error" in tool_result["text"].lower():
+                if _is_error_result(tool_result):
                     logger.error(f"❌ MCP TOOL ERROR in requirements_agent: {tool_name}")
                     logger.error(f"   Error: {tool_result['text'][:200]}")
                     logger.error(f"   Args: {tool_call.get('args', {})}")
@@ -976,7 +1455,7 @@ async def requirements_agent_node(state: DeepPipelineState) -> dict:
         }
         
         # Human-in-the-loop: Request approval if agent decides it needs review
-        requires_approval = decision_type == "request_approval"
+        requires_approval = _needs_approval(agent, decision_type, confidence)
         
         return {
             "requirements": requirements,
@@ -996,20 +1475,11 @@ async def requirements_agent_node(state: DeepPipelineState) -> dict:
             }],
         }
     except Exception as e:
-        logger.error(f"❌ EXCEPTION in requirements_agent_node: {e}")
-        logger.error(f"   Exception type: {type(e).__name__}")
-        
-        # Log full traceback
-        import traceback
-        logger.error("   Full traceback:")
-        for line in traceback.format_exc().split('\n'):
-            if line.strip():
-                logger.error(f"   {line}")
+        logger.error(f"❌ EXCEPTION in requirements_agent_node: {e}", exc_info=True)
         
         return {
             "errors": [f"Requirements error: {str(e)}"],
             "exception_type": type(e).__name__,
-            "traceback": traceback.format_exc(),
             "requirements": {
                 "description": f"Failed: {str(e)}",
                 "confidence": "low",
@@ -1017,6 +1487,84 @@ async def requirements_agent_node(state: DeepPipelineState) -> dict:
         }
 
 
+# "id": 1234 in ADO work item JSON returned as tool result text
+_WI_ID_RE = re.compile(r'"id":\s*(\d+)')
+
+
+def _created_work_item_id(result) -> int | None:
+    """Id from a work item create result: REST $batch returns the item, the MCP fallback its text."""
+    if not isinstance(result, dict):
+        return None
+    if result.get("id"):
+        return result["id"]
+    id_match = _WI_ID_RE.search(str(result.get("text", "")))
+    return int(id_match.group(1)) if id_match else None
+
+# Work item references in agent output: full and short edit URLs, "work item ... /edit/N", "ID: N"
+_WI_OUTPUT_ID_RES = (
+    re.compile(r'https://dev\.azure\.com/appatr/testingmcp/_workitems/edit/(\d+)'),
+    re.compile(r'/edit/(\d+)'),
+    re.compile(r'work item.*?/edit/(\d+)', re.IGNORECASE),
+    re.compile(r'\bID:?\s*(\d{3,})\b', re.IGNORECASE),
+)
+
+
+def extract_work_item_ids(tool_calls: list[dict]) -> list[int]:
+    """IDs of work items created by the recorded tool calls, in creation order without duplicates."""
+    created_ids = []
+    seen_ids = set()
+    
+    def add(wi_id) -> bool:
+        if not wi_id or wi_id in seen_ids:
+            return False
+        created_ids.append(wi_id)
+        seen_ids.add(wi_id)
+        return True
+    
+    for tool_call in tool_calls:
+        tool_name = tool_call.get("tool", "")
+        result = tool_call.get("result", {})
+        if tool_name == "ado_wit_batch_create_work_items":
+            try:
+                batch = json.loads(result.get("text", ""))
+            except (json.JSONDecodeError, TypeError, AttributeError):
+                batch = []
+            for item in batch if isinstance(batch, list) else []:
+                add(_created_work_item_id(item))
+            logger.info(f"   ✅ Extracted {len(created_ids)} work item IDs from batch create")
+            continue
+        # Match both with and without mcp_ prefix
+        if "wit_create_work_item" not in tool_name or not isinstance(result, dict):
+            continue
+        
+        # Method 1: Parse JSON from text field (ADO MCP returns full JSON in text)
+        if "text" in result:
+            text = result["text"]
+            try:
+                json_data = json.loads(text)
+                if isinstance(json_data, dict) and "id" in json_data:
+                    if add(int(json_data["id"])):
+                        logger.info(f"   ✅ Extracted work item ID {created_ids[-1]} from JSON response")
+                        continue
+            except (json.JSONDecodeError, ValueError, TypeError):
+                pass
+            
+            # Fallback: regex search for "id": 1234 pattern
+            id_match = _WI_ID_RE.search(text)
+            if id_match and add(int(id_match.group(1))):
+                logger.info(f"   ✅ Parsed work item ID {created_ids[-1]} from tool result text")
+        
+        # Method 2: Direct ID in result dict (fallback)
+        elif "id" in result and add(result["id"]):
+            logger.info(f"   ✅ Extracted work item ID {created_ids[-1]} from tool result")
+    return created_ids
+
+
+def parse_work_item_ids(output: str) -> list[int]:
+    """Work item IDs referenced in agent output, sorted; last resort when tool results have none."""
+    return sorted({int(m) for rx in _WI_OUTPUT_ID_RES for m in rx.findall(output or "")})
+
+
 async def work_items_agent_node(state: DeepPipelineState) -> dict:
     """Work items agent creates epics and user stories in Azure DevOps."""
     agent = create_work_items_agent()
@@ -1036,13 +1584,12 @@ USER REQUEST:
 
 ⚠️ CRITICAL INSTRUCTIONS:
 
-1. CREATE 7-10 WORK ITEMS using ado_wit_create_work_item tool
+1. CREATE 7-10 WORK ITEMS with ONE ado_wit_batch_create_work_items call (project: "testingmcp")
 2. Each work item MUST include ALL required fields:
-   - project: "testingmcp"
    - title: SPECIFIC, DETAILED title (not generic)
    - workItemType: "Epic" or "Issue"
    - description: DETAILED description with acceptance criteria
-   - tags: relevant tags (e.g., "frontend", "backend", "security")
+   - parentIndex (Issues only): 0-based position of the Issue's Epic in work_items
 
 3. WORK ITEM CATEGORIES TO CREATE:
 
@@ -1089,14 +1636,14 @@ ISSUES/STORIES (create 6-8 specific features):
 - Use ACTUAL project context from requirements
 - Make titles SPECIFIC (not generic like "Create API")
 - Include technical details in descriptions
-- Call ado_wit_create_work_item for EACH work item (7-10 times)
+- Call ado_wit_batch_create_work_items ONCE with all 7-10 work items
 - Use proper work item types: "Epic" for high-level, "Issue" for specific tasks
 
 START CREATING NOW!
 """
     
     try:
-        result = await agent.execute(task)
+        result = await cached_execute(agent, task)
         
         # Parse work items from output - result is a dict
         output = result.get("output", "")
@@ -1114,7 +1661,7 @@ START CREATING NOW!
             tool_result = tool_call.get("result", {})
             
             if isinstance(tool_result, dict):
-                if "text" in tool_result and "error" in tool_result["text"].lower():
+                if _is_error_result(tool_result):
                     logger.error(f"❌ MCP TOOL ERROR in work_items_agent: {tool_name}")
                     logger.error(f"   Error: {tool_result['text'][:200]}")
                     logger.error(f"   Args: {tool_call.get('args', {})}")
@@ -1127,47 +1674,9 @@ START CREATING NOW!
         # Extract work item IDs from tool call results (more reliable than parsing output text)
         created_ids = []
         try:
-            import os
-            import re
-            import json
-            
             # FIRST: Extract IDs from successful tool call results
-            for tool_call in tool_calls:
-                tool_name = tool_call.get("tool", "")
-                # Match both with and without mcp_ prefix
-                if "wit_create_work_item" in tool_name or tool_name == "ado_wit_create_work_item":
-                    result = tool_call.get("result", {})
-                    
-                    # Method 1: Parse JSON from text field (ADO MCP returns full JSON in text)
-                    if isinstance(result, dict) and "text" in result:
-                        text = result["text"]
-                        try:
-                            # Try to parse as complete JSON object
-                            json_data = json.loads(text)
-                            if "id" in json_data:
-                                wi_id = int(json_data["id"])
-                                if wi_id not in created_ids:
-                                    created_ids.append(wi_id)
-                                    logger.info(f"   ✅ Extracted work item ID {wi_id} from JSON response")
-                                    continue
-                        except (json.JSONDecodeError, ValueError, KeyError):
-                            pass
-                        
-                        # Fallback: regex search for "id": 1234 pattern
-                        id_match = re.search(r'"id":\s*(\d+)', text)
-                        if id_match:
-                            wi_id = int(id_match.group(1))
-                            if wi_id not in created_ids:
-                                created_ids.append(wi_id)
-                                logger.info(f"   ✅ Parsed work item ID {wi_id} from tool result text")
-                                continue
-                    
-                    # Method 2: Direct ID in result dict (fallback)
-                    elif isinstance(result, dict) and "id" in result:
-                        wi_id = result["id"]
-                        if wi_id not in created_ids:
-                            created_ids.append(wi_id)
-                            logger.info(f"   ✅ Extracted work item ID {wi_id} from tool result")
+            created_ids = extract_work_item_ids(tool_calls)
+            seen_ids = set(created_ids)
             
             # SECOND: If still no IDs, query ADO directly for recently created work items
             if not created_ids:
@@ -1176,7 +1685,6 @@ START CREATING NOW!
                 try:
                     # Query for work items created in last 5 minutes
                     from src.mcp_client.ado_client import ado_client_instance
-                    from datetime import datetime, timedelta
                     
                     cutoff_time = (datetime.utcnow() - timedelta(minutes=5)).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
                     
@@ -1198,8 +1706,9 @@ START CREATING NOW!
                         work_items = query_result.get("workItems", [])
                         for wi in work_items[:20]:  # Limit to last 20 items
                             wi_id = wi.get("id")
-                            if wi_id and wi_id not in created_ids:
+                            if wi_id and wi_id not in seen_ids:
                                 created_ids.append(wi_id)
+                                seen_ids.add(wi_id)
                                 logger.info(f"   ✅ Found work item ID {wi_id} from WIQL query")
                     
                     if created_ids:
@@ -1211,30 +1720,9 @@ START CREATING NOW!
             if not created_ids:
                 logger.warning("⚠️  Falling back to parsing LLM output...")
                 
-                # Pattern 1: Full URL format (from guardrails)
-                url_pattern = r'https://dev\.azure\.com/appatr/testingmcp/_workitems/edit/(\d+)'
-                url_matches = re.findall(url_pattern, output)
-                
-                # Pattern 2: Short URL format /edit/1234
-                short_pattern = r'/edit/(\d+)'
-                short_matches = re.findall(short_pattern, output)
-                
-                # Pattern 3: "work item: [URL]" format
-                wi_pattern = r'work item.*?/edit/(\d+)'
-                wi_matches = re.findall(wi_pattern, output, re.IGNORECASE)
-                
-                # Pattern 4: Direct ID mentions "ID 1234" or "ID: 1234"
-                id_pattern = r'\bID:?\s*(\d{3,})\b'
-                id_matches = re.findall(id_pattern, output, re.IGNORECASE)
-                
-                # Combine all matches
-                all_matches = url_matches + short_matches + wi_matches + id_matches
-                created_ids = list(set([int(id_str) for id_str in all_matches]))  # Remove duplicates
-                created_ids.sort()  # Sort for consistency
-                
+                created_ids = parse_work_item_ids(output)
                 if created_ids:
                     logger.info(f"   ✅ Parsed {len(created_ids)} work item IDs from LLM output using guardrail patterns")
-                    logger.info(f"      Breakdown: {len(url_matches)} URL, {len(short_matches)} short, {len(wi_matches)} WI, {len(id_matches)} ID patterns")
             
             if created_ids:
                 logger.info(f"📋 Work Items Agent: Found {len(created_ids)} work item IDs")
@@ -1258,12 +1746,7 @@ START CREATING NOW!
                     logger.error(f"   #{i+1}: {tc.get('tool_name')} -> {str(tc.get('result'))[:200]}")
                 
         except Exception as parse_error:
-            logger.error(f"❌ Exception parsing work item IDs: {parse_error}")
-            import traceback
-            logger.error("   Traceback:")
-            for line in traceback.format_exc().split('\n'):
-                if line.strip():
-                    logger.error(f"   {line}")
+            logger.error(f"❌ Exception parsing work item IDs: {parse_error}", exc_info=True)
         
         work_items = {
             "description": output,
@@ -1274,7 +1757,7 @@ START CREATING NOW!
             "failed_tool_calls": failed_tool_calls,
         }
         
-        requires_approval = decision_type == "request_approval"
+        requires_approval = _needs_approval(agent, decision_type, confidence)
         
         # Check if tools were actually called
         if tool_calls_made == 0:
@@ -1302,7 +1785,7 @@ START CREATING NOW!
             "work_items": work_items,
             "requires_approval": requires_approval,
             "approval_reason": output if requires_approval else None,
-            "consecutive_failures": {},  # Reset failures on success
+            "consecutive_failures": {"work_items": 0},  # Reset failures on success
             "messages": [{
                 "role": "business_analyst",
                 "content": f"📊 Work items created (tool calls: {tool_calls_made})",
@@ -1316,24 +1799,14 @@ START CREATING NOW!
             }],
         }
     except Exception as e:
-        logger.error(f"❌ EXCEPTION in work_items_agent_node: {e}")
-        logger.error(f"   Exception type: {type(e).__name__}")
-        
-        # Log full traceback
-        import traceback
-        logger.error("   Full traceback:")
-        for line in traceback.format_exc().split('\n'):
-            if line.strip():
-                logger.error(f"   {line}")
+        logger.error(f"❌ EXCEPTION in work_items_agent_node: {e}", exc_info=True)
         
-        consecutive_failures = state.get("consecutive_failures", {})
-        consecutive_failures["work_items"] = consecutive_failures.get("work_items", 0) + 1
+        failures = (state.get("consecutive_failures") or {}).get("work_items", 0) + 1
         
         return {
             "errors": [f"Work items error: {str(e)}"],
-            "consecutive_failures": consecutive_failures,
+            "consecutive_failures": {"work_items": failures},
             "exception_type": type(e).__name__,
-            "traceback": traceback.format_exc(),
             "work_items": {
                 "created_ids": [],  # Ensure downstream nodes don't fail
                 "description": f"Failed: {str(e)}",
@@ -1341,6 +1814,56 @@ START CREATING NOW!
         }
 
 
+async def _add_test_cases_to_suite(ado_client, project, test_plan_id, test_suite_id, test_case_ids) -> list[dict]:
+    """Add all created test cases to the suite in one call; returns failed tool calls."""
+    if not test_case_ids:
+        return []
+    logger.info(f"      Adding {len(test_case_ids)} test cases to suite {test_suite_id}...")
+    try:
+        result = await ado_client.call_tool('testplan_add_test_cases_to_suite', {
+            'project': project,
+            'planId': test_plan_id,
+            'suiteId': test_suite_id,
+            'testCaseIds': ",".join(map(str, test_case_ids)),  # MUST be string!
+        }, timeout=60)
+    except Exception as e:
+        result = {"error": True, "text": str(e)}
+    
+    if isinstance(result, dict) and "error" in result:
+        logger.error(f"      ❌ Failed to add to suite: {result.get('text', 'Unknown error')}")
+        return [{
+            "tool": "testplan_add_test_cases_to_suite",
+            "error": result.get("text"),
+            "args": {"test_case_ids": test_case_ids},
+        }]
+    logger.info(f"      ✅ Added to suite {test_suite_id}")
+    return []
+
+
+# Test cases created at once by the direct fallback
+_DIRECT_TEST_CASE_CONCURRENCY = 5
+
+# Direct-fallback test title prefixes, first match wins; plain substring
+# matches on the lowercased work item title
+_TEST_TITLE_CATEGORIES = [
+    (re.compile(r"api|rest"), "API Functional Test"),
+    (re.compile(r"database|schema"), "Data Validation Test"),
+    (re.compile(r"auth|security|oauth"), "Security & Authentication Test"),
+    (re.compile(r"ui|dashboard|react|client"), "UI/UX Functional Test"),
+    (re.compile(r"integration|kyc|external"), "Integration Test"),
+    (re.compile(r"devops|pipeline|ci/cd"), "DevOps & Deployment Test"),
+    (re.compile(r"azure|cloud"), "Cloud Infrastructure Test"),
+]
+
+
+def _test_title_prefix(wi_type: str, wi_title: str) -> str:
+    """Pick the test title prefix for a work item from its type and title."""
+    if wi_type == "Epic":
+        return "End-to-End Integration Test"
+    title = wi_title.lower()
+    return next((prefix for rx, prefix in _TEST_TITLE_CATEGORIES if rx.search(title)), "Functional Test")
+
+
 async def _create_test_cases_directly(ado_client, work_items_details, project, test_plan_id, test_suite_id):
     """Direct fallback to create test cases when Deep Agent fails to call tools.
     
@@ -1348,138 +1871,150 @@ async def _create_test_cases_directly(ado_client, work_items_details, project, t
     """
     logger.warning("🔧 DIRECT TEST CASE CREATION (Fallback Mode)")
     
-    created_cases = []
-    failed_tool_calls = []
+    # Work items are independent: each one's create call runs concurrently,
+    # bounded so ADO is not flooded; suite membership is added in one call after
+    sem = asyncio.Semaphore(_DIRECT_TEST_CASE_CONCURRENCY)
     
-    for idx, wi in enumerate(work_items_details, 1):
-        wi_id = wi.get("id")
-        wi_title = wi.get("title", "").strip()
-        wi_desc = wi.get("description", "").strip()
-        wi_type = wi.get("work_item_type", "Feature")
-        wi_ac = wi.get("acceptance_criteria", "").strip()
+    async def create_one(idx: int, wi: dict) -> tuple[dict | None, dict | None]:
+        """Create one test case; returns (created case, failed call)."""
+        async with sem:
+            wi_id = wi.get("id")
+            wi_title = wi.get("title", "").strip()
+            wi_desc = wi.get("description", "").strip()
+            wi_type = wi.get("work_item_type", "Feature")
+            wi_ac = wi.get("acceptance_criteria", "").strip()
         
-        # Skip if this looks like it's already a test case
-        if wi_type == "Test Case" or wi_title.lower().startswith("test:"):
-            logger.warning(f"  [{idx}/{len(work_items_details)}] Skipping WI {wi_id} - appears to be a test case already")
-            continue
+            # Skip if this looks like it's already a test case
+            if wi_type == "Test Case" or wi_title.lower().startswith("test:"):
+                logger.warning(f"  [{idx}/{len(work_items_details)}] Skipping WI {wi_id} - appears to be a test case already")
+                return None, None
         
-        # If title is empty, skip
-        if not wi_title:
-            logger.error(f"  [{idx}/{len(work_items_details)}] Skipping WI {wi_id} - no title found")
-            continue
+            # If title is empty, skip
+            if not wi_title:
+                logger.error(f"  [{idx}/{len(work_items_details)}] Skipping WI {wi_id} - no title found")
+                return None, None
         
-        logger.info(f"  [{idx}/{len(work_items_details)}] Creating test for WI {wi_id}: {wi_title}")
-        
-        # Create CONTEXTUALIZED test case title based on work item type and content
-        if wi_type == 'Epic':
-            test_title = f"End-to-End Integration Test: {wi_title}"
-        elif 'api' in wi_title.lower() or 'rest' in wi_title.lower():
-            test_title = f"API Functional Test: {wi_title}"
-        elif 'database' in wi_title.lower() or 'schema' in wi_title.lower():
-            test_title = f"Data Validation Test: {wi_title}"
-        elif 'auth' in wi_title.lower() or 'security' in wi_title.lower() or 'oauth' in wi_title.lower():
-            test_title = f"Security & Authentication Test: {wi_title}"
-        elif 'ui' in wi_title.lower() or 'dashboard' in wi_title.lower() or 'react' in wi_title.lower() or 'client' in wi_title.lower():
-            test_title = f"UI/UX Functional Test: {wi_title}"
-        elif 'integration' in wi_title.lower() or 'kyc' in wi_title.lower() or 'external' in wi_title.lower():
-            test_title = f"Integration Test: {wi_title}"
-        elif 'devops' in wi_title.lower() or 'pipeline' in wi_title.lower() or 'ci/cd' in wi_title.lower():
-            test_title = f"DevOps & Deployment Test: {wi_title}"
-        elif 'azure' in wi_title.lower() or 'cloud' in wi_title.lower():
-            test_title = f"Cloud Infrastructure Test: {wi_title}"
-        else:
-            test_title = f"Functional Test: {wi_title}"
+            logger.info(f"  [{idx}/{len(work_items_details)}] Creating test for WI {wi_id}: {wi_title}")
+        
+            # Create CONTEXTUALIZED test case title based on work item type and content
+            test_title = f"{_test_title_prefix(wi_type, wi_title)}: {wi_title}"
         
-        # Limit title length
-        if len(test_title) > 128:
-            test_title = test_title[:125] + "..."
+            # Limit title length
+            if len(test_title) > 128:
+                test_title = test_title[:125] + "..."
         
-        # Build DETAILED test steps from work item details
-        if wi_ac and len(wi_ac.strip()) > 10:
-            steps = f"""1. Prerequisite Setup|Review requirement: {wi_title}. Set up test environment and test data. Verify all dependencies are available.
+            # Build DETAILED test steps from work item details
+            if wi_ac and len(wi_ac.strip()) > 10:
+                steps = f"""1. Prerequisite Setup|Review requirement: {wi_title}. Set up test environment and test data. Verify all dependencies are available.
 2. Test Execution - Acceptance Criteria|Execute test scenarios: {wi_ac[:200]}
 3. Validation & Verification|Verify all acceptance criteria are met. Check for edge cases and error handling.
 4. Cleanup & Documentation|Clean up test data. Document test results and any issues found."""
-        elif wi_desc and len(wi_desc.strip()) > 10:
-            steps = f"""1. Test Preparation|Review specification: {wi_title}. Understand requirements: {wi_desc[:200]}. Prepare test environment.
+            elif wi_desc and len(wi_desc.strip()) > 10:
+                steps = f"""1. Test Preparation|Review specification: {wi_title}. Understand requirements: {wi_desc[:200]}. Prepare test environment.
 2. Execute Test Scenarios|Test primary functionality. Test error handling and edge cases. Verify integration points.
 3. Results Validation|Confirm functionality matches requirements. Verify data integrity. Check performance and security.
 4. Test Completion|Document test results. Report any defects found."""
-        else:
-            steps = f"""1. Test Setup|Review requirement: {wi_title}. Prepare test environment and data.
+            else:
+                steps = f"""1. Test Setup|Review requirement: {wi_title}. Prepare test environment and data.
 2. Test Execution|Execute primary test scenarios for {wi_type}. Test error handling. Verify expected behavior.
 3. Validation|Verify all functionality works as expected. Check integration points.
 4. Documentation|Document results and any issues."""
         
-        try:
-            # Create test case
-            logger.info(f"      Calling testplan_create_test_case...")
-            logger.info(f"      Title: {test_title}")
-            result = await ado_client.call_tool('testplan_create_test_case', {
-                'project': project,
-                'title': test_title,
-                'steps': steps,
-                'priority': 2,
-                'tests_work_item_id': wi_id
-            }, timeout=60)
-            
-            # Check for error
-            if isinstance(result, dict) and "error" in result:
-                logger.error(f"      ❌ Failed to create test case: {result.get('text', 'Unknown error')}")
-                failed_tool_calls.append({
-                    "tool": "testplan_create_test_case",
-                    "error": result.get("text"),
-                    "args": {"wi_id": wi_id, "title": wi_title}
-                })
-                continue
-            
-            test_case_id = result.get("id")
-            if not test_case_id:
-                logger.error(f"      ❌ No test case ID returned: {result}")
-                continue
+            try:
+                # Create test case
+                logger.info(f"      Calling testplan_create_test_case...")
+                logger.info(f"      Title: {test_title}")
+                result = await ado_client.call_tool('testplan_create_test_case', {
+                    'project': project,
+                    'title': test_title,
+                    'steps': steps,
+                    'priority': 2,
+                    'tests_work_item_id': wi_id
+                }, timeout=60)
             
-            logger.info(f"      ✅ Created test case: {test_case_id}")
+                # Check for error
+                if isinstance(result, dict) and "error" in result:
+                    logger.error(f"      ❌ Failed to create test case: {result.get('text', 'Unknown error')}")
+                    return None, {
+                        "tool": "testplan_create_test_case",
+                        "error": result.get("text"),
+                        "args": {"wi_id": wi_id, "title": wi_title}
+                    }
             
-            # Add to suite
-            logger.info(f"      Adding to suite {test_suite_id}...")
-            result2 = await ado_client.call_tool('testplan_add_test_cases_to_suite', {
-                'project': project,
-                'planId': test_plan_id,
-                'suiteId': test_suite_id,
-                'testCaseIds': str(test_case_id)  # MUST be string!
-            }, timeout=60)
+                test_case_id = result.get("id")
+                if not test_case_id:
+                    logger.error(f"      ❌ No test case ID returned: {result}")
+                    return None, None
             
-            if isinstance(result2, dict) and "error" in result2:
-                logger.error(f"      ❌ Failed to add to suite: {result2.get('text', 'Unknown error')}")
-                failed_tool_calls.append({
-                    "tool": "testplan_add_test_cases_to_suite",
-                    "error": result2.get("text"),
-                    "args": {"test_case_id": test_case_id}
-                })
-            else:
-                logger.info(f"      ✅ Added to suite")
+                logger.info(f"      ✅ Created test case: {test_case_id}")
             
-            created_cases.append({
-                "test_case_id": test_case_id,
-                "title": test_title,
-                "plan_id": test_plan_id,
-                "suite_id": test_suite_id,
-                "result": "success",
-                "work_item_id": wi_id
-            })
+                return {
+                    "test_case_id": test_case_id,
+                    "title": test_title,
+                    "plan_id": test_plan_id,
+                    "suite_id": test_suite_id,
+                    "result": "success",
+                    "work_item_id": wi_id
+                }, None
             
-        except Exception as e:
-            logger.error(f"      ❌ Exception: {e}")
-            failed_tool_calls.append({
-                "tool": "direct_creation",
-                "error": str(e),
-                "args": {"wi_id": wi_id}
-            })
+            except Exception as e:
+                logger.error(f"      ❌ Exception: {e}")
+                return None, {
+                    "tool": "direct_creation",
+                    "error": str(e),
+                    "args": {"wi_id": wi_id}
+                }
+    
+    results = await asyncio.gather(*(create_one(idx, wi) for idx, wi in enumerate(work_items_details, 1)))
+    created_cases = [case for case, _ in results if case]
+    failed_tool_calls = [failure for _, failure in results if failure]
     
+    failed_tool_calls += await _add_test_cases_to_suite(
+        ado_client, project, test_plan_id, test_suite_id, [c["test_case_id"] for c in created_cases]
+    )
     logger.info(f"🔧 Direct creation complete: {len(created_cases)} created, {len(failed_tool_calls)} failed")
     return created_cases, failed_tool_calls
 
 
+# Work item detail requests in flight at once from the test plan node
+_WORK_ITEM_FETCH_CONCURRENCY = 10
+
+
+async def _fetch_work_item_details(ado_client, work_item_ids: list) -> list[dict]:
+    """Fetch work items concurrently, in order; test cases and failed fetches are skipped."""
+    sem = asyncio.Semaphore(_WORK_ITEM_FETCH_CONCURRENCY)
+    
+    async def fetch(wi_id):
+        async with sem:
+            return await ado_client.get_work_item(work_item_id=wi_id)
+    
+    results = await asyncio.gather(*(fetch(wi_id) for wi_id in work_item_ids), return_exceptions=True)
+    
+    work_items_details = []
+    for wi_id, wi_details in zip(work_item_ids, results):
+        if isinstance(wi_details, BaseException):
+            logger.error(f"   Failed to fetch WI {wi_id}: {wi_details}")
+            continue
+        fields = wi_details.get("fields", {})
+        
+        wi_type = fields.get("System.WorkItemType", "")
+        # Skip test cases
+        if wi_type == "Test Case":
+            continue
+        
+        wi_data = {
+            "id": wi_id,
+            "title": fields.get("System.Title", ""),
+            "description": fields.get("System.Description", ""),
+            "work_item_type": wi_type,
+            "acceptance_criteria": fields.get("Microsoft.VSTS.Common.AcceptanceCriteria", ""),
+        }
+        
+        logger.info(f"   WI {wi_id}: {wi_type} - {wi_data['title'][:50]}")
+        work_items_details.append(wi_data)
+    return work_items_details
+
+
 # --- NEW: Test Plan Agent Node ---
 async def test_plan_agent_node(state: DeepPipelineState) -> dict:
     """Test plan agent creates test cases using REST API + LLM.
@@ -1489,8 +2024,6 @@ async def test_plan_agent_node(state: DeepPipelineState) -> dict:
     - Uses LLM to generate contextualized test cases  
     - Creates via REST API (no Deep Agent)
     """
-    import os
-    
     logger.info("="*80)
     logger.info("🧪 TEST PLAN AGENT - STARTING")
     logger.info("="*80)
@@ -1511,7 +2044,6 @@ async def test_plan_agent_node(state: DeepPipelineState) -> dict:
     else:
         logger.error("  ❌ CRITICAL: 'work_items' NOT IN STATE!")
     logger.info("="*80)
-    from langchain_openai import ChatOpenAI
     
     logger.info("="*80)
     logger.info("🧪 TEST PLAN AGENT - Starting (REST API Mode)")
@@ -1545,35 +2077,20 @@ async def test_plan_agent_node(state: DeepPipelineState) -> dict:
         logger.info(f"   ✅ Found {len(created_ids)} work item IDs from work_items agent state")
         logger.info(f"   IDs: {created_ids}")
         
-        # Fetch details for each work item
-        for wi_id in created_ids:
-            try:
-                wi_details = await ado_client.get_work_item(work_item_id=wi_id)
-                fields = wi_details.get("fields", {})
-                
-                wi_type = fields.get("System.WorkItemType", "")
-                # Skip test cases
-                if wi_type == "Test Case":
-                    continue
-                
-                wi_data = {
-                    "id": wi_id,
-                    "title": fields.get("System.Title", ""),
-                    "description": fields.get("System.Description", ""),
-                    "work_item_type": wi_type,
-                    "acceptance_criteria": fields.get("Microsoft.VSTS.Common.AcceptanceCriteria", ""),
-                }
-                
-                logger.info(f"   WI {wi_id}: {wi_type} - {wi_data['title'][:50]}")
-                work_items_details.append(wi_data)
-            except Exception as e:
-                logger.error(f"   Failed to fetch WI {wi_id}: {e}")
+        work_items_details = await _fetch_work_item_details(ado_client, created_ids)
+        if not work_items_details:
+            # The work items agent did create items; a project-wide WIQL would only
+            # return unrelated ones, so don't fall back to it
+            logger.error("   ❌ Could not fetch any of the created work items")
+            return {
+                "test_plan_complete": True,
+                "test_cases": [],
+                "errors": [f"Test plan error: could not fetch created work items {created_ids}"],
+                "messages": [{"role": "qa_manager", "content": "❌ Could not fetch the created work items"}]
+            }
     else:
         # Fallback: Query ADO for ALL work items (excluding test cases)
         logger.warning("   ⚠️ No created_ids from work_items_agent, falling back to WIQL query...")
-    
-    # If no work items from created_ids, try WIQL query
-    if not work_items_details:
         try:
             query_result = await ado_client.call_tool('work_query_by_wiql', {
                 'project': project,
@@ -1584,30 +2101,10 @@ async def test_plan_agent_node(state: DeepPipelineState) -> dict:
                 work_items = query_result.get("workItems", [])
                 logger.info(f"   WIQL found {len(work_items)} work items")
                 
-                # Fetch details for each work item
-                for wi in work_items[:10]:  # Limit to 10 most recent
-                    wi_id = wi.get("id")
-                    try:
-                        wi_details = await ado_client.get_work_item(work_item_id=wi_id)
-                        fields = wi_details.get("fields", {})
-                        
-                        wi_type = fields.get("System.WorkItemType", "")
-                        # Skip test cases
-                        if wi_type == "Test Case":
-                            continue
-                        
-                        wi_data = {
-                            "id": wi_id,
-                            "title": fields.get("System.Title", ""),
-                            "description": fields.get("System.Description", ""),
-                            "work_item_type": wi_type,
-                            "acceptance_criteria": fields.get("Microsoft.VSTS.Common.AcceptanceCriteria", ""),
-                        }
-                        
-                        logger.info(f"   WI {wi_id}: {wi_type} - {wi_data['title'][:50]}")
-                        work_items_details.append(wi_data)
-                    except Exception as e:
-                        logger.error(f"   Failed to fetch WI {wi_id}: {e}")
+                # Limit to 10 most recent
+                work_items_details = await _fetch_work_item_details(
+                    ado_client, [wi.get("id") for wi in work_items[:10]]
+                )
             
             # If WIQL returns 0, we have no other way to get work items without hardcoded IDs
             if not work_items_details:
@@ -1659,33 +2156,33 @@ async def test_plan_agent_node(state: DeepPipelineState) -> dict:
     }
 
 
+# Test cases generated/created at once by the test plan node
+_TEST_CASE_CONCURRENCY = 8
+
+
 async def _create_test_cases_with_llm(ado_client, llm, work_items_details, project, test_plan_id, test_suite_id):
     """Use LLM to generate contextualized test cases and create them via REST API."""
-    import asyncio
+    # Work items are independent: generate and create their test cases
+    # concurrently, bounded so the LLM and ADO are not flooded
+    sem = asyncio.Semaphore(_TEST_CASE_CONCURRENCY)
     
-    created_cases = []
-    failed_tool_calls = []
-    
-    for idx, wi in enumerate(work_items_details, 1):
-        wi_id = wi.get("id")
-        wi_title = wi.get("title", "").strip()
-        wi_desc = wi.get("description", "").strip()
-        wi_type = wi.get("work_item_type", "Feature")
-        wi_ac = wi.get("acceptance_criteria", "").strip()
+    async def create_one(idx: int, wi: dict) -> tuple[dict | None, dict | None]:
+        """Generate and create one test case; returns (created case, failed call)."""
+        async with sem:
+            wi_id = wi.get("id")
+            wi_title = wi.get("title", "").strip()
+            wi_desc = wi.get("description", "").strip()
+            wi_type = wi.get("work_item_type", "Feature")
+            wi_ac = wi.get("acceptance_criteria", "").strip()
         
-        if not wi_title:
-            logger.error(f"  [{idx}/{len(work_items_details)}] Skipping WI {wi_id} - no title")
-            continue
+            if not wi_title:
+                logger.error(f"  [{idx}/{len(work_items_details)}] Skipping WI {wi_id} - no title")
+                return None, None
         
-        logger.info(f"  [{idx}/{len(work_items_details)}] Generating test for WI {wi_id}: {wi_title}")
+            logger.info(f"  [{idx}/{len(work_items_details)}] Generating test for WI {wi_id}: {wi_title}")
         
-        # Rate limiting: Add 2-second delay between LLM calls to avoid rate limits
-        if idx > 1:
-            logger.info(f"      ⏱️  Waiting 2 seconds to avoid rate limits...")
-            await asyncio.sleep(2)
-        
-        # Use LLM to generate contextualized test case
-        prompt = f"""You are a QA engineer creating a comprehensive test case for this work item:
+            # Use LLM to generate contextualized test case
+            prompt = f"""You are a QA engineer creating a comprehensive test case for this work item:
 
 WORK ITEM DETAILS:
 Type: {wi_type}
@@ -1722,115 +2219,99 @@ TEST_STEPS:
 
 Generate the test case now:"""
 
-        try:
-            # Call LLM with async
-            response = await llm.ainvoke(prompt)
-            llm_content = response.content
+            try:
+                # Call LLM with async
+                response = await llm.ainvoke(prompt)
+                llm_content = response.content
             
-            # Parse LLM response
-            test_title = ""
-            test_steps = ""
+                # Parse LLM response
+                test_title = ""
+                test_steps = ""
             
-            lines = llm_content.split("\n")
-            in_steps = False
-            steps_lines = []
+                lines = llm_content.split("\n")
+                in_steps = False
+                steps_lines = []
             
-            for line in lines:
-                if line.startswith("TEST_TITLE:"):
-                    test_title = line.replace("TEST_TITLE:", "").strip()
-                elif line.startswith("TEST_STEPS:"):
-                    in_steps = True
-                elif in_steps and line.strip():
-                    steps_lines.append(line.strip())
+                for line in lines:
+                    if line.startswith("TEST_TITLE:"):
+                        test_title = line.replace("TEST_TITLE:", "").strip()
+                    elif line.startswith("TEST_STEPS:"):
+                        in_steps = True
+                    elif in_steps and line.strip():
+                        steps_lines.append(line.strip())
             
-            test_steps = "\n".join(steps_lines)
+                test_steps = "\n".join(steps_lines)
             
-            # Fallback if parsing failed
-            if not test_title:
-                test_title = f"Test: {wi_title}"
-            if not test_steps:
-                test_steps = f"1. Setup test environment|Environment is ready\n2. Execute test for {wi_title}|Feature works as expected\n3. Validate results|All criteria met\n4. Document findings|Results recorded"
+                # Fallback if parsing failed
+                if not test_title:
+                    test_title = f"Test: {wi_title}"
+                if not test_steps:
+                    test_steps = f"1. Setup test environment|Environment is ready\n2. Execute test for {wi_title}|Feature works as expected\n3. Validate results|All criteria met\n4. Document findings|Results recorded"
             
-            # Limit title length
-            if len(test_title) > 128:
-                test_title = test_title[:125] + "..."
+                # Limit title length
+                if len(test_title) > 128:
+                    test_title = test_title[:125] + "..."
             
-            logger.info(f"      Title: {test_title}")
-            logger.info(f"      Steps preview: {test_steps[:100]}...")
-            logger.info(f"      Creating test case via ADO REST API...")
+                logger.info(f"      Title: {test_title}")
+                logger.info(f"      Steps preview: {test_steps[:100]}...")
+                logger.info(f"      Creating test case via ADO REST API...")
             
-            # Create test case via REST API
-            result = await ado_client.call_tool('testplan_create_test_case', {
-                'project': project,
-                'title': test_title,
-                'steps': test_steps,
-                'priority': 2,
-                'tests_work_item_id': wi_id
-            }, timeout=60)
+                # Create test case via REST API
+                result = await ado_client.call_tool('testplan_create_test_case', {
+                    'project': project,
+                    'title': test_title,
+                    'steps': test_steps,
+                    'priority': 2,
+                    'tests_work_item_id': wi_id
+                }, timeout=60)
             
-            logger.info(f"      🔍 ADO result type: {type(result)}")
-            logger.info(f"      🔍 ADO result: {str(result)[:200]}...")
+                logger.info(f"      🔍 ADO result type: {type(result)}")
+                logger.info(f"      🔍 ADO result: {str(result)[:200]}...")
             
-            if isinstance(result, dict) and "error" in result:
-                logger.error(f"      ❌ Failed: {result.get('text', 'Unknown error')}")
-                failed_tool_calls.append({
-                    "tool": "testplan_create_test_case",
-                    "error": result.get("text"),
-                    "args": {"wi_id": wi_id}
-                })
-                continue
+                if isinstance(result, dict) and "error" in result:
+                    logger.error(f"      ❌ Failed: {result.get('text', 'Unknown error')}")
+                    return None, {
+                        "tool": "testplan_create_test_case",
+                        "error": result.get("text"),
+                        "args": {"wi_id": wi_id}
+                    }
             
-            test_case_id = result.get("id")
-            if not test_case_id:
-                logger.error(f"      ❌ No test case ID returned")
-                continue
+                test_case_id = result.get("id")
+                if not test_case_id:
+                    logger.error(f"      ❌ No test case ID returned")
+                    return None, None
             
-            logger.info(f"      ✅ Created test case: {test_case_id}")
+                logger.info(f"      ✅ Created test case: {test_case_id}")
             
-            # Add to suite
-            result2 = await ado_client.call_tool('testplan_add_test_cases_to_suite', {
-                'project': project,
-                'planId': test_plan_id,
-                'suiteId': test_suite_id,
-                'testCaseIds': str(test_case_id)
-            }, timeout=60)
+                return {
+                    "test_case_id": test_case_id,
+                    "title": test_title,
+                    "plan_id": test_plan_id,
+                    "suite_id": test_suite_id,
+                    "work_item_id": wi_id
+                }, None
             
-            if isinstance(result2, dict) and "error" in result2:
-                logger.error(f"      ❌ Failed to add to suite: {result2.get('text')}")
-                failed_tool_calls.append({
-                    "tool": "testplan_add_test_cases_to_suite",
-                    "error": result2.get("text"),
-                    "args": {"test_case_id": test_case_id}
-                })
-            else:
-                logger.info(f"      ✅ Added to suite {test_suite_id}")
-            
-            created_cases.append({
-                "test_case_id": test_case_id,
-                "title": test_title,
-                "plan_id": test_plan_id,
-                "suite_id": test_suite_id,
-                "work_item_id": wi_id
-            })
-            
-        except Exception as e:
-            logger.error(f"      ❌ Exception: {e}")
-            failed_tool_calls.append({
-                "tool": "llm_or_api",
-                "error": str(e),
-                "args": {"wi_id": wi_id}
-            })
+            except Exception as e:
+                logger.error(f"      ❌ Exception: {e}")
+                return None, {
+                    "tool": "llm_or_api",
+                    "error": str(e),
+                    "args": {"wi_id": wi_id}
+                }
+    
+    results = await asyncio.gather(*(create_one(idx, wi) for idx, wi in enumerate(work_items_details, 1)))
+    created_cases = [case for case, _ in results if case]
+    failed_tool_calls = [failure for _, failure in results if failure]
     
+    failed_tool_calls += await _add_test_cases_to_suite(
+        ado_client, project, test_plan_id, test_suite_id, [c["test_case_id"] for c in created_cases]
+    )
     return created_cases, failed_tool_calls
 
 
 # --- Existing: Architecture Agent Node ---
 async def architecture_agent_node(state: DeepPipelineState) -> dict:
     """Architecture agent designs system architecture using Northern Trust standards."""
-    import asyncio
-    import os
-    from datetime import datetime
-    
     agent = create_architecture_agent()
     
     requirements = state.get("requirements", {})
@@ -1854,16 +2335,29 @@ async def architecture_agent_node(state: DeepPipelineState) -> dict:
         logger.warning(f"Could not load Northern Trust standards: {e}")
         standards_content = "Northern Trust Technical Standards not available"
     
-    task = f"""Design system architecture for:
+    # With plan_and_architecture the test cases are still being created
+    if state.get("test_plan_complete"):
+        test_cases_status = f"{len(test_cases)} test cases created in ADO"
+    else:
+        test_cases_status = "Being created in ADO in parallel"
+    
+    req_description = requirements.get('description', 'No requirements')
+    wi_description = work_items.get('description', 'No work items') if work_items else 'Skipped'
+    
+    # A revise with unchanged inputs reuses the built task
+    task_key = _content_key("architecture", req_description, wi_description, test_cases_status, standards_content)
+    task = _task_cache.get(task_key)
+    if task is None:
+        task = f"""Design system architecture for:
 
 Requirements:
-{requirements.get('description', 'No requirements')}
+{req_description}
 
 Work Items:
-{work_items.get('description', 'No work items') if work_items else 'Skipped'}
+{wi_description}
 
 Test Cases Created:
-{len(test_cases)} test cases created in ADO
+{test_cases_status}
 
 === NORTHERN TRUST TECHNICAL STANDARDS (MANDATORY) ===
 {standards_content}
@@ -1893,9 +2387,10 @@ Generate MARKDOWN documentation with:
 
 **IMPORTANT**: Use ONLY markdown formatting. DO NOT attempt to generate diagrams.
 """
+        _bounded_put(_task_cache, task_key, task)
     try:
         logger.info("🏗️ Starting architecture agent execution...")
-        result = await agent.execute(task)
+        result = await cached_execute(agent, task)
         logger.info("🏗️ Architecture agent execution completed")
         logger.info(f"🔍 ARCHITECTURE RESULT - Keys: {list(result.keys())}")
         logger.info(f"🔍 ARCHITECTURE RESULT - Type: {type(result)}")
@@ -1922,7 +2417,7 @@ Generate MARKDOWN documentation with:
             tool_result = tool_call.get("result", {})
             
             if isinstance(tool_result, dict):
-                if "text" in tool_result and "error" in tool_result["text"].lower():
+                if _is_error_result(tool_result):
                     logger.error(f"❌ MCP TOOL ERROR in architecture_agent: {tool_name}")
                     logger.error(f"   Error: {tool_result['text'][:200]}")
                     logger.error(f"   Args: {tool_call.get('args', {})}")
@@ -1969,7 +2464,6 @@ Generate MARKDOWN documentation with:
         # Extract and save Mermaid diagrams if present (async)
         saved_diagrams = []
         if "```mermaid" in output:
-            import re
             mermaid_blocks = re.findall(r'```mermaid\n(.*?)```', output, re.DOTALL)
             for idx, diagram in enumerate(mermaid_blocks, 1):
                 diagram_path = os.path.join(docs_dir, f"diagram_{project_name}_{timestamp}_{idx}.mmd")
@@ -1992,7 +2486,7 @@ Generate MARKDOWN documentation with:
             "failed_tool_calls": failed_tool_calls,
         }
         
-        requires_approval = decision_type == "request_approval"
+        requires_approval = _needs_approval(agent, decision_type, confidence)
         
         return {
             "architecture": architecture,
@@ -2015,20 +2509,11 @@ Generate MARKDOWN documentation with:
             }],
         }
     except Exception as e:
-        logger.error(f"❌ EXCEPTION in architecture_agent_node: {e}")
-        logger.error(f"   Exception type: {type(e).__name__}")
-        
-        # Log full traceback
-        import traceback
-        logger.error("   Full traceback:")
-        for line in traceback.format_exc().split('\n'):
-            if line.strip():
-                logger.error(f"   {line}")
+        logger.error(f"❌ EXCEPTION in architecture_agent_node: {e}", exc_info=True)
         
         return {
             "errors": [f"Architecture error: {str(e)}"],
             "exception_type": type(e).__name__,
-            "traceback": traceback.format_exc(),
             "architecture": {
                 "description": f"Failed: {str(e)}",
                 "confidence": "low",
@@ -2037,32 +2522,16 @@ Generate MARKDOWN documentation with:
         }
 
 
-async def developer_agent_node(state: DeepPipelineState) -> dict:
-    """Developer generates code in ONE direct LLM call (no agent loop)."""
-    import os
-    from langchain_openai import ChatOpenAI
-    from langchain_core.messages import HumanMessage, SystemMessage
-    
-    requirements = state.get("requirements", {})
-    architecture = state.get("architecture", {})
-    project_name = state.get("project_name", "new-project")
-    
-    # Extract full documentation
-    arch_description = architecture.get('description', 'No architecture available') if architecture else 'No architecture available'
-    req_description = requirements.get('description', 'No requirements available') if requirements else 'No requirements available'
-    
-    # Direct LLM call - NO AGENT LOOP, ONE SHOT
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
-    
-    prompt = f"""Generate production-ready code for: {project_name}
+_CODEGEN_SYSTEM_PROMPT: Final[str] = """You are a Senior Developer who generates REAL, WORKING code.
 
-ARCHITECTURE DOCUMENT (READ THIS CAREFULLY AND FOLLOW IT):
-{arch_description}
-
-REQUIREMENTS:
-{req_description}
+CRITICAL RULES:
+1. Generate ACTUAL, FUNCTIONAL code - not examples, not placeholders
+2. Follow the architecture document provided
+3. Include proper imports, error handling, and working logic
+4. Use the EXACT format: ### FILE: path \\n```language\\ncode\\n```
+5. NO Lorem Ipsum, NO "example here", NO "TODO" comments - REAL CODE ONLY"""
 
-INSTRUCTIONS:
+_CODEGEN_INSTRUCTIONS: Final[str] = """INSTRUCTIONS:
 1. Analyze the architecture document above and identify ALL components mentioned (frontend, backend, database, API, services, etc.)
 2. Generate a COMPLETE, COMPREHENSIVE implementation covering ALL architectural components
 3. Include ALL necessary files for each component:
@@ -2088,27 +2557,203 @@ CRITICAL OUTPUT FORMAT (follow exactly):
 ```
 
 DO NOT generate placeholder text, Lorem Ipsum, or TODO comments. Generate REAL, WORKING code that implements EVERY part of the architecture document!"""
+
+
+def _codegen_prompt(project_name: str, arch_description: str, req_description: str) -> str:
+    """Prompt for the single-shot code generation call.
     
-    try:
-        logger.info(f"💻 Generating code with single LLM call (no agent loop)")
-        
-        messages = [
-            SystemMessage(content="""You are a Senior Developer who generates REAL, WORKING code.
+    The multi-KB documents are joined once around the static instructions.
+    """
+    return "".join((
+        "Generate production-ready code for: ", project_name,
+        "\n\nARCHITECTURE DOCUMENT (READ THIS CAREFULLY AND FOLLOW IT):\n", arch_description,
+        "\n\nREQUIREMENTS:\n", req_description,
+        "\n\n", _CODEGEN_INSTRUCTIONS,
+    ))
 
-CRITICAL RULES:
-1. Generate ACTUAL, FUNCTIONAL code - not examples, not placeholders
-2. Follow the architecture document provided
-3. Include proper imports, error handling, and working logic
-4. Use the EXACT format: ### FILE: path \\n```language\\ncode\\n```
-5. NO Lorem Ipsum, NO "example here", NO "TODO" comments - REAL CODE ONLY"""),
-            HumanMessage(content=prompt)
-        ]
-        
-        # Rate limiting: Add small delay to avoid OpenAI rate limits
-        await asyncio.sleep(0.5)
+
+def _codegen_inputs(state: DeepPipelineState) -> tuple[str, str, str]:
+    """Project name, architecture and requirements documents the code is generated from."""
+    requirements = state.get("requirements", {})
+    architecture = state.get("architecture", {})
+    project_name = state.get("project_name", "new-project")
+    
+    # Extract full documentation
+    arch_description = architecture.get('description', 'No architecture available') if architecture else 'No architecture available'
+    req_description = requirements.get('description', 'No requirements available') if requirements else 'No requirements available'
+    return project_name, arch_description, req_description
+
+
+async def _generate_code(project_name: str, arch_description: str, req_description: str) -> str:
+    """Generate code in ONE direct LLM call (no agent loop) and cache the output."""
+    
+    llm = ChatOpenAI(model=get_agent_model("development"), temperature=0.3)
+    messages = [
+        SystemMessage(content=_CODEGEN_SYSTEM_PROMPT),
+        HumanMessage(content=_codegen_prompt(project_name, arch_description, req_description))
+    ]
+    
+    # Rate limiting: Add small delay to avoid OpenAI rate limits
+    await asyncio.sleep(0.5)
+    
+    response = await llm.ainvoke(messages)
+    output = response.content
+    if LLM_CACHE_ENABLED:
+        key = _content_key(project_name, arch_description, req_description)
+        _bounded_put(_code_cache, key, (time.monotonic() + _EXECUTE_CACHE_TTL, output))
+    return output
+
+
+# Speculative code generations started before the development stage, by _content_key of their inputs.
+# Opt-in: a run that stops before development wastes the generation
+SPECULATIVE_CODEGEN = os.getenv("SDLC_SPECULATIVE_CODEGEN", "0").lower() in ("1", "true")
+_codegen_tasks: dict[bytes, asyncio.Task] = {}
+
+
+def _prefetch_code(state: DeepPipelineState) -> None:
+    """Start generating code for state's architecture ahead of the development stage.
+    
+    Any other in-flight generation is for a superseded architecture and is cancelled.
+    """
+    inputs = _codegen_inputs(state)
+    key = _content_key(*inputs)
+    if key in _code_cache or key in _codegen_tasks:
+        return
+    _cancel_speculative_code()
+    logger.info("💻 Speculatively generating code while the remaining stages finish")
+    _codegen_tasks[key] = asyncio.create_task(_generate_code(*inputs))
+
+
+def _cancel_speculative_code() -> None:
+    """Cancel and forget speculative generations no development stage will use."""
+    for task in _codegen_tasks.values():
+        task.cancel()
+    _codegen_tasks.clear()
+
+
+async def _speculative_code(key: bytes) -> str | None:
+    """Output of the speculative generation for key, or None if there is no usable one."""
+    task = _codegen_tasks.pop(key, None)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        return None
+    await asyncio.wait({task})
+    if task.cancelled():
+        return None
+    if task.exception() is not None:
+        logger.warning(f"Speculative code generation failed ({task.exception()}), regenerating")
+        return None
+    return task.result()
+
+
+# A "### FILE: path" header and its fenced block, up to the next header or the
+# end of the output (so code containing triple backticks stays in one file)
+_FILE_RE = re.compile(r'###\s*FILE:\s*([^\n]+)\s*\n```[^\n]*\n(.*?)(?=\n###\s*FILE:|\Z)', re.DOTALL)
+
+
+def parse_code_artifacts(text: str) -> list[tuple[str, str]]:
+    """(path, content) for each ### FILE: block in generated code, without the closing fence."""
+    files = []
+    for m in _FILE_RE.finditer(text):
+        content = m.group(2).strip()
+        if content.endswith("```"):
+            content = content[:-3].strip()
+        files.append((m.group(1), content))
+    return files
+
+
+# Files per push_files commit from the developer node
+_GITHUB_PUSH_BATCH_SIZE = 50
+
+
+async def _push_files(github_client, owner: str, repo: str, branch: str, files: list[tuple[str, str]]) -> tuple[list[str], list[dict]]:
+    """Push files to a branch with one push_files commit per batch.
+    
+    A batch the server rejects is retried file by file with
+    create_or_update_file. Batches go out sequentially: concurrent commits to
+    the same branch would race on the branch ref. Returns the pushed paths and
+    the failed operations.
+    """
+    pushed_files = []
+    failed_github_operations = []
+    for start in range(0, len(files), _GITHUB_PUSH_BATCH_SIZE):
+        batch = files[start:start + _GITHUB_PUSH_BATCH_SIZE]
+        logger.info(f"  Pushing {len(batch)} files in one commit")
+        try:
+            # GitHub MCP tool handles base64 encoding internally - send raw content
+            result = await github_client.call_tool(
+                "push_files",
+                {
+                    "owner": owner,
+                    "repo": repo,
+                    "branch": branch,
+                    "files": [{"path": path, "content": content} for path, content in batch],
+                    "message": f"Add {len(batch)} files",
+                }
+            )
+            if not _is_error_result(result):
+                pushed_files += [path for path, _ in batch]
+                logger.info(f"  ✅ Pushed: {', '.join(path for path, _ in batch)}")
+                continue
+            logger.warning(f"  push_files failed, pushing files one by one: {result['text'][:200]}")
+        except Exception as e:
+            logger.warning(f"  push_files failed, pushing files one by one: {e}")
         
-        response = await llm.ainvoke(messages)
-        output = response.content
+        for file_path, file_content in batch:
+            try:
+                logger.info(f"  Pushing {file_path} ({len(file_content)} chars)")
+                result = await github_client.call_tool(
+                    "create_or_update_file",
+                    {
+                        "owner": owner,
+                        "repo": repo,
+                        "path": file_path,
+                        "content": file_content,  # Send raw content, MCP tool will encode
+                        "message": f"Add {file_path}",
+                        "branch": branch
+                    }
+                )
+                
+                # CHECK FOR MCP ERROR RESPONSE
+                if _is_error_result(result):
+                    logger.error(f"  ❌ GitHub MCP ERROR for {file_path}:")
+                    logger.error(f"      {result['text']}")
+                    failed_github_operations.append({
+                        "file": file_path,
+                        "operation": "create_or_update_file",
+                        "error": result["text"]
+                    })
+                else:
+                    pushed_files.append(file_path)
+                    logger.info(f"  ✅ Pushed: {file_path}")
+                    
+            except Exception as e:
+                logger.error(f"  ❌ Exception pushing {file_path}: {e}")
+                failed_github_operations.append({
+                    "file": file_path,
+                    "operation": "create_or_update_file",
+                    "error": str(e)
+                })
+    return pushed_files, failed_github_operations
+
+
+async def developer_agent_node(state: DeepPipelineState) -> dict:
+    """Developer generates code in ONE direct LLM call (no agent loop)."""
+    project_name, arch_description, req_description = _codegen_inputs(state)
+    
+    # A retry with unchanged inputs (e.g. after a failed push) reuses the generated code
+    code_key = _content_key(project_name, arch_description, req_description)
+    cached_code = _code_cache.get(code_key)
+    cached_output = cached_code[1] if cached_code and cached_code[0] > time.monotonic() else None
+    
+    try:
+        if cached_output:
+            logger.info("💻 Reusing code generated for identical architecture and requirements")
+            output = cached_output
+        else:
+            output = await _speculative_code(code_key)
+            if output is None:
+                logger.info(f"💻 Generating code with single LLM call (no agent loop)")
+                output = await _generate_code(project_name, arch_description, req_description)
         
         logger.info(f"✅ Code generated in single call ({len(output)} chars)")
         logger.info(f"📄 First 500 chars of generated output:")
@@ -2139,22 +2784,7 @@ CRITICAL RULES:
             
             try:
                 # Parse files from generated code
-                import re
-                
-                # More robust regex - matches until we hit the NEXT "### FILE:" or end of string
-                # This prevents issues with code containing triple backticks
-                file_pattern = r'###\s*FILE:\s*([^\n]+)\s*\n```[^\n]*\n(.*?)(?=\n###\s*FILE:|\Z)'
-                files = re.findall(file_pattern, output, re.DOTALL)
-                
-                # Clean up the captured content (remove trailing ```)
-                cleaned_files = []
-                for path, content in files:
-                    # Remove trailing ``` if present
-                    content = content.strip()
-                    if content.endswith('```'):
-                        content = content[:-3].strip()
-                    cleaned_files.append((path, content))
-                files = cleaned_files
+                files = parse_code_artifacts(output)
                 
                 logger.info(f"📝 Parsed {len(files)} files from generated code")
                 
@@ -2206,9 +2836,7 @@ CRITICAL RULES:
                             logger.info(f"✅ Initialized main with: {first_file_path}")
                             first_file_pushed = True
                         except Exception as e:
-                            logger.error(f"Failed to initialize main branch: {e}")
-                            import traceback
-                            logger.error(traceback.format_exc())
+                            logger.error(f"Failed to initialize main branch: {e}", exc_info=True)
                     
                     # Step 3: Create feature branch (now that main exists)
                     branch_name = "feature/initial-implementation"
@@ -2228,85 +2856,52 @@ CRITICAL RULES:
                             else:
                                 logger.warning(f"Branch creation returned no result, will push remaining files to main")
                         except Exception as e:
-                            logger.warning(f"Branch creation failed, will push remaining files to main: {e}")
-                            import traceback
-                            logger.warning(traceback.format_exc())
+                            logger.warning(f"Branch creation failed, will push remaining files to main: {e}", exc_info=True)
                     else:
                         logger.warning("⚠️ Skipping branch creation - main not initialized")
                     
                     # Step 4: Push remaining files
                     pushed_files = [files[0][0]] if first_file_pushed else []  # Track the first file we already pushed
-                    failed_github_operations = []
                     
                     # Start from index 1 if we already pushed the first file
                     start_index = 1 if first_file_pushed else 0
+                    files_to_push = []
                     for file_path, file_content in files[start_index:]:
-                        try:
-                            file_path = file_path.strip()
-                            file_content = file_content.strip()
-                            
-                            # Validate content is not empty or gibberish
-                            if len(file_content) < 5:
-                                logger.warning(f"  ⚠️ Skipping {file_path} - content too short ({len(file_content)} chars)")
-                                continue
-                            
-                            # Check if content looks like actual code, not random gibberish
-                            # Real code should have keywords, imports, or markdown headers
-                            has_code_indicators = any([
-                                'import ' in file_content,
-                                'def ' in file_content,
-                                'class ' in file_content,
-                                'function ' in file_content,
-                                '# ' in file_content,
-                                '## ' in file_content,
-                                '```' in file_content,
-                                'const ' in file_content,
-                                'var ' in file_content,
-                                'let ' in file_content,
-                                '{' in file_content and '}' in file_content,
-                            ])
-                            
-                            if not has_code_indicators:
-                                logger.warning(f"  ⚠️ Skipping {file_path} - content doesn't look like code/markdown:")
-                                logger.warning(f"      Preview: {file_content[:200]}")
-                                continue
-                            
-                            # GitHub MCP tool handles base64 encoding internally - send raw content
-                            logger.info(f"  Pushing {file_path} ({len(file_content)} chars)")
-                            logger.info(f"    Content preview: {file_content[:100]}...")
-                            
-                            result = await github_client.call_tool(
-                                "create_or_update_file",
-                                {
-                                    "owner": owner,
-                                    "repo": repo_name,
-                                    "path": file_path,
-                                    "content": file_content,  # Send raw content, MCP tool will encode
-                                    "message": f"Add {file_path}",
-                                    "branch": target_branch
-                                }
-                            )
-                            
-                            # CHECK FOR MCP ERROR RESPONSE
-                            if isinstance(result, dict) and "text" in result and "error" in result["text"].lower():
-                                logger.error(f"  ❌ GitHub MCP ERROR for {file_path}:")
-                                logger.error(f"      {result['text']}")
-                                failed_github_operations.append({
-                                    "file": file_path,
-                                    "operation": "create_or_update_file",
-                                    "error": result["text"]
-                                })
-                            else:
-                                pushed_files.append(file_path)
-                                logger.info(f"  ✅ Pushed: {file_path}")
-                                
-                        except Exception as e:
-                            logger.error(f"  ❌ Exception pushing {file_path}: {e}")
-                            failed_github_operations.append({
-                                "file": file_path,
-                                "operation": "create_or_update_file",
-                                "error": str(e)
-                            })
+                        file_path = file_path.strip()
+                        file_content = file_content.strip()
+                        
+                        # Validate content is not empty or gibberish
+                        if len(file_content) < 5:
+                            logger.warning(f"  ⚠️ Skipping {file_path} - content too short ({len(file_content)} chars)")
+                            continue
+                        
+                        # Check if content looks like actual code, not random gibberish
+                        # Real code should have keywords, imports, or markdown headers
+                        has_code_indicators = any([
+                            'import ' in file_content,
+                            'def ' in file_content,
+                            'class ' in file_content,
+                            'function ' in file_content,
+                            '# ' in file_content,
+                            '## ' in file_content,
+                            '```' in file_content,
+                            'const ' in file_content,
+                            'var ' in file_content,
+                            'let ' in file_content,
+                            '{' in file_content and '}' in file_content,
+                        ])
+                        
+                        if not has_code_indicators:
+                            logger.warning(f"  ⚠️ Skipping {file_path} - content doesn't look like code/markdown:")
+                            logger.warning(f"      Preview: {file_content[:200]}")
+                            continue
+                        
+                        files_to_push.append((file_path, file_content))
+                    
+                    pushed, failed_github_operations = await _push_files(
+                        github_client, owner, repo_name, target_branch, files_to_push
+                    )
+                    pushed_files += pushed
                     
                     logger.info(f"✅ Pushed {len(pushed_files)}/{len(files)} files to GitHub")
                     if failed_github_operations:
@@ -2540,9 +3135,7 @@ CRITICAL RULES:
                     }
                     
             except Exception as e:
-                logger.error(f"GitHub integration failed: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.error(f"GitHub integration failed: {e}", exc_info=True)
                 github_results = {
                     "error": str(e),
                     "failed": True,
@@ -2555,8 +3148,11 @@ CRITICAL RULES:
                 logger.warning("GitHub client not initialized, skipping GitHub integration")
                 github_results["skipped"] = "GitHub client not available"
         
+        # A retry replaces the output, so the previous artifact is no longer needed
+        delete_artifact((state.get("code_artifacts") or {}).get("description"))
         code_artifacts = {
-            "description": output,
+            # The full dump can run to megabytes; keep it out of checkpointed state
+            "description": store_artifact(output),
             "confidence": confidence,
             "iterations": iterations,
             "spawned_agents": spawned_count,
@@ -2589,21 +3185,12 @@ CRITICAL RULES:
             }],
         }
     except Exception as e:
-        logger.error(f"❌ EXCEPTION in developer_agent_node: {e}")
-        logger.error(f"   Exception type: {type(e).__name__}")
-        
-        # Log full traceback
-        import traceback
-        logger.error("   Full traceback:")
-        for line in traceback.format_exc().split('\n'):
-            if line.strip():
-                logger.error(f"   {line}")
+        logger.error(f"❌ EXCEPTION in developer_agent_node: {e}", exc_info=True)
         
         return {
             "code_artifacts": {"error": str(e), "failed": True},  # CRITICAL: Set this so orchestrator knows we tried
             "errors": [f"Development error: {str(e)}"],
             "exception_type": type(e).__name__,
-            "traceback": traceback.format_exc(),
             "messages": [{
                 "role": "developer",
                 "content": f"❌ Code generation failed: {str(e)}",
@@ -2687,6 +3274,8 @@ async def approval_node(state: DeepPipelineState) -> dict:
     result = {
         "approval_response": response,
         "requires_approval": False,  # Clear the flag
+        # The reason is the agent's full output; don't carry it into later checkpoints
+        "approval_reason": None,
         "messages": [{
             "role": "human",
             "content": f"User: {response}",
@@ -2697,10 +3286,44 @@ async def approval_node(state: DeepPipelineState) -> dict:
     return result
 
 
+async def plan_and_architecture_node(state: DeepPipelineState) -> dict:
+    """Run the test plan and architecture agents concurrently.
+    
+    Both only depend on the requirements and work items. List outputs
+    (messages, decision history, errors) from the two agents are concatenated.
+    """
+    async def architecture_then_prefetch():
+        # Development follows this stage on the happy path; an approved architecture
+        # can start code generation while the test plan agent is still working
+        result = await architecture_agent_node(state)
+        if SPECULATIVE_CODEGEN and not result.get("requires_approval") and not result.get("errors"):
+            _prefetch_code({**state, **result})
+        return result
+    
+    test_res, arch_res = await asyncio.gather(test_plan_agent_node(state), architecture_then_prefetch())
+    merged = {**test_res, **arch_res}
+    for key in test_res.keys() & arch_res.keys():
+        if isinstance(test_res[key], list) and isinstance(arch_res[key], list):
+            merged[key] = test_res[key] + arch_res[key]
+    # Only the architecture agent requests approval; a revise re-runs it alone
+    merged["current_agent"] = "architecture"
+    return merged
+
+
 async def complete_node(state: DeepPipelineState) -> dict:
     """Mark pipeline as complete."""
+    # Every run ends here, including ones that stopped short of development
+    _cancel_speculative_code()
+    code_artifacts = state.get("code_artifacts") or {}
+    github = code_artifacts.get("github") or {}
+    if github.get("files_pushed") and github["files_pushed"] == github.get("total_files"):
+        # Every file is in GitHub; the stored developer output is no longer needed.
+        # Otherwise it is kept: it is the only copy of the generated code.
+        delete_artifact(code_artifacts.get("description"))
+        code_artifacts = {k: v for k, v in code_artifacts.items() if k != "description"}
     return {
         "pipeline_complete": True,
+        "code_artifacts": code_artifacts or None,
         "messages": [{
             "role": "system",
             "content": "✅ SDLC Pipeline Complete!",
@@ -2732,12 +3355,16 @@ def route_after_agent(state: DeepPipelineState) -> str:
     return "orchestrator"
 
 
+_APPROVE_TOKENS = frozenset({"approve", "approved", "yes", "y", "ok", "continue"})
+
+
 def route_after_approval(state: DeepPipelineState) -> str:
     """Route after human approval."""
-    response = str(state.get("approval_response", "")).lower().strip()
+    response = state.get("approval_response")
     current_agent = state.get("current_agent", "orchestrator")
     
-    if response in ("approve", "approved", "yes", "y", "ok", "continue"):
+    # Anything but an approval string (including no response) retries the agent
+    if isinstance(response, str) and response.strip().lower() in _APPROVE_TOKENS:
         # Continue to orchestrator for next decision
         return "orchestrator"
     else:
@@ -2762,6 +3389,7 @@ def build_graph():
     builder.add_node("work_items", work_items_agent_node)
     builder.add_node("test_plan", test_plan_agent_node)
     builder.add_node("architecture", architecture_agent_node)
+    builder.add_node("plan_and_architecture", plan_and_architecture_node)
     builder.add_node("development", developer_agent_node)
     builder.add_node("approval", approval_node)
     builder.add_node("complete", complete_node)
@@ -2780,6 +3408,7 @@ def build_graph():
             "work_items": "work_items",
             "test_plan": "test_plan",
             "architecture": "architecture",
+            "plan_and_architecture": "plan_and_architecture",
             "development": "development",
             "approval": "approval",
             "complete": "complete",
@@ -2787,7 +3416,7 @@ def build_graph():
     )
     
     # Agents return to orchestrator (or approval)
-    for agent in ["requirements", "work_items", "test_plan", "architecture", "development"]:
+    for agent in ["requirements", "work_items", "test_plan", "architecture", "plan_and_architecture", "development"]:
         builder.add_conditional_edges(
             agent,
             route_after_agent,
@@ -2813,8 +3442,10 @@ def build_graph():
     # Complete -> END
     builder.add_edge("complete", END)
     
-    # Compile with interrupt at approval
+    # Compile with interrupt at approval. Studio injects its own persistence;
+    # SDLC_CHECKPOINTER=sqlite lets a restarted run resume at its last stage
     return builder.compile(
+        checkpointer=make_checkpointer(),
         interrupt_before=["project_name_prompt", "approval"],  # Human-in-the-loop for project setup and approval checkpoints
     )
 
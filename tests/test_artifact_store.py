@@ -0,0 +1,55 @@
+"""Tests for the on-disk artifact store."""
+
+import pytest
+
+from src.artifact_store import delete_artifact, is_artifact_ref, load_artifact, store_artifact
+
+
+class TestArtifactStore:
+    """Tests for storing and resolving large stage outputs."""
+
+    def test_round_trip(self, tmp_path, monkeypatch):
+        """Test a stored artifact resolves back to the original value."""
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path))
+        code = {"files": [{"path": "app.py", "content": "print('hi')\n" * 500}]}
+
+        ref = store_artifact(code, preview_chars=100)
+
+        assert is_artifact_ref(ref)
+        assert len(ref["preview"]) == 100
+        assert ref["size"] > 100
+        assert load_artifact(ref) == code
+
+    def test_plain_values_pass_through(self):
+        """Test values that are not handles are returned unchanged."""
+        code = {"files": []}
+        assert load_artifact(code) is code
+        assert not is_artifact_ref(code)
+
+    def test_write_failure_keeps_value_inline(self, tmp_path, monkeypatch):
+        """Test the artifact stays inline when the store is not writable."""
+        blocker = tmp_path / "not-a-dir"
+        blocker.write_text("")
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(blocker))
+        code = {"files": [{"path": "a.py", "content": "x"}]}
+        assert store_artifact(code) is code
+
+    def test_delete(self, tmp_path, monkeypatch):
+        """Test deleting removes the stored file and tolerates repeats and plain values."""
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path))
+        ref = store_artifact({"files": []})
+
+        delete_artifact(ref)
+        delete_artifact(ref)
+        delete_artifact({"files": []})
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_missing_artifact_fails_loudly(self, tmp_path, monkeypatch):
+        """Test a handle whose file is gone (e.g. resumed on another worker) raises."""
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path))
+        ref = store_artifact({"files": []})
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path / "elsewhere"))
+
+        with pytest.raises(FileNotFoundError, match="SDLC_ARTIFACT_DIR"):
+            load_artifact(ref)
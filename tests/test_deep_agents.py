@@ -330,6 +330,24 @@ async def test_low_confidence_requests_approval():
         assert "reasoning" in result
 
 
+@pytest.mark.asyncio
+async def test_high_confidence_meets_medium_threshold():
+    """Test that confidence is compared by level, not by its string value."""
+    mock_llm = AsyncMock()
+    mock_llm.ainvoke.return_value = MagicMock(
+        content='{"decision": "COMPLETE", "reasoning": "Done", "confidence": "high"}'
+    )
+    
+    agent = DeepAgent(role="Test", objective="Test", tools=[])
+    agent.llm = mock_llm
+    
+    with patch("asyncio.sleep", new=AsyncMock()):
+        decision = await agent._make_decision("output", {})
+    
+    assert decision.decision_type == AgentDecisionType.COMPLETE
+    assert ConfidenceLevel.VERY_LOW.rank < ConfidenceLevel.MEDIUM.rank < ConfidenceLevel.VERY_HIGH.rank
+
+
 # ============================================================================
 # Test Agent Spawning
 # ============================================================================
@@ -508,6 +526,133 @@ def test_execution_history_tracking():
     assert agent.execution_history[1]["iteration"] == 2
 
 
+def test_clone_has_fresh_run_state():
+    """Test that a clone shares configuration but not execution history."""
+    
+    agent = DeepAgent(
+        role="Test",
+        objective="Test",
+        tools=[test_tool_simple],
+    )
+    mock_response = MagicMock()
+    mock_response.content = "Test response"
+    mock_response.tool_calls = None
+    agent._record_execution_step(mock_response, [])
+    
+    clone = agent.clone()
+    
+    assert clone is not agent
+    assert clone.tools is agent.tools
+    assert clone.llm_with_tools is agent.llm_with_tools
+    assert clone.execution_history == []
+    assert len(agent.execution_history) == 1
+
+
+def test_system_prompt_is_built_once(monkeypatch):
+    """Test runs reuse one system message and OpenAI gets a stable prompt cache key."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    agent = DeepAgent(role="Test", objective="Test", tools=[test_tool_simple])
+    other = DeepAgent(role="Test", objective="Test", tools=[test_tool_simple])
+
+    first = agent._build_initial_messages("a", {})[0]
+    assert agent.clone()._build_initial_messages("b", {})[0] is first
+    assert "test_tool_simple" in first.content
+    assert agent.llm.extra_body["prompt_cache_key"] == other.llm.extra_body["prompt_cache_key"]
+
+
+@pytest.mark.asyncio
+async def test_invoke_llm_streams_tokens():
+    """Test that content deltas reach on_token and the full message is returned."""
+    from langchain_core.messages import AIMessageChunk
+    
+    tokens = []
+    agent = DeepAgent(role="Test", objective="Test", tools=[], on_token=tokens.append)
+    
+    async def astream(messages):
+        for text in ("Hel", "lo"):
+            yield AIMessageChunk(content=text)
+    
+    agent.llm_with_tools = MagicMock()
+    agent.llm_with_tools.astream = astream
+    
+    response = await agent._invoke_llm([])
+    
+    assert tokens == ["Hel", "lo"]
+    assert response.content == "Hello"
+
+
+@pytest.mark.asyncio
+async def test_invoke_llm_empty_stream_falls_back_to_invoke():
+    """Test that a stream without chunks still returns the reply."""
+    from langchain_core.messages import AIMessage
+    
+    agent = DeepAgent(role="Test", objective="Test", tools=[], on_token=lambda text: None)
+    
+    async def astream(messages):
+        return
+        yield
+    
+    agent.llm_with_tools = MagicMock()
+    agent.llm_with_tools.astream = astream
+    agent.llm_with_tools.ainvoke = AsyncMock(return_value=AIMessage(content="Hello"))
+    
+    response = await agent._invoke_llm([])
+    
+    assert response.content == "Hello"
+
+
+@pytest.mark.asyncio
+async def test_tools_prefer_their_coroutine():
+    """Test that async tools (and MCP tools with a sync wrapper) run as coroutines."""
+    from langchain_core.tools import StructuredTool
+    
+    async def fetch() -> str:
+        return "from coroutine"
+    
+    def blocking_fetch() -> str:
+        raise AssertionError("sync wrapper should not be called")
+    
+    wrapped = StructuredTool.from_function(
+        func=blocking_fetch, coroutine=fetch, name="fetch", description="Fetch"
+    )
+    agent = DeepAgent(role="Test", objective="Test", tools=[test_tool_async, wrapped])
+    
+    messages = await agent._execute_tools([
+        {"name": "test_tool_async", "args": {}, "id": "call_1"},
+        {"name": "fetch", "args": {}, "id": "call_2"},
+    ])
+    
+    assert [m.content for m in messages] == ["async_success", "from coroutine"]
+
+
+@pytest.mark.asyncio
+async def test_sync_tools_do_not_block_event_loop():
+    """Test that a blocking sync tool runs off the event loop."""
+    import time
+    
+    @tool
+    def slow_tool() -> str:
+        """Block for a while."""
+        time.sleep(0.2)
+        return "done"
+    
+    agent = DeepAgent(role="Test", objective="Test", tools=[slow_tool])
+    start = time.monotonic()
+    
+    async def ticker():
+        for _ in range(5):
+            await asyncio.sleep(0.02)
+        return time.monotonic() - start
+    
+    messages, ticker_elapsed = await asyncio.gather(
+        agent._execute_tools([{"name": "slow_tool", "args": {}, "id": "call_1"}]),
+        ticker(),
+    )
+    
+    assert messages[0].content == "done"
+    assert ticker_elapsed < 0.2
+
+
 # ============================================================================
 # Integration Test
 # ============================================================================
@@ -3,6 +3,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from src.mcp_client.ado_client import AzureDevOpsMCPClient
 from src.mcp_client.github_client import GitHubMCPClient
 from src.mcp_client.tool_converter import mcp_tools_to_langchain, format_tool_for_display
 from mcp.types import Tool as MCPTool
@@ -50,6 +51,64 @@ class TestGitHubMCPClient:
         assert client.get_tool_by_name("nonexistent") is None
 
 
+class TestAzureDevOpsMCPClient:
+    """Tests for AzureDevOpsMCPClient work item batching."""
+
+    def test_work_item_batch_request_with_parent(self):
+        """Test a $batch sub-request links the item to its parent."""
+        client = AzureDevOpsMCPClient(organization="org", project="proj")
+        request = client._work_item_batch_request(
+            {"work_item_type": "Issue", "title": "Login", "parent_id": 7}, "proj"
+        )
+        assert request["method"] == "PATCH"
+        assert request["uri"].startswith("/proj/_apis/wit/workitems/$Issue")
+        paths = [op["path"] for op in request["body"]]
+        assert paths == ["/fields/System.Title", "/relations/-"]
+        assert request["body"][1]["value"]["url"].endswith("/workItems/7")
+
+    @pytest.mark.asyncio
+    async def test_create_work_items_batch_requires_pat(self, monkeypatch):
+        """Test batch creation refuses to run without a PAT."""
+        for var in ("ADO_MCP_AUTH_TOKEN", "AZURE_DEVOPS_EXT_PAT", "AZURE_DEVOPS_PAT", "AZURE_DEVOPS_TOKEN"):
+            monkeypatch.delenv(var, raising=False)
+        client = AzureDevOpsMCPClient(organization="org", project="proj")
+        with pytest.raises(RuntimeError):
+            await client.create_work_items_batch([{"title": "Epic"}])
+
+    @pytest.mark.asyncio
+    async def test_create_work_items_batch_single_request(self, monkeypatch):
+        """Test all items go out in one POST and results keep item order."""
+        monkeypatch.setenv("ADO_MCP_AUTH_TOKEN", "pat")
+        client = AzureDevOpsMCPClient(organization="org", project="proj")
+        response = MagicMock(status_code=200)
+        response.json.return_value = {
+            "value": [
+                {"code": 200, "body": '{"id": 1}'},
+                {"code": 400, "body": '{"message": "bad"}'},
+            ]
+        }
+        with patch("httpx.AsyncClient.post", new=AsyncMock(return_value=response)) as post:
+            results = await client.create_work_items_batch([{"title": "A"}, {"title": "B"}])
+        assert post.await_count == 1
+        assert results[0] == {"id": 1}
+        assert "error" in results[1]
+
+
+    @pytest.mark.asyncio
+    async def test_bulk_create_work_items_sets_parent(self):
+        """Test bulk creation issues one create per item and links parents."""
+        client = AzureDevOpsMCPClient(organization="org", project="proj")
+        client.call_tool = AsyncMock(side_effect=[{"id": 1}, RuntimeError("boom")])
+        results = await client.bulk_create_work_items([
+            {"work_item_type": "Issue", "title": "A", "parent_id": 7},
+            {"work_item_type": "Issue", "title": "B"},
+        ])
+        assert results[0] == {"id": 1}
+        assert results[1] == {"error": "boom"}
+        fields = client.call_tool.await_args_list[0].args[1]["fields"]
+        assert {"name": "System.Parent", "value": "7"} in fields
+
+
 class TestToolConverter:
     """Tests for MCP to LangChain tool conversion."""
 
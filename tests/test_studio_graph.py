@@ -0,0 +1,107 @@
+"""Tests for the LangGraph Studio pipeline graph."""
+
+import asyncio
+
+import pytest
+
+from src import studio_graph
+from src.studio_graph import (
+    _INTERRUPT_BEFORE,
+    build_graph,
+    graph,
+    reducer,
+    route_after_test_plan_setup,
+    route_after_test_plan_wizard,
+)
+
+
+class TestBuildGraph:
+    """Tests for graph construction."""
+
+    def test_build_graph_is_memoized(self):
+        """Test that the compiled graph is built once and reused."""
+        assert build_graph() is build_graph()
+        assert build_graph() is graph
+
+    def test_interrupts_only_on_stage_gates(self):
+        """Test that only the stage gates are listed in interrupt_before."""
+        assert set(graph.interrupt_before_nodes) == _INTERRUPT_BEFORE
+        for node in _INTERRUPT_BEFORE:
+            assert node in graph.get_graph().nodes
+
+
+class TestReducer:
+    """Tests for the list-append state reducer."""
+
+    def test_appends_new_items(self):
+        """Test that new items are appended after the current ones."""
+        assert reducer([{"a": 1}], [{"b": 2}]) == [{"a": 1}, {"b": 2}]
+
+    def test_empty_update_returns_current(self):
+        """Test that empty updates reuse the current list without copying."""
+        current = [{"a": 1}]
+        assert reducer(current, None) is current
+        assert reducer(current, []) is current
+        new = [{"b": 2}]
+        assert reducer([], new) is new
+
+
+class TestTestPlanRouting:
+    """Tests for routing after the test plan setup subgraph."""
+
+    def test_skip_goes_to_architecture(self):
+        """Test that declining the test plan skips to architecture."""
+        state = {"confirmation_response": "skip", "test_plan_inputs": {"iteration": "P\\Sprint 1"}}
+        assert route_after_test_plan_setup(state) == "architecture"
+
+    def test_new_plan_with_iteration(self):
+        """Test that a completed new-plan wizard routes to test plan creation."""
+        state = {"confirmation_response": "new", "test_plan_inputs": {"iteration": "P\\Sprint 1", "use_existing": False}}
+        assert route_after_test_plan_setup(state) == "test_plan"
+
+    def test_existing_plan_requires_ids(self):
+        """Test that an existing plan needs both plan and suite IDs."""
+        inputs = {"iteration": "P\\Sprint 1", "use_existing": True, "plan_id": 1}
+        assert route_after_test_plan_wizard({"test_plan_inputs": inputs}) == "architecture"
+        inputs["suite_id"] = 2
+        assert route_after_test_plan_wizard({"test_plan_inputs": inputs}) == "test_plan"
+
+    def test_cancelled_wizard(self):
+        """Test that a cancelled wizard (no inputs) routes to architecture."""
+        assert route_after_test_plan_wizard({"test_plan_inputs": None}) == "architecture"
+
+
+class FakeMermaidClient:
+    """Mermaid client stub that tracks concurrent renders."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def list_tools(self):
+        return []
+
+    async def render_mermaid_to_file(self, mermaid, output_path):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return {"path": output_path}
+
+
+class TestMermaidRender:
+    """Tests for rendering architecture diagrams."""
+
+    @pytest.mark.asyncio
+    async def test_renders_share_the_event_loop_with_bounded_concurrency(self, monkeypatch, tmp_path):
+        """Test diagrams render concurrently on the node's loop, at most _MERMAID_CONCURRENCY at a time."""
+        client = FakeMermaidClient()
+        monkeypatch.setattr(studio_graph, "get_mermaid_client", lambda: client)
+        monkeypatch.setattr(studio_graph, "_MERMAID_CONCURRENCY", 2)
+        monkeypatch.setenv("SDLC_MERMAID_OUTPUT_DIR", str(tmp_path))
+        diagrams = {f"d{i}": "graph TD; A-->B" for i in range(5)}
+
+        result = await studio_graph.mermaid_render_node({"architecture": {"diagrams": diagrams}})
+
+        assert result["mermaid_results"]["rendered"] == 5
+        assert client.peak == 2
@@ -0,0 +1,530 @@
+"""Tests for the agentic SDLC pipeline graph."""
+
+import asyncio
+import importlib
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.tools import tool
+
+from src.artifact_store import delete_artifact, is_artifact_ref, load_artifact, store_artifact
+
+
+@pytest.fixture(scope="module")
+def agentic():
+    """The graph module; building it at import needs an OpenAI key (never used here)."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("OPENAI_API_KEY", "test-key")
+        return importlib.import_module("src.studio_graph_agentic")
+
+
+class TestLoopPrimitives:
+    """Tests for the module-level asyncio primitives."""
+
+    def test_semaphore_usable_from_several_loops(self, agentic):
+        """Test the MCP semaphore works on every loop, even after waiting on another."""
+        async def contend():
+            sem = agentic._mcp_sem()
+            holders = [asyncio.create_task(sem.acquire()) for _ in range(agentic._MCP_CONCURRENCY + 1)]
+            await asyncio.sleep(0)
+            for _ in range(agentic._MCP_CONCURRENCY + 1):
+                sem.release()
+            await asyncio.gather(*holders)
+
+        for _ in range(3):
+            asyncio.run(contend())
+
+        assert len(agentic._mcp_sems) <= 1
+
+    def test_client_lock_usable_from_several_loops(self, agentic, monkeypatch):
+        """Test lazy client creation works on a new loop after contending on another."""
+        from src.mcp_client import ado_client
+
+        class SlowAdoClient:
+            def __init__(self, organization, project):
+                pass
+
+            async def connect(self):
+                await asyncio.sleep(0.01)
+
+        monkeypatch.setenv("AZURE_DEVOPS_ORGANIZATION", "org")
+        monkeypatch.setenv("AZURE_DEVOPS_PROJECT", "project")
+        monkeypatch.setattr(ado_client, "AzureDevOpsMCPClient", SlowAdoClient)
+
+        async def create_together():
+            agentic._ado_client = None
+            first, second = await asyncio.gather(agentic.get_ado_client(), agentic.get_ado_client())
+            return first is second and isinstance(first, SlowAdoClient)
+
+        try:
+            assert all(asyncio.run(create_together()) for _ in range(2))
+        finally:
+            agentic._ado_client = None
+
+
+def _node(agentic, name):
+    """A node of the compiled graph, runnable on its own."""
+    return agentic.build_graph().builder.nodes[name].runnable
+
+
+def _push_result(created=1, failed=0):
+    return {"epics": {"created": created, "failed": failed}, "stories": {"created": 0, "failed": 0}}
+
+
+class FakeAdoClient:
+    """ADO client stand-in that numbers created work items from 100."""
+
+    def __init__(self, batch=True):
+        self.batch = batch
+        self.batches = []
+
+    async def create_work_items_batch(self, items):
+        if not self.batch:
+            raise RuntimeError("no PAT")
+        return await self.bulk_create_work_items(items)
+
+    async def bulk_create_work_items(self, items):
+        self.batches.append(items)
+        return [{"id": 100 + i} for i in range(len(items))]
+
+
+class TestAdoPush:
+    """Tests for the background ADO push and its join."""
+
+    @pytest.fixture(autouse=True)
+    def artifact_dir(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path))
+        return tmp_path
+
+    @pytest.mark.asyncio
+    async def test_join_collects_push_results(self, agentic, artifact_dir):
+        """Test joining awaits the push, records its counts and cleans up after it."""
+        async def push():
+            return _push_result(created=3, failed=1)
+
+        agentic._start_ado_push("t1", push())
+        result = await _node(agentic, "join_ado_push").ainvoke({"ado_task_id": "t1"})
+
+        assert result["ado_task_id"] is None
+        assert result["ado_results"]["status"] == "completed"
+        assert "3 work items created, 1 failed" in result["messages"][0].content
+        assert "t1" not in agentic._ADO_PUSH_TASKS
+        assert list(artifact_dir.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_join_reports_failed_push(self, agentic):
+        """Test a push that raised is reported instead of propagating."""
+        async def push():
+            raise RuntimeError("ADO down")
+
+        agentic._start_ado_push("t2", push())
+        result = await agentic._join_ado_push({"ado_task_id": "t2"})
+
+        assert result["ado_results"] == {"status": "failed", "error": "ADO down"}
+
+    @pytest.mark.asyncio
+    async def test_join_in_another_process(self, agentic):
+        """Test a run resumed where the push did not run still gets its recorded outcome."""
+        async def push():
+            return _push_result(created=2)
+
+        agentic._start_ado_push("t4", push())
+        await asyncio.sleep(0.01)
+        # Finished pushes leave nothing in process memory, as for a run resumed elsewhere
+        assert "t4" not in agentic._ADO_PUSH_TASKS
+
+        result = await agentic._join_ado_push({"ado_task_id": "t4"})
+
+        assert result["ado_results"]["status"] == "completed"
+        assert "2 work items created" in result["messages"][0].content
+
+    @pytest.mark.asyncio
+    async def test_join_without_push(self, agentic):
+        """Test runs that never pushed, or whose push outcome was lost, join cleanly."""
+        assert await agentic._join_ado_push({}) == {}
+        result = await agentic._join_ado_push({"ado_task_id": "missing"})
+        assert result["ado_results"] == {"status": "unknown"}
+
+    @pytest.mark.asyncio
+    async def test_failed_run_joins_push(self, agentic):
+        """Test a run stopped after ado_push still awaits and reports the push."""
+        async def push():
+            await asyncio.sleep(0.01)
+            return _push_result()
+
+        agentic._start_ado_push("t3", push())
+        result = await _node(agentic, "failed").ainvoke({"ado_task_id": "t3"})
+
+        assert "t3" not in agentic._ADO_PUSH_TASKS
+        assert result["current_stage"] == "failed"
+        assert result["ado_results"]["status"] == "completed"
+        assert [m.content for m in result["messages"]][-1] == "❌ Pipeline stopped."
+
+    @pytest.mark.asyncio
+    async def test_push_work_items_links_stories_to_epics(self, agentic):
+        """Test epics are created first and stories get the new epic id as parent."""
+        client = FakeAdoClient()
+        result = await agentic._push_work_items(
+            client,
+            [{"title": "Login"}, {"id": "E2", "title": "Billing"}],
+            [{"title": "Sign in", "epic": "Login"}, {"title": "Pay", "epic_id": "E2"}, {"title": "Orphan"}],
+        )
+
+        assert [[i["title"] for i in batch] for batch in client.batches] == [["Login", "Billing"], ["Sign in", "Pay", "Orphan"]]
+        assert [i["parent_id"] for i in client.batches[1]] == [100, 101, None]
+        assert result["epics"]["created"] == 2
+        assert result["stories"]["created"] == 3
+
+    @pytest.mark.asyncio
+    async def test_push_work_items_falls_back_to_mcp(self, agentic):
+        """Test a client without REST batch access creates items over MCP instead."""
+        client = FakeAdoClient(batch=False)
+        result = await agentic._push_work_items(client, [{"title": "Login"}], [])
+
+        assert client.batches == [[{"work_item_type": "Epic", "title": "Login", "description": ""}]]
+        assert (result["epics"]["created"], result["epics"]["failed"]) == (1, 0)
+        assert result["stories"]["created"] == 0
+
+
+class TestParsers:
+    """Tests for parsing agent replies into stage outputs."""
+
+    def test_parsers_extract_stage_outputs(self, agentic):
+        """Test bare and fenced JSON replies map onto their state keys."""
+        assert agentic.parse_requirements('{"functional": []}') == {"requirements": {"functional": []}}
+        assert agentic.parse_requirements("no json") == {"requirements": {"raw": "no json"}}
+        reply = 'Here:\n```json\n{"epics": [{"title": "E"}], "stories": []}\n```'
+        assert agentic.parse_work_items(reply) == {"epics": [{"title": "E"}], "user_stories": []}
+        assert agentic.parse_code('{"files": []}') == {}
+
+    def test_cached_result_is_not_shared(self, agentic):
+        """Test editing a parsed result in place does not change the next parse of the same reply."""
+        reply = '{"files": [{"path": "app.py", "content": "x"}]}'
+        first = agentic.parse_code(reply)
+        first["code_artifacts"]["files"].append({"path": "extra.py"})
+        first["code_artifacts"]["files"][0]["content"] = "edited"
+
+        assert agentic.parse_code(reply) == {"code_artifacts": {"files": [{"path": "app.py", "content": "x"}]}}
+
+
+class FakeStageAgent:
+    """AgentNode stand-in that counts its LLM runs."""
+
+    name = "architect"
+    prompt = "Design the architecture."
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, state, prompt=None):
+        self.calls += 1
+        return {
+            "architecture": {"components": [f"v{self.calls}"]},
+            "context_window_start": "m1",
+            "messages": [AIMessage(content=f"answer {self.calls}")],
+        }
+
+
+class TestRunCached:
+    """Tests for reusing stage results when the stage inputs are unchanged."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self, agentic):
+        agentic._LLM_CACHE.clear()
+
+    @pytest.mark.asyncio
+    async def test_not_cached_unless_enabled(self, agentic, monkeypatch):
+        """Test a revise calls the LLM again when SDLC_LLM_CACHE is off."""
+        monkeypatch.setattr(agentic, "LLM_CACHE_ENABLED", False)
+        agent = FakeStageAgent()
+        await agentic._run_cached(agent, {}, requirements="r")
+        await agentic._run_cached(agent, {}, requirements="r")
+        assert agent.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_unchanged_inputs_reuse_result(self, agentic, monkeypatch):
+        """Test identical inputs reuse the stage output and replay the answer as a new message."""
+        monkeypatch.setattr(agentic, "LLM_CACHE_ENABLED", True)
+        agent = FakeStageAgent()
+        prompt = HumanMessage(content="Design it")
+        await agentic._run_cached(agent, {}, prompt, requirements="r")
+        result = await agentic._run_cached(agent, {}, prompt, requirements="r")
+
+        assert agent.calls == 1
+        assert result["architecture"] == {"components": ["v1"]}
+        assert "context_window_start" not in result
+        assert [m.content for m in result["messages"]] == ["Design it", "answer 1"]
+
+        await agentic._run_cached(agent, {}, prompt, requirements="changed")
+        assert agent.calls == 2
+
+
+class TestRouting:
+    """Tests for routing after human approval."""
+
+    def test_stage_flow_targets_graph_nodes(self, agentic):
+        """Test every approved stage moves on to a node that exists in the graph."""
+        nodes = set(agentic.build_graph().builder.nodes)
+        for stage, target in agentic._STAGE_FLOW.items():
+            assert agentic.route_after_approval({"current_stage": stage, "human_feedback": "approve"}) == target
+            assert target in nodes, stage
+        assert "test_plan" not in agentic._STAGE_FLOW
+
+    def test_revise_and_reject(self, agentic):
+        """Test revise loops back to the stage and anything else fails the run."""
+        assert agentic.route_after_approval({"current_stage": "architecture", "human_feedback": "revise"}) == "architecture"
+        assert agentic.route_after_approval({"current_stage": "architecture", "human_feedback": "nope"}) == "failed"
+
+
+class TestCodeArtifacts:
+    """Tests for keeping generated code on disk between development and github_push."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("node", ["completed", "failed"])
+    async def test_run_end_keeps_artifact(self, agentic, node, monkeypatch, tmp_path):
+        """Test a run that ends without pushing (e.g. skipped at the confirm step) keeps its code."""
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path))
+        code = {"files": [{"path": "app.py", "content": "x"}]}
+        ref = store_artifact(code)
+
+        result = await _node(agentic, node).ainvoke({"code_artifacts": ref})
+
+        assert "code_artifacts" not in result
+        assert load_artifact(ref) == code
+
+    @pytest.mark.asyncio
+    async def test_development_to_github_push_round_trip(self, agentic, monkeypatch, tmp_path):
+        """Test the code stored by development is what github_push pushes, then deletes."""
+        files = [{"path": "app.py", "content": "print('hi')"}, {"path": "README.md", "content": "# App"}]
+
+        class FakeDeveloper:
+            name = "developer"
+
+            async def __call__(self, state, prompt=None):
+                return {"code_artifacts": {"files": files}, "messages": [AIMessage(content="done")]}
+
+        class FakeGitHub:
+            def __init__(self):
+                self.calls = []
+
+            async def call_tool(self, name, args):
+                self.calls.append((name, args))
+                return {"full_name": "me/app"} if name == "get_repository" else {}
+
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path))
+        monkeypatch.setattr(agentic, "developer_agent", FakeDeveloper())
+        github = FakeGitHub()
+        monkeypatch.setattr(agentic, "_github_client", github)
+
+        developed = await _node(agentic, "development").ainvoke({"architecture": {}})
+        handle = developed["code_artifacts"]
+        assert is_artifact_ref(handle)
+        assert load_artifact(handle) == {"files": files}
+
+        result = await _node(agentic, "github_push").ainvoke({
+            "code_artifacts": handle,
+            "project_name": "app",
+            "github_inputs": {"owner": "me"},
+        })
+
+        pushed = [args["files"] for name, args in github.calls if name == "push_files"]
+        assert pushed == [files]
+        assert "Files: 2" in result["messages"][0].content
+        assert result["code_artifacts"] is None
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_github_push_fails_on_missing_artifact(self, agentic, monkeypatch, tmp_path):
+        """Test a lost artifact stops the push instead of reporting that there were no files."""
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path))
+        ref = store_artifact({"files": [{"path": "app.py", "content": "x"}]})
+        delete_artifact(ref)
+
+        with pytest.raises(FileNotFoundError):
+            await _node(agentic, "github_push").ainvoke({"code_artifacts": ref, "project_name": "app"})
+
+
+    @pytest.mark.asyncio
+    async def test_github_push_skips_malformed_file_entries(self, agentic, monkeypatch):
+        """Test entries that are not file dicts (parser fallback output) are skipped, not fatal."""
+        class FakeGitHub:
+            def __init__(self):
+                self.pushed = []
+
+            async def call_tool(self, name, args):
+                if name == "push_files":
+                    self.pushed.extend(args["files"])
+                return {"full_name": "me/app"} if name == "get_repository" else {}
+
+        github = FakeGitHub()
+        monkeypatch.setattr(agentic, "_github_client", github)
+        files = ["app.py", None, {"path": "main.py", "content": "x"}]
+
+        result = await _node(agentic, "github_push").ainvoke({
+            "code_artifacts": {"files": files},
+            "project_name": "app",
+        })
+
+        assert github.pushed == [{"path": "main.py", "content": "x"}]
+        assert "Files: 1" in result["messages"][0].content
+
+class TestMessageWindow:
+    """Tests for the history window and pruning sent to the LLM."""
+
+    @staticmethod
+    def _history():
+        return [
+            SystemMessage(content="system"),
+            HumanMessage(content="a" * 400, id="h1"),
+            AIMessage(content="b" * 400, id="a1"),
+            HumanMessage(content="c" * 40, id="h2"),
+            AIMessage(content="d" * 40, id="a2"),
+        ]
+
+    def test_window_keeps_start_under_budget(self, agentic, monkeypatch):
+        """Test the window start stays put while the history fits twice the budget."""
+        monkeypatch.setattr(agentic, "MAX_CONTEXT_TOKENS", 10_000)
+        messages = self._history()
+
+        assert agentic._window_start(messages, None) == 1
+        assert agentic._window_start(messages, "h2") == 3
+        assert agentic._window_start(messages, "gone") == 1
+
+    def test_window_moves_to_human_turn_over_budget(self, agentic, monkeypatch):
+        """Test an oversized window is cut back to the budget, starting on a human message."""
+        monkeypatch.setattr(agentic, "MAX_CONTEXT_TOKENS", 50)
+
+        assert agentic._window_start(self._history(), None) == 3
+
+    def test_prune_zones(self, agentic):
+        """Test recent messages stay verbatim, older ones are masked and the oldest dropped."""
+        messages = [
+            SystemMessage(content="system"),
+            HumanMessage(content="h" * 8000),
+            AIMessage(content="", tool_calls=[{"name": "t", "args": {"q": "a" * 400}, "id": "t1"}]),
+            ToolMessage(content="x" * 2000, tool_call_id="t1"),
+            HumanMessage(content="previous turn"),
+            AIMessage(content="y" * 400),
+            HumanMessage(content="z" * 2000),
+        ]
+
+        pruned = agentic.prune_messages(messages, budget=2000)
+
+        assert pruned[0] is messages[0]
+        assert pruned[1].content == "[truncated 1 earlier messages]"
+        assert pruned[2].tool_calls[0]["args"] == {"args": "[pruned]"}
+        assert pruned[3].content == "[pruned]"
+        assert pruned[4:] == messages[4:]
+
+    def test_prune_never_starts_on_orphaned_tool_result(self, agentic):
+        """Test tool results are dropped along with the tool call they answer."""
+        messages = [
+            SystemMessage(content="system"),
+            AIMessage(content="", tool_calls=[{"name": "t", "args": {"q": "a" * 8000}, "id": "t1"}]),
+            ToolMessage(content="ok", tool_call_id="t1"),
+            HumanMessage(content="now"),
+        ]
+
+        pruned = agentic.prune_messages(messages, budget=100)
+
+        assert [m.content for m in pruned] == ["system", "[truncated 2 earlier messages]", "now"]
+
+
+class FakeStreamingLLM:
+    """Bound-LLM stand-in that streams two tool calls, then answers."""
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.started_while_streaming = None
+
+    async def astream(self, messages):
+        yield AIMessageChunk(content="", tool_call_chunks=[
+            {"name": "record", "args": '{"label": "first"}', "id": "c1", "index": 0},
+        ])
+        yield AIMessageChunk(content="", tool_call_chunks=[
+            {"name": "record", "args": '{"label": "second"}', "id": "c2", "index": 1},
+        ])
+        await asyncio.sleep(0.05)  # still streaming: give the started tool call time to run
+        self.started_while_streaming = list(self.calls)
+
+    async def ainvoke(self, messages):
+        return AIMessage(content="all done")
+
+
+class TestAgentNode:
+    """Tests for running a stage agent."""
+
+    @pytest.mark.asyncio
+    async def test_tool_calls_start_while_streaming(self, agentic):
+        """Test a completed tool call runs before the reply finishes streaming, and only once."""
+        calls = []
+
+        @tool
+        async def record(label: str) -> str:
+            """Record a label."""
+            calls.append(label)
+            return label
+
+        node = agentic.AgentNode("streaming_test", "system", [record])
+        node._bound = llm = FakeStreamingLLM(calls)
+
+        result = await node({"messages": []}, HumanMessage(content="go"))
+
+        assert llm.started_while_streaming == ["first"]
+        assert calls == ["first", "second"]
+        contents = [m.content for m in result["messages"]]
+        assert contents[0] == "go"
+        assert contents[2:] == ["first", "second", "all done"]
+        assert [m.tool_call_id for m in result["messages"][2:4]] == ["c1", "c2"]
+
+    @pytest.mark.asyncio
+    async def test_failed_stream_cancels_started_tool_calls(self, agentic):
+        """Test tool calls started from a reply that then fails are cancelled, not left running."""
+        events = []
+
+        @tool
+        async def write(label: str) -> str:
+            """Write a label."""
+            events.append("started")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                events.append("cancelled")
+                raise
+            return label
+
+        class FailingLLM:
+            async def astream(self, messages):
+                yield AIMessageChunk(content="", tool_call_chunks=[
+                    {"name": "write", "args": '{"label": "a"}', "id": "c1", "index": 0},
+                ])
+                yield AIMessageChunk(content="", tool_call_chunks=[
+                    {"name": "write", "args": '{"label": "b"}', "id": "c2", "index": 1},
+                ])
+                await asyncio.sleep(0.05)
+                raise ConnectionError("stream dropped")
+
+        node = agentic.AgentNode("failing_test", "system", [write])
+        node._bound = FailingLLM()
+
+        with pytest.raises(ConnectionError):
+            await node({"messages": []}, HumanMessage(content="go"))
+        assert events == ["started", "cancelled"]
+
+    @pytest.mark.asyncio
+    async def test_empty_stream_falls_back_to_invoke(self, agentic):
+        """Test a stream without chunks still produces the reply."""
+        class EmptyStreamLLM:
+            async def astream(self, messages):
+                return
+                yield
+
+            async def ainvoke(self, messages):
+                return AIMessage(content="answer")
+
+        node = agentic.AgentNode("empty_test", "system", [])
+        node._bound = EmptyStreamLLM()
+
+        result = await node({"messages": []}, HumanMessage(content="go"))
+
+        assert [m.content for m in result["messages"]] == ["go", "answer"]
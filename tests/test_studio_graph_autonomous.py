@@ -0,0 +1,1048 @@
+"""Tests for the autonomous LangGraph Studio pipeline helpers."""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import TypedDict
+
+from src import studio_graph_autonomous as autonomous
+from src.artifact_store import is_artifact_ref, load_artifact, store_artifact
+from src.mcp_client.ado_client import AzureDevOpsMCPClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeClient:
+    """MCP client stub that records calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def call_tool(self, tool_name, arguments):
+        self.calls.append((tool_name, arguments))
+        return {"tool": tool_name, "args": arguments}
+
+
+class TestToolWrapperCache:
+    """Tests for reusing converted LangChain tool wrappers."""
+
+    def test_unchanged_definition_reuses_wrapper(self):
+        """Test the same client and tool definition return the cached wrapper."""
+        client = FakeClient()
+        tool_def = {"name": "list_branches", "description": "List branches"}
+        first = autonomous._create_langchain_tool(tool_def, client, "github")
+        assert autonomous._create_langchain_tool(dict(tool_def), client, "github") is first
+
+    def test_changed_definition_rebuilds_wrapper(self):
+        """Test a changed tool definition produces a new wrapper."""
+        client = FakeClient()
+        first = autonomous._create_langchain_tool({"name": "list_branches"}, client, "github")
+        second = autonomous._create_langchain_tool(
+            {"name": "list_branches", "description": "List branches"}, client, "github"
+        )
+        assert second is not first
+        assert second.description == "[GITHUB] List branches"
+
+    @pytest.mark.asyncio
+    async def test_wrapper_uses_mcp_input_schema(self):
+        """Test the LLM sees the MCP parameters and invoke passes them through."""
+        input_schema = {"type": "object", "properties": {"id": {"type": "integer"}}, "required": ["id"]}
+        client = FakeClient()
+        lc_tool = autonomous._create_langchain_tool(
+            {"name": "wit_get_work_item", "inputSchema": input_schema}, client, "ado"
+        )
+
+        assert convert_to_openai_tool(lc_tool)["function"]["parameters"] == input_schema
+        await lc_tool.ainvoke({"id": 7})
+        assert client.calls == [("wit_get_work_item", {"id": 7})]
+
+
+class TestToolResultCache:
+    """Tests for caching read-only MCP tool results."""
+
+    def setup_method(self):
+        autonomous.clear_tool_cache()
+
+    def test_read_only_detection(self):
+        """Test tool names are classified by their verbs."""
+        assert autonomous._is_read_only_tool("wit_get_work_item")
+        assert autonomous._is_read_only_tool("list_branches")
+        assert not autonomous._is_read_only_tool("wit_create_work_item")
+        assert not autonomous._is_read_only_tool("push_files")
+
+    @pytest.mark.asyncio
+    async def test_read_only_results_are_cached_per_args(self):
+        """Test identical reads hit the cache and different args do not."""
+        client = FakeClient()
+        get_item = autonomous._create_langchain_tool({"name": "wit_get_work_item"}, client, "ado").coroutine
+
+        await get_item(id=1)
+        await get_item(id=1)
+        await get_item(id=2)
+
+        assert client.calls == [("wit_get_work_item", {"id": 1}), ("wit_get_work_item", {"id": 2})]
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_cache(self):
+        """Test a write tool clears cached reads."""
+        client = FakeClient()
+        get_item = autonomous._create_langchain_tool({"name": "wit_get_work_item"}, client, "ado").coroutine
+        create_item = autonomous._create_langchain_tool({"name": "wit_create_work_item"}, client, "ado").coroutine
+
+        await get_item(id=1)
+        await create_item(title="Story")
+        await get_item(id=1)
+
+        assert [name for name, _ in client.calls].count("wit_get_work_item") == 2
+
+    @pytest.mark.asyncio
+    async def test_no_cache_hint_skips_cache(self):
+        """Test results marked _meta.cache_hint=no-cache are fetched every time."""
+        class NoCacheClient(FakeClient):
+            async def call_tool(self, tool_name, arguments):
+                result = await super().call_tool(tool_name, arguments)
+                return {**result, "_meta": {"cache_hint": "no-cache"}}
+
+        client = NoCacheClient()
+        get_item = autonomous._create_langchain_tool({"name": "wit_get_work_item"}, client, "ado").coroutine
+
+        await get_item(id=1)
+        await get_item(id=1)
+
+        assert len(client.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_dict_results_are_compact_json(self):
+        """Test dict results are serialized without indentation."""
+        get_item = autonomous._create_langchain_tool({"name": "wit_get_work_item"}, FakeClient(), "ado").coroutine
+        output = await get_item(id=1)
+        assert output == '{"tool":"wit_get_work_item","args":{"id":1}}'
+
+    @pytest.mark.asyncio
+    async def test_inflight_calls_are_bounded_per_client(self, monkeypatch):
+        """Test concurrent tool calls to one client respect MCP_MAX_INFLIGHT."""
+        inflight = []
+        peak = []
+
+        class SlowServer(FakeClient):
+            async def call_tool(self, tool_name, arguments):
+                inflight.append(1)
+                peak.append(len(inflight))
+                await asyncio.sleep(0.01)
+                inflight.pop()
+                return {}
+
+        monkeypatch.setattr(autonomous, "_MCP_MAX_INFLIGHT", 2)
+        monkeypatch.setattr(autonomous, "_client_semaphores", weakref.WeakKeyDictionary())
+        create_branch = autonomous._create_langchain_tool({"name": "create_branch"}, SlowServer(), "github").coroutine
+
+        await asyncio.gather(*(create_branch(branch=f"b{i}") for i in range(6)))
+
+        assert max(peak) == 2
+
+    def test_semaphores_dropped_with_their_loop(self, monkeypatch):
+        """Test a closed loop's semaphores are released instead of accumulating per loop."""
+        monkeypatch.setattr(autonomous, "_client_semaphores", weakref.WeakKeyDictionary())
+        client = FakeClient()
+
+        async def contend():
+            # Make the semaphore wait, which binds it to (and references) this loop
+            sem = autonomous._client_semaphore(client)
+            holders = [asyncio.create_task(sem.acquire()) for _ in range(autonomous._MCP_MAX_INFLIGHT + 1)]
+            await asyncio.sleep(0)
+            for _ in range(autonomous._MCP_MAX_INFLIGHT):
+                sem.release()
+            await asyncio.gather(*holders)
+
+        for _ in range(3):
+            asyncio.run(contend())
+
+        assert len(autonomous._client_semaphores) <= 1
+
+
+class TestParallelStages:
+    """Tests for running the test plan and architecture agents together."""
+
+    @pytest.mark.asyncio
+    async def test_orchestrator_fans_out_after_work_items(self):
+        """Test that both missing mid-pipeline stages are dispatched together."""
+        state = {"requirements": {}, "work_items": {}}
+        result = await autonomous.orchestrator_node(state)
+        assert result["current_agent"] == "plan_and_architecture"
+
+        result = await autonomous.orchestrator_node({**state, "test_plan_complete": True})
+        assert result["current_agent"] == "architecture"
+
+    def test_stage_table_follows_pipeline_order(self):
+        """Test the completion-mask table picks the first missing stage."""
+        assert autonomous._NEXT_STAGE[0][0] == "requirements"
+        assert autonomous._NEXT_STAGE[0b00011][0] == "plan_and_architecture"
+        assert autonomous._NEXT_STAGE[0b01011][0] == "test_plan"
+        assert autonomous._NEXT_STAGE[0b01111][0] == "development"
+        assert autonomous._NEXT_STAGE[0b11111][0] == "complete"
+        # A missing earlier stage wins over later ones
+        assert autonomous._NEXT_STAGE[0b11110][0] == "requirements"
+
+    @pytest.mark.asyncio
+    async def test_outputs_are_merged(self, monkeypatch):
+        """Test that list outputs are concatenated and a revise targets architecture."""
+        async def test_plan(state):
+            return {"test_plan_complete": True, "messages": [{"role": "qa"}]}
+
+        async def architecture(state):
+            return {"architecture": {}, "requires_approval": True, "messages": [{"role": "architect"}]}
+
+        monkeypatch.setattr(autonomous, "test_plan_agent_node", test_plan)
+        monkeypatch.setattr(autonomous, "architecture_agent_node", architecture)
+
+        result = await autonomous.plan_and_architecture_node({})
+
+        assert result["messages"] == [{"role": "qa"}, {"role": "architect"}]
+        assert result["test_plan_complete"] and result["requires_approval"]
+        assert result["current_agent"] == "architecture"
+
+
+class TestAgentCache:
+    """Tests for building each DeepAgent once per tool set."""
+
+    def test_agent_is_built_once_and_cloned(self, monkeypatch):
+        """Test repeated factory calls share one built agent via clones."""
+        monkeypatch.setattr(autonomous, "_agent_cache", {})
+        first = autonomous.create_requirements_agent()
+        built = autonomous._agent_cache["create_requirements_agent"][1]
+        second = autonomous.create_requirements_agent()
+        assert first is not second
+        assert autonomous._agent_cache["create_requirements_agent"][1] is built
+        assert first.objective == second.objective == built.objective
+
+    def test_agents_use_their_models(self, monkeypatch):
+        """Test templated tool agents default to the small model and env overrides apply."""
+        monkeypatch.setattr(autonomous, "_agent_cache", {})
+        monkeypatch.setenv("SDLC_MODEL_ARCHITECTURE", "o1")
+        assert autonomous.create_work_items_agent().model_name == "gpt-4o-mini"
+        assert autonomous.create_requirements_agent().model_name == "gpt-4o"
+        assert autonomous.create_architecture_agent().model_name == "o1"
+
+    def test_tool_change_rebuilds_agent(self, monkeypatch):
+        """Test a new MCP tool list rebuilds the cached agent."""
+        monkeypatch.setattr(autonomous, "_agent_cache", {})
+        autonomous.create_requirements_agent()
+        built = autonomous._agent_cache["create_requirements_agent"][1]
+        monkeypatch.setattr(autonomous, "_langchain_tools_cache", [object()])
+        autonomous.create_requirements_agent()
+        assert autonomous._agent_cache["create_requirements_agent"][1] is not built
+
+
+    def test_clear_agent_cache_rebuilds(self, monkeypatch):
+        """Test clearing the cache rebuilds the agent with the current model setting."""
+        monkeypatch.setattr(autonomous, "_agent_cache", {})
+        assert autonomous.create_requirements_agent().model_name == "gpt-4o"
+        monkeypatch.setenv("SDLC_MODEL_REQUIREMENTS", "gpt-4o-mini")
+        assert autonomous.create_requirements_agent().model_name == "gpt-4o"
+
+        autonomous.clear_agent_cache()
+        assert autonomous.create_requirements_agent().model_name == "gpt-4o-mini"
+
+
+class FakeAgent:
+    """DeepAgent stub that counts executions."""
+
+    def __init__(self, tools=(), decision="complete"):
+        self.role = "Tester"
+        self.objective = "Test"
+        self.tools = list(tools)
+        self.decision = decision
+        self.calls = 0
+
+    async def execute(self, task):
+        self.calls += 1
+        return {"status": "completed", "output": task, "decision": {"type": self.decision}}
+
+
+class TestCachedExecute:
+    """Tests for reusing agent results for repeated tasks."""
+
+    @pytest.fixture(autouse=True)
+    def llm_cache(self, monkeypatch):
+        monkeypatch.setattr(autonomous, "LLM_CACHE_ENABLED", True)
+        autonomous._execute_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_not_cached_unless_enabled(self, monkeypatch):
+        """Test identical tasks run every time when SDLC_LLM_CACHE is off."""
+        monkeypatch.setattr(autonomous, "LLM_CACHE_ENABLED", False)
+        agent = FakeAgent()
+        await autonomous.cached_execute(agent, "Generate requirements")
+        await autonomous.cached_execute(agent, "Generate requirements")
+        assert agent.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_repeated_task_is_cached(self):
+        """Test a task differing only in case and whitespace hits the cache."""
+        agent = FakeAgent()
+        await autonomous.cached_execute(agent, "Generate requirements for: todo app")
+        result = await autonomous.cached_execute(agent, "generate  requirements for: Todo app ")
+        assert agent.calls == 1
+        assert result["output"] == "Generate requirements for: todo app"
+
+    @pytest.mark.asyncio
+    async def test_agents_with_tools_always_execute(self):
+        """Test agents that can call MCP tools are never cached."""
+        agent = FakeAgent(tools=[object()])
+        await autonomous.cached_execute(agent, "Create work items")
+        await autonomous.cached_execute(agent, "Create work items")
+        assert agent.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_approval_requests_are_not_cached(self):
+        """Test results that ask for human approval are regenerated."""
+        agent = FakeAgent(decision="request_approval")
+        await autonomous.cached_execute(agent, "Design architecture")
+        await autonomous.cached_execute(agent, "Design architecture")
+        assert agent.calls == 2
+
+
+class FakeAdoClient(FakeClient):
+    """ADO client stub with batch work item creation."""
+
+    def __init__(self, has_pat=True):
+        super().__init__()
+        self.has_pat = has_pat
+        self.batches = []
+
+    async def create_work_items_batch(self, items, project=None):
+        if not self.has_pat:
+            raise RuntimeError("no PAT")
+        self.batches.append((items, project))
+        return [{"id": 100 + i} for i in range(len(items))]
+
+    async def bulk_create_work_items(self, items, project=None):
+        return [{"text": f'{{"id": {200 + i}}}'} for i in range(len(items))]
+
+
+class TestBatchWorkItems:
+    """Tests for batching ADO work item and test case creation."""
+
+    @pytest.mark.asyncio
+    async def test_batch_tool_creates_items_in_one_request(self):
+        """Test the batch tool sends all work items in one $batch call."""
+        client = FakeAdoClient()
+        batch_tool = autonomous._create_batch_work_items_tool(client)
+        output = await batch_tool.coroutine(
+            project="testingmcp",
+            work_items=[{"workItemType": "Epic", "title": "Portal"}, {"title": "Login"}],
+        )
+        items, project = client.batches[0]
+        assert project == "testingmcp"
+        assert [i["work_item_type"] for i in items] == ["Epic", "Issue"]
+        assert output == '[{"id": 100}, {"id": 101}]'
+
+    @pytest.mark.asyncio
+    async def test_batch_tool_links_issues_to_epics(self):
+        """Test items naming an in-call parent are created after it, under its new id."""
+        client = FakeAdoClient()
+        batch_tool = autonomous._create_batch_work_items_tool(client)
+        output = await batch_tool.coroutine(
+            project="testingmcp",
+            work_items=[
+                {"workItemType": "Epic", "title": "Portal"},
+                {"title": "Login", "parentIndex": 0},
+                {"title": "Audit", "parentId": 7},
+            ],
+        )
+        assert [[i["title"] for i in items] for items, _ in client.batches] == [["Portal", "Audit"], ["Login"]]
+        assert [i["parent_id"] for i in client.batches[0][0]] == [None, 7]
+        assert client.batches[1][0][0]["parent_id"] == 100
+        # Results keep the order of work_items
+        assert output == '[{"id": 100}, {"id": 100}, {"id": 101}]'
+
+    @pytest.mark.asyncio
+    async def test_batch_tool_parent_reaches_batch_body(self, monkeypatch):
+        """Test the epic's new id is sent as the issue's parent relation in the $batch request."""
+        monkeypatch.setenv("ADO_MCP_AUTH_TOKEN", "pat")
+        client = AzureDevOpsMCPClient(organization="org", project="proj")
+        responses = [MagicMock(status_code=200), MagicMock(status_code=200)]
+        responses[0].json.return_value = {"value": [{"code": 200, "body": '{"id": 41}'}]}
+        responses[1].json.return_value = {"value": [{"code": 200, "body": '{"id": 42}'}]}
+        batch_tool = autonomous._create_batch_work_items_tool(client)
+
+        with patch("httpx.AsyncClient.post", new=AsyncMock(side_effect=responses)) as post:
+            await batch_tool.coroutine(
+                project="proj",
+                work_items=[{"workItemType": "Epic", "title": "Portal"}, {"title": "Login", "parentIndex": 0}],
+            )
+
+        story_request = post.await_args_list[1].kwargs["json"][0]
+        relation = next(op for op in story_request["body"] if op["path"] == "/relations/-")
+        assert relation["value"]["rel"] == "System.LinkTypes.Hierarchy-Reverse"
+        assert relation["value"]["url"].endswith("/workItems/41")
+
+    @pytest.mark.asyncio
+    async def test_batch_tool_falls_back_without_pat(self):
+        """Test the batch tool uses MCP creates when the REST API is unavailable."""
+        batch_tool = autonomous._create_batch_work_items_tool(FakeAdoClient(has_pat=False))
+        output = await batch_tool.coroutine(project="testingmcp", work_items=[{"title": "Login"}])
+        assert "200" in output
+
+    @pytest.mark.asyncio
+    async def test_test_cases_added_to_suite_in_one_call(self):
+        """Test created test cases are added to the suite with a single call."""
+        client = FakeClient()
+
+        async def call_tool(tool_name, arguments, timeout=None):
+            client.calls.append((tool_name, arguments))
+            return {}
+
+        client.call_tool = call_tool
+        failed = await autonomous._add_test_cases_to_suite(client, "testingmcp", 1, 2, [11, 12, 13])
+
+        assert failed == []
+        assert len(client.calls) == 1
+        assert client.calls[0][1]["testCaseIds"] == "11,12,13"
+
+    @pytest.mark.asyncio
+    async def test_test_cases_created_concurrently(self):
+        """Test per-work-item test cases are generated and created concurrently, in order."""
+        class FakeLLM:
+            async def ainvoke(self, prompt):
+                await asyncio.sleep(0.1)
+                return type("Response", (), {"content": "TEST_TITLE: Login works\nTEST_STEPS:\n1. Open|Shown"})()
+
+        client = FakeClient()
+
+        async def call_tool(tool_name, arguments, timeout=None):
+            client.calls.append((tool_name, arguments))
+            return {"id": 1000 + arguments.get("tests_work_item_id", 0)}
+
+        client.call_tool = call_tool
+        work_items = [{"id": i, "title": f"Story {i}"} for i in range(1, 6)]
+
+        start = time.monotonic()
+        created, failed = await autonomous._create_test_cases_with_llm(
+            client, FakeLLM(), work_items, "testingmcp", 1, 2
+        )
+
+        assert time.monotonic() - start < 0.3
+        assert failed == []
+        assert [c["test_case_id"] for c in created] == [1001, 1002, 1003, 1004, 1005]
+        assert client.calls[-1][0] == "testplan_add_test_cases_to_suite"
+
+    @pytest.mark.asyncio
+    async def test_direct_test_cases_created_concurrently(self):
+        """Test the direct fallback creates test cases concurrently, in order, skipping test cases."""
+        client = FakeClient()
+
+        async def call_tool(tool_name, arguments, timeout=None):
+            client.calls.append((tool_name, arguments))
+            await asyncio.sleep(0.1)
+            return {"id": 1000 + arguments.get("tests_work_item_id", 0)}
+
+        client.call_tool = call_tool
+        work_items = [{"id": i, "title": f"Story {i}"} for i in range(1, 5)]
+        work_items.append({"id": 5, "title": "Login", "work_item_type": "Test Case"})
+
+        start = time.monotonic()
+        created, failed = await autonomous._create_test_cases_directly(client, work_items, "testingmcp", 1, 2)
+
+        assert time.monotonic() - start < 0.3
+        assert failed == []
+        assert [c["test_case_id"] for c in created] == [1001, 1002, 1003, 1004]
+        assert client.calls[-1][0] == "testplan_add_test_cases_to_suite"
+
+    def test_test_title_prefix(self):
+        """Test direct-fallback titles are categorized by type, then the first matching keyword."""
+        assert autonomous._test_title_prefix("Epic", "REST API") == "End-to-End Integration Test"
+        assert autonomous._test_title_prefix("Issue", "OAuth REST endpoint") == "API Functional Test"
+        assert autonomous._test_title_prefix("Issue", "Build Pipeline") == "UI/UX Functional Test"
+        assert autonomous._test_title_prefix("Issue", "Azure KYC") == "Integration Test"
+        assert autonomous._test_title_prefix("Issue", "Login page") == "Functional Test"
+
+    @pytest.mark.asyncio
+    async def test_work_item_details_fetched_concurrently(self):
+        """Test work item details are fetched concurrently, in order, skipping test cases and errors."""
+        client = FakeClient()
+        types = {1: "User Story", 2: "Test Case", 3: "Task", 4: "Issue"}
+
+        async def get_work_item(work_item_id):
+            await asyncio.sleep(0.1)
+            if work_item_id == 4:
+                raise RuntimeError("not found")
+            return {"fields": {"System.Title": f"Item {work_item_id}", "System.WorkItemType": types[work_item_id]}}
+
+        client.get_work_item = get_work_item
+
+        start = time.monotonic()
+        details = await autonomous._fetch_work_item_details(client, [1, 2, 3, 4])
+
+        assert time.monotonic() - start < 0.3
+        assert [(d["id"], d["work_item_type"]) for d in details] == [(1, "User Story"), (3, "Task")]
+
+
+class TestWorkItemIds:
+    """Tests for recovering created work item IDs."""
+
+    def test_ids_extracted_from_tool_calls_in_order(self):
+        """Test batch and single create results yield IDs in creation order, without duplicates."""
+        tool_calls = [
+            {"tool": "ado_wit_batch_create_work_items", "result": {"text": '[{"id": 12}, {"text": "{\\"id\\": 11}"}]'}},
+            {"tool": "mcp_ado_wit_create_work_item", "result": {"text": '{"id": 13, "fields": {}}'}},
+            {"tool": "ado_wit_create_work_item", "result": {"text": 'Created: {"id": 12, "rev": 1'}},
+            {"tool": "ado_wit_create_work_item", "result": {"id": 14}},
+            {"tool": "ado_wit_get_work_item", "result": {"text": '{"id": 99}'}},
+        ]
+        assert autonomous.extract_work_item_ids(tool_calls) == [12, 11, 13, 14]
+
+    def test_ids_parsed_from_output(self):
+        """Test output fallback finds edit URLs and ID mentions, deduplicated and sorted."""
+        output = (
+            "Created https://dev.azure.com/appatr/testingmcp/_workitems/edit/205 and "
+            "work item at /edit/201. Also ID: 1203, id 7 is too short."
+        )
+        assert autonomous.parse_work_item_ids(output) == [201, 205, 1203]
+        assert autonomous.parse_work_item_ids("") == []
+
+
+class TestTestPlanWorkItems:
+    """Tests for choosing the work items the test plan agent covers."""
+
+    @pytest.mark.asyncio
+    async def test_unfetchable_created_ids_skip_wiql(self, monkeypatch):
+        """Test created IDs that can't be fetched end the node instead of querying the whole project."""
+        client = FakeClient()
+
+        async def get_work_item(work_item_id):
+            raise RuntimeError("not found")
+
+        client.get_work_item = get_work_item
+        monkeypatch.setattr(autonomous, "get_ado_client", lambda: client)
+
+        result = await autonomous.test_plan_agent_node({"work_items": {"created_ids": [1, 2]}})
+
+        assert result["test_cases"] == []
+        assert result["errors"]
+        assert client.calls == []
+
+
+class TestScopedTools:
+    """Tests for per-agent tool scoping."""
+
+    def test_filters_by_prefix_and_reuses_schemas(self, monkeypatch):
+        """Test tools are filtered by name prefix and schemas are converted once."""
+        client = FakeClient()
+        tools = [
+            autonomous._create_langchain_tool({"name": name}, client, "ado")
+            for name in ("wit_create_work_item", "testplan_create_test_case")
+        ]
+        monkeypatch.setattr(autonomous, "_langchain_tools_cache", tools)
+
+        scoped, schemas = autonomous.get_scoped_tools("ado_wit_")
+
+        assert [t.name for t in scoped] == ["ado_wit_create_work_item"]
+        assert schemas[0]["function"]["name"] == "ado_wit_create_work_item"
+        assert autonomous.get_scoped_tools("ado_wit_")[1] is schemas
+        assert len(autonomous.get_scoped_tools()[0]) == 2
+
+    def test_rebuilt_tool_list_gets_fresh_schemas(self, monkeypatch):
+        """Test a rebuilt tool list is not served the previous list's schemas."""
+        client = FakeClient()
+        monkeypatch.setattr(autonomous, "_tool_schema_cache", {})
+        monkeypatch.setattr(autonomous, "get_ado_client", lambda: client)
+        monkeypatch.setattr(autonomous, "get_github_client", lambda: None)
+        monkeypatch.setattr(autonomous, "get_mermaid_client", lambda: None)
+        monkeypatch.setattr(autonomous, "_tool_wrapper_cache", {})
+        client.get_tools = lambda: [{"name": "wit_get_work_item", "description": "v1"}]
+        autonomous.invalidate_tools_cache()
+        before = autonomous.get_scoped_tools("ado_wit_")[1]
+
+        client.get_tools = lambda: [{"name": "wit_get_work_item", "description": "v2"}]
+        autonomous.invalidate_tools_cache()
+        after = autonomous.get_scoped_tools("ado_wit_")[1]
+
+        assert before[0]["function"]["description"].endswith("v1")
+        assert after[0]["function"]["description"].endswith("v2")
+        autonomous.invalidate_tools_cache()
+
+    def test_schema_cache_is_bounded(self, monkeypatch):
+        """Test the schema cache evicts old tool sets."""
+        monkeypatch.setattr(autonomous, "_tool_schema_cache", {})
+        monkeypatch.setattr(autonomous, "_EXECUTE_CACHE_MAX", 2)
+        tools = [autonomous._create_langchain_tool({"name": f"wit_{i}"}, FakeClient(), "ado") for i in range(3)]
+        monkeypatch.setattr(autonomous, "_langchain_tools_cache", tools)
+
+        for i in range(3):
+            autonomous.get_scoped_tools(f"ado_wit_{i}")
+
+        assert len(autonomous._tool_schema_cache) == 2
+
+    def test_agent_scopes(self, monkeypatch):
+        """Test agents get their scoped tools and text-only agents none."""
+        client = FakeClient()
+        tools = [
+            autonomous._create_langchain_tool({"name": name}, client, client_name)
+            for name, client_name in (("wit_create_work_item", "ado"), ("create_branch", "github"))
+        ]
+        monkeypatch.setattr(autonomous, "_langchain_tools_cache", tools)
+
+        assert [t.name for t in autonomous.get_agent_tools("github")[0]] == ["github_create_branch"]
+        assert autonomous.get_agent_tools("architecture") == ([], [])
+
+
+class TestReducer:
+    """Tests for the list-append state reducer."""
+
+    def test_checkpoint_history_is_preserved(self):
+        """Test appends do not rewrite the lists of earlier checkpoints."""
+        class State(TypedDict):
+            messages: Annotated[list, autonomous.reducer]
+
+        builder = StateGraph(State)
+        for name in ("a", "b", "c"):
+            builder.add_node(name, lambda state, name=name: {"messages": [{"node": name}]})
+        builder.add_edge(START, "a")
+        builder.add_edge("a", "b")
+        builder.add_edge("b", "c")
+        builder.add_edge("c", END)
+        graph = builder.compile(checkpointer=MemorySaver())
+        config = {"configurable": {"thread_id": "reducer"}}
+
+        graph.invoke({"messages": []}, config)
+
+        history = [len(s.values.get("messages", [])) for s in graph.get_state_history(config)]
+        assert history == [3, 2, 1, 0, 0]
+
+    def test_merge_reducer(self):
+        """Test dict updates merge by key, None resets, and current is never mutated."""
+        current = {"work_items": 1}
+        assert autonomous.merge_reducer(current, {"github": 2}) == {"work_items": 1, "github": 2}
+        assert autonomous.merge_reducer(current, {"work_items": 0}) == {"work_items": 0}
+        assert autonomous.merge_reducer(current, {}) is current
+        assert autonomous.merge_reducer(current, None) == {}
+        assert autonomous.merge_reducer(None, {"github": 1}) == {"github": 1}
+        assert current == {"work_items": 1}
+
+
+class SlowClient:
+    """MCP client stub whose connect takes a while and may fail."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    async def connect(self):
+        await asyncio.sleep(0.2)
+        if self.fail:
+            raise ConnectionError("server unavailable")
+
+    def get_tools(self):
+        return []
+
+
+class TestInitializeClients:
+    """Tests for connecting the MCP clients."""
+
+    @pytest.mark.asyncio
+    async def test_clients_connect_concurrently(self, monkeypatch):
+        """Test clients connect in parallel and one failure does not block the rest."""
+        monkeypatch.setattr(autonomous, "get_ado_client", lambda: SlowClient())
+        monkeypatch.setattr(autonomous, "get_github_client", lambda: SlowClient(fail=True))
+        monkeypatch.setattr(autonomous, "get_mermaid_client", lambda: None)
+
+        start = time.monotonic()
+        errors = await autonomous._initialize_clients()
+
+        assert time.monotonic() - start < 0.35
+        assert errors == {"ado": None, "github": "server unavailable"}
+
+    @pytest.mark.asyncio
+    async def test_recently_listed_clients_are_not_reconnected(self, monkeypatch):
+        """Test tools are listed once per TTL unless the cache is invalidated."""
+        client = SlowClient()
+        connects = []
+        connect = client.connect
+
+        async def counting_connect():
+            connects.append(1)
+            await connect()
+
+        client.connect = counting_connect
+        monkeypatch.setattr(autonomous, "get_ado_client", lambda: client)
+        monkeypatch.setattr(autonomous, "get_github_client", lambda: None)
+        monkeypatch.setattr(autonomous, "get_mermaid_client", lambda: None)
+        autonomous.invalidate_tools_cache()
+
+        await autonomous._initialize_clients()
+        errors = await autonomous._initialize_clients()
+        assert len(connects) == 1
+        assert errors == {"ado": None}
+
+        autonomous.invalidate_tools_cache()
+        await autonomous._initialize_clients()
+        assert len(connects) == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_initializations_share_one_connect(self, monkeypatch):
+        """Test runs starting together do not each list the tools of a stale client."""
+        client = SlowClient()
+        connects = []
+        connect = client.connect
+
+        async def counting_connect():
+            connects.append(1)
+            await connect()
+
+        client.connect = counting_connect
+        monkeypatch.setattr(autonomous, "get_ado_client", lambda: client)
+        monkeypatch.setattr(autonomous, "get_github_client", lambda: None)
+        monkeypatch.setattr(autonomous, "get_mermaid_client", lambda: None)
+        autonomous.invalidate_tools_cache()
+
+        results = await asyncio.gather(*(autonomous._initialize_clients() for _ in range(3)))
+
+        assert len(connects) == 1
+        assert results == [{"ado": None}] * 3
+        autonomous.invalidate_tools_cache()
+
+    def test_init_locks_dropped_with_their_loop(self, monkeypatch):
+        """Test each run's loop does not leave an initialization lock behind."""
+        monkeypatch.setattr(autonomous, "_init_locks", weakref.WeakKeyDictionary())
+        monkeypatch.setattr(autonomous, "get_ado_client", lambda: SlowClient())
+        monkeypatch.setattr(autonomous, "get_github_client", lambda: None)
+        monkeypatch.setattr(autonomous, "get_mermaid_client", lambda: None)
+
+        async def start_runs():
+            autonomous.invalidate_tools_cache()
+            await asyncio.gather(*(autonomous._initialize_clients() for _ in range(2)))
+
+        for _ in range(3):
+            asyncio.run(start_runs())
+
+        assert len(autonomous._init_locks) <= 1
+        autonomous.invalidate_tools_cache()
+
+    def test_client_configuration_is_read_once(self, monkeypatch):
+        """Test an unconfigured client stays None until the clients are reset."""
+        monkeypatch.delenv("AZURE_DEVOPS_ORGANIZATION", raising=False)
+        autonomous.reset_mcp_clients()
+        assert autonomous.get_ado_client() is None
+
+        monkeypatch.setenv("AZURE_DEVOPS_ORGANIZATION", "org")
+        monkeypatch.setenv("AZURE_DEVOPS_PROJECT", "project")
+        assert autonomous.get_ado_client() is None
+
+        autonomous.reset_mcp_clients()
+        client = autonomous.get_ado_client()
+        assert client is not None and autonomous.get_ado_client() is client
+        autonomous.reset_mcp_clients()
+
+    def test_all_tools_built_from_configured_clients(self, monkeypatch):
+        """Test get_all_tools converts each configured client's tools and skips the rest."""
+        ado = FakeAdoClient()
+        ado.get_tools = lambda: [{"name": "wit_get_work_item"}]
+        monkeypatch.setattr(autonomous, "get_ado_client", lambda: ado)
+        monkeypatch.setattr(autonomous, "get_github_client", lambda: FakeClient())
+        monkeypatch.setattr(autonomous, "get_mermaid_client", lambda: None)
+        autonomous.invalidate_tools_cache()
+
+        tools = autonomous.get_all_tools()
+        autonomous.invalidate_tools_cache()
+
+        assert [t.name for t in tools] == ["ado_wit_get_work_item", "ado_wit_batch_create_work_items"]
+
+    def test_concurrent_callers_build_tools_once(self, monkeypatch):
+        """Test threads racing on an empty cache share one build."""
+        listings = []
+        client = FakeClient()
+
+        def get_tools():
+            listings.append(1)
+            time.sleep(0.05)
+            return [{"name": "list_branches"}]
+
+        client.get_tools = get_tools
+        monkeypatch.setattr(autonomous, "get_ado_client", lambda: None)
+        monkeypatch.setattr(autonomous, "get_github_client", lambda: client)
+        monkeypatch.setattr(autonomous, "get_mermaid_client", lambda: None)
+        autonomous.invalidate_tools_cache()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: autonomous.get_all_tools(), range(4)))
+        autonomous.invalidate_tools_cache()
+
+        assert len(listings) == 1
+        assert all(tools is results[0] for tools in results)
+
+
+class TestTaskCache:
+    """Tests for reusing built task prompts."""
+
+    def test_content_key_separates_parts(self):
+        """Test the key depends on the parts and their boundaries."""
+        assert autonomous._content_key("ab", "c") == autonomous._content_key("ab", "c")
+        assert autonomous._content_key("ab", "c") != autonomous._content_key("a", "bc")
+        assert len(autonomous._content_key("x")) == 16
+
+    @pytest.mark.asyncio
+    async def test_architecture_retry_reuses_task(self, monkeypatch, tmp_path):
+        """Test a retry with unchanged inputs reuses the task string."""
+        monkeypatch.chdir(tmp_path)  # the node writes its diagrams under docs/
+        tasks = []
+
+        async def fake_execute(agent, task):
+            tasks.append(task)
+            return {"status": "completed", "output": "ARCHITECTURE_COMPLETE", "decision": {"type": "complete"}}
+
+        monkeypatch.setattr(autonomous, "cached_execute", fake_execute)
+        state = {"requirements": {"description": "Todo app"}, "work_items": {}}
+
+        await autonomous.architecture_agent_node(state)
+        await autonomous.architecture_agent_node(state)
+        await autonomous.architecture_agent_node({**state, "requirements": {"description": "Chat app"}})
+
+        assert tasks[1] is tasks[0]
+        assert "Chat app" in tasks[2]
+
+
+class TestCheckpointer:
+    """Tests for persisting the autonomous pipeline."""
+
+    def test_build_graph_uses_configured_checkpointer(self, monkeypatch):
+        """Test SDLC_CHECKPOINTER selects the compiled graph's checkpointer."""
+        monkeypatch.setenv("SDLC_CHECKPOINTER", "memory")
+        assert isinstance(autonomous.build_graph().checkpointer, MemorySaver)
+
+        monkeypatch.delenv("SDLC_CHECKPOINTER")
+        assert autonomous.build_graph().checkpointer is None
+
+    def test_module_graph_persists_with_sqlite(self, monkeypatch, tmp_path):
+        """Test the graph compiled at import gets a SQLite checkpointer, not the in-memory fallback."""
+        pytest.importorskip("langgraph.checkpoint.sqlite")
+        monkeypatch.setenv("SDLC_CHECKPOINTER", "sqlite")
+        monkeypatch.setenv("SDLC_CHECKPOINT_SQLITE_PATH", str(tmp_path / "ckpt.db"))
+        # A fresh interpreter, so the graph is built at import with no running loop
+        code = (
+            "from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver\n"
+            "from src.studio_graph_autonomous import graph\n"
+            "print(isinstance(graph.checkpointer, AsyncSqliteSaver))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+        assert result.stdout.strip().splitlines()[-1] == "True", result.stderr
+
+
+class TestApprovalRouting:
+    """Tests for routing after the approval interrupt."""
+
+    def test_approvals_continue_and_anything_else_retries(self):
+        """Test approval words continue; other or missing responses retry the agent."""
+        state = {"current_agent": "architecture"}
+        assert autonomous.route_after_approval({**state, "approval_response": " Approve "}) == "orchestrator"
+        assert autonomous.route_after_approval({**state, "approval_response": "revise"}) == "architecture"
+        assert autonomous.route_after_approval(state) == "architecture"
+
+    @pytest.mark.asyncio
+    async def test_approval_clears_reason(self, monkeypatch):
+        """Test the approval node drops the agent output it showed as the reason."""
+        monkeypatch.setattr(autonomous, "interrupt", lambda payload: "approve")
+        state = {"current_agent": "architecture", "requires_approval": True, "approval_reason": "x" * 10_000}
+        result = await autonomous.approval_node(state)
+        assert result["requires_approval"] is False
+        assert result["approval_reason"] is None
+
+
+class TestSpeculativeCodegen:
+    """Tests for generating code while the test plan agent is still running."""
+
+    def setup_method(self):
+        autonomous._code_cache.clear()
+        autonomous._codegen_tasks.clear()
+
+    @pytest.mark.asyncio
+    async def test_architecture_prefetches_code(self, monkeypatch):
+        """Test code generation starts as soon as the architecture is done."""
+        generated = []
+
+        async def generate_code(project_name, arch_description, req_description):
+            generated.append(arch_description)
+            return "### FILE: app.py"
+
+        async def test_plan(state):
+            await asyncio.sleep(0.05)
+            assert generated == ["Layers"]  # running before the test plan finishes
+            return {"test_plan_complete": True}
+
+        async def architecture(state):
+            return {"architecture": {"description": "Layers"}, "requires_approval": False}
+
+        monkeypatch.setattr(autonomous, "SPECULATIVE_CODEGEN", True)
+        monkeypatch.setattr(autonomous, "_generate_code", generate_code)
+        monkeypatch.setattr(autonomous, "test_plan_agent_node", test_plan)
+        monkeypatch.setattr(autonomous, "architecture_agent_node", architecture)
+
+        state = await autonomous.plan_and_architecture_node({"project_name": "p"})
+        key = autonomous._content_key(*autonomous._codegen_inputs({"project_name": "p", **state}))
+
+        assert await autonomous._speculative_code(key) == "### FILE: app.py"
+        assert await autonomous._speculative_code(key) is None
+
+    @pytest.mark.asyncio
+    async def test_new_architecture_cancels_stale_prefetch(self, monkeypatch):
+        """Test a superseded speculative generation is cancelled."""
+        async def generate_code(*inputs):
+            await asyncio.sleep(1)
+
+        monkeypatch.setattr(autonomous, "_generate_code", generate_code)
+        autonomous._prefetch_code({"architecture": {"description": "v1"}})
+        stale = next(iter(autonomous._codegen_tasks.values()))
+        autonomous._prefetch_code({"architecture": {"description": "v2"}})
+        await asyncio.sleep(0)
+
+        assert stale.cancelled()
+        assert len(autonomous._codegen_tasks) == 1
+        next(iter(autonomous._codegen_tasks.values())).cancel()
+
+    @pytest.mark.asyncio
+    async def test_completion_cancels_unused_prefetch(self, monkeypatch):
+        """Test a run that ends without a development stage stops its speculative generation."""
+        async def generate_code(*inputs):
+            await asyncio.sleep(1)
+
+        monkeypatch.setattr(autonomous, "_generate_code", generate_code)
+        autonomous._prefetch_code({"architecture": {"description": "v1"}})
+        task = next(iter(autonomous._codegen_tasks.values()))
+
+        await autonomous.complete_node({})
+        await asyncio.sleep(0)
+
+        assert task.cancelled()
+        assert autonomous._codegen_tasks == {}
+
+
+class TestCodeArtifacts:
+    """Tests for keeping generated code out of graph state."""
+
+    @pytest.mark.asyncio
+    async def test_generated_code_is_stored_as_artifact(self, monkeypatch, tmp_path):
+        """Test state holds a handle to the code dump and messages only a preview."""
+        output = "### FILE: app.py\n" + "x = 1\n" * 1000
+
+        async def generate_code(*inputs):
+            return output
+
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path))
+        monkeypatch.delenv("GITHUB_OWNER", raising=False)
+        monkeypatch.setattr(autonomous, "_generate_code", generate_code)
+        autonomous._code_cache.clear()
+
+        result = await autonomous.developer_agent_node({"project_name": "p"})
+
+        handle = result["code_artifacts"]["description"]
+        assert is_artifact_ref(handle)
+        assert load_artifact(handle) == output
+        assert len(result["messages"][0]["details"]) == 500
+
+    @pytest.mark.asyncio
+    async def test_completion_keeps_unpushed_code(self, monkeypatch, tmp_path):
+        """Test a run that did not push its code to GitHub keeps the stored code dump."""
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path))
+        code_artifacts = {"description": store_artifact("x = 1"), "github": {"skipped": "GITHUB_OWNER not configured"}}
+
+        result = await autonomous.complete_node({"code_artifacts": code_artifacts})
+
+        assert result["code_artifacts"] == code_artifacts
+        assert load_artifact(code_artifacts["description"]) == "x = 1"
+
+    @pytest.mark.asyncio
+    async def test_completion_deletes_pushed_code(self, monkeypatch, tmp_path):
+        """Test the code dump is removed once every file is in GitHub, keeping the summary."""
+        monkeypatch.setenv("SDLC_ARTIFACT_DIR", str(tmp_path))
+        github = {"files_pushed": 2, "total_files": 2}
+        code_artifacts = {"description": store_artifact("x = 1"), "github": github}
+
+        result = await autonomous.complete_node({"code_artifacts": code_artifacts})
+
+        assert result["code_artifacts"] == {"github": github}
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestPushFiles:
+    """Tests for pushing generated files to GitHub."""
+
+    def test_parse_code_artifacts(self):
+        """Test FILE blocks are split on headers, keeping inner fences and dropping the closing one."""
+        output = (
+            "Intro\n"
+            "### FILE: app.py\n```python\nimport os\n```\n\n"
+            "### FILE: README.md\n```markdown\n# App\n```bash\nrun\n```\n```\n"
+        )
+        assert autonomous.parse_code_artifacts(output) == [
+            ("app.py", "import os"),
+            ("README.md", "# App\n```bash\nrun\n```"),
+        ]
+
+    def test_is_error_result(self):
+        """Test error text is detected case-insensitively and other results are not errors."""
+        assert autonomous._is_error_result({"text": "MCP ERROR: Not Found"})
+        assert autonomous._is_error_result({"text": "REST error 404"})
+        assert not autonomous._is_error_result({"text": '{"id": 1}'})
+        assert not autonomous._is_error_result({"id": 1})
+        assert not autonomous._is_error_result("error")
+
+    @pytest.mark.asyncio
+    async def test_files_pushed_in_one_commit(self):
+        """Test all files go out in a single push_files call."""
+        client = FakeClient()
+        files = [("app.py", "import os"), ("README.md", "# App")]
+
+        pushed, failed = await autonomous._push_files(client, "me", "repo", "main", files)
+
+        assert pushed == ["app.py", "README.md"]
+        assert failed == []
+        assert [name for name, _ in client.calls] == ["push_files"]
+        assert client.calls[0][1]["files"] == [
+            {"path": "app.py", "content": "import os"},
+            {"path": "README.md", "content": "# App"},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_rejected_batch_falls_back_to_single_files(self):
+        """Test a failed push_files call is retried file by file."""
+        client = FakeClient()
+
+        async def call_tool(tool_name, arguments):
+            client.calls.append((tool_name, arguments))
+            if tool_name == "push_files":
+                return {"text": "Error: push_files is not supported"}
+            return {}
+
+        client.call_tool = call_tool
+        files = [("app.py", "import os"), ("README.md", "# App")]
+
+        pushed, failed = await autonomous._push_files(client, "me", "repo", "main", files)
+
+        assert pushed == ["app.py", "README.md"]
+        assert failed == []
+        assert [name for name, _ in client.calls] == ["push_files", "create_or_update_file", "create_or_update_file"]
+
+
+class TestAutoApproval:
+    """Tests for skipping the approval interrupt on confident agents."""
+
+    def test_confident_approval_requests_are_auto_approved(self):
+        """Test approval is only required below the agent's confidence threshold."""
+        agent = FakeAgent()
+        agent.min_confidence_for_autonomy = autonomous.ConfidenceLevel.MEDIUM
+
+        assert not autonomous._needs_approval(agent, "request_approval", "high")
+        assert not autonomous._needs_approval(agent, "request_approval", "medium")
+        assert autonomous._needs_approval(agent, "request_approval", "low")
+        assert autonomous._needs_approval(agent, "request_approval", "unsure")
+        assert not autonomous._needs_approval(agent, "complete", "low")